@@ -8,6 +8,11 @@ CVLAB_DIR = os.path.abspath(__file__ + "/..").replace("\\","/")
 def main(*args, **kwargs):
     import os
     import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "run":
+        from .headless import main as headless_main
+        return headless_main(sys.argv[2:])
+
     import sip
     import numpy as np
 
@@ -10,4 +10,4 @@ if __package__ is None and not hasattr(sys, 'frozen'):
 from cvlab import main
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
@@ -0,0 +1,13 @@
+"""
+Benchmarks of CV Lab processing engine.
+
+The suite of sample and synthetic diagrams is executed by:
+    python -m cvlab.bench --output results.json
+
+Each module can be executed separately, e.g.:
+    python -m cvlab.bench.channels
+
+Benchmarks run headless, so this package switches CV Lab into headless mode.
+"""
+
+from .. import headless
@@ -0,0 +1,67 @@
+"""
+Compares the vectorized processing of multi-channel images with the split/merge path of CoreElement.
+
+Allocations are measured with tracemalloc (NumPy and OpenCV arrays are traced).
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+import numpy as np
+
+from ..core.core_element import CoreElement
+from ..diagram.data import Data
+from ..diagram.elements.color import ColorNormalizer, ContrastChange
+
+
+def measure(element, image, repeats):
+    inputs = {"input": Data(image)}
+    parameters = {name: parameter.get() for name, parameter in element.parameters.items()}
+
+    tracemalloc.start()
+    outputs = {}
+    element.process_inputs(inputs, outputs, parameters)
+    allocated, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        element.process_inputs(inputs, {}, parameters)
+    duration = (time.perf_counter() - start) / repeats
+
+    return outputs["output"].value, {"time_ms": duration * 1000, "peak_bytes": peak}
+
+
+def run(width=1920, height=1080, channels=3, repeats=20):
+    image = np.random.randint(0, 256, (height, width, channels), np.uint8)
+    results = {}
+    for element_class in (ColorNormalizer, ContrastChange):
+        element = element_class()
+        assert element.vectorized_channels
+        vectorized, results_vectorized = measure(element, image, repeats)
+        element.vectorized_channels = False
+        split, results_split = measure(element, image, repeats)
+        element.vectorized_channels = True
+        results[element_class.__name__] = {
+            "vectorized": results_vectorized,
+            "split_merge": results_split,
+            "saved_bytes": results_split["peak_bytes"] - results_vectorized["peak_bytes"],
+            "max_difference": int(np.abs(vectorized.astype(int) - split.astype(int)).max()),
+        }
+    return results
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog="python -m cvlab.bench.channels", description=__doc__.strip())
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--channels", type=int, default=3)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args(args)
+    print(json.dumps(run(args.width, args.height, args.channels, args.repeats), indent=2))
+
+
+if __name__ == "__main__":
+    main()
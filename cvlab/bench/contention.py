@@ -0,0 +1,102 @@
+"""
+Measures the contention of parallel chains of elements, which share no data - only the framework.
+
+Each chain has its own source, updated in every iteration:
+    sync     - chains of synchronous elements, each chain driven by its own thread
+    threaded - chains of threaded elements, calculated by the workers of the scheduler (one per chain)
+
+The result of N chains is compared with a single chain - without shared locks on the data path,
+the time of an update of all the chains grows with the number of chains only as much as the cores are busy.
+"""
+
+import argparse
+import json
+import threading
+import time
+
+import numpy as np
+
+from .. import headless
+from ..diagram.elements.base import Data
+from .overhead import CLASSES
+
+
+def build(mode, chains, length):
+    """Returns (diagram, sources, last elements)"""
+    source_class, noop = CLASSES[mode][:2]
+    diagram = headless.create_diagram()
+    sources, lasts = [], []
+    for row in range(chains):
+        previous = source_class()
+        diagram.add_element(previous, (0, row))
+        previous.outputs["output"].put(Data(np.zeros((1, 1), np.uint8)))
+        sources.append(previous)
+        for column in range(length):
+            element = noop()
+            diagram.add_element(element, (column + 1, row))
+            diagram.connect_io(previous.outputs["output"], element.inputs["input"])
+            previous = element
+        lasts.append(previous)
+    if mode == "threaded":
+        diagram.scheduler.set_workers(chains)
+    headless.wait_idle(diagram)
+    return diagram, sources, lasts
+
+
+def update_sync(sources, value):
+    # the chains are calculated by the threads setting the values of their sources
+    threads = [threading.Thread(target=source.outputs["output"].get().set_value, args=(value,)) for source in sources]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def update_threaded(diagram, sources, value):
+    for source in sources:
+        source.outputs["output"].get().set_value(value)
+    headless.wait_idle(diagram)
+
+
+def measure(mode, chains, length, iterations):
+    diagram, sources, lasts = build(mode, chains, length)
+    times = []
+    for i in range(iterations):
+        value = np.full((1, 1), i % 256, np.uint8)
+        start = time.perf_counter()
+        if mode == "sync":
+            update_sync(sources, value)
+        else:
+            update_threaded(diagram, sources, value)
+        times.append(time.perf_counter() - start)
+    assert all(last.outputs["output"].get().value[0, 0] == (iterations - 1) % 256 for last in lasts)
+    diagram.clear()
+    per_update = float(np.median(times))
+    return {"chains": chains, "hops": chains * length, "update_median_us": per_update * 1e6,
+            "update_p95_us": float(np.percentile(times, 95)) * 1e6, "per_hop_us": per_update / (chains * length) * 1e6}
+
+
+def run(chains=16, length=20, iterations=100, modes=("sync", "threaded")):
+    results = {}
+    for mode in modes:
+        single = measure(mode, 1, length, iterations)
+        parallel = measure(mode, chains, length, iterations)
+        # 1.0 - the chains do not slow each other down (beyond sharing the cores)
+        parallel["slowdown_per_hop"] = parallel["per_hop_us"] / single["per_hop_us"]
+        results[mode] = {"single": single, "parallel": parallel}
+    return results
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog="python -m cvlab.bench.contention", description=__doc__.strip(),
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chains", type=int, default=16, help="number of parallel chains")
+    parser.add_argument("--length", type=int, default=20, help="number of elements of each chain")
+    parser.add_argument("--iterations", type=int, default=100, help="updates of the sources")
+    parser.add_argument("--modes", nargs="*", default=["sync", "threaded"])
+    args = parser.parse_args(args)
+    print(json.dumps(run(args.chains, args.length, args.iterations, args.modes), indent=2))
+
+
+if __name__ == "__main__":
+    main()
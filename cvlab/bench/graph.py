@@ -0,0 +1,131 @@
+"""
+Measures building, loading and clearing of big diagrams, and the part of it spent in graph bookkeeping:
+ids of elements and parameters, the index of connections and the topological order (loop detection).
+
+The diagram is a random DAG of Forwarders and Plus operators, saved with the elements in random order,
+so that the topological order must be updated while the diagram is loaded. It has no sources,
+so the elements have nothing to calculate.
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from tempfile import mkstemp
+
+from .. import headless
+from ..diagram import id_manager
+from ..diagram.diagram import Diagram, TopologicalOrder
+from ..diagram.elements.data_flow import Forwarder
+from ..diagram.elements.operators import PlusOperator
+
+
+# the functions doing the bookkeeping
+BOOKKEEPING = [
+    (id_manager, "next_id"),
+    (TopologicalOrder, "add"),
+    (TopologicalOrder, "remove"),
+    (TopologicalOrder, "add_connection"),
+    (TopologicalOrder, "reorder"),
+    (Diagram, "_add_connection"),
+    (Diagram, "_remove_connection"),
+    (Diagram, "delete_connections_with_connector"),
+]
+
+
+class BookkeepingTimer:
+    """Replaces the bookkeeping functions with wrappers measuring their total time"""
+
+    def __init__(self):
+        self.total = 0.0
+        self.depth = 0
+
+    def wrap(self, function):
+        def wrapper(*args, **kwargs):
+            self.depth += 1
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.depth -= 1
+                if not self.depth:
+                    self.total += time.perf_counter() - start
+        return wrapper
+
+    def __enter__(self):
+        self.originals = [(owner, name, getattr(owner, name)) for owner, name in BOOKKEEPING]
+        for owner, name, function in self.originals:
+            setattr(owner, name, self.wrap(function))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        for owner, name, function in self.originals:
+            setattr(owner, name, function)
+
+    def take(self):
+        total, self.total = self.total, 0.0
+        return total * 1000
+
+
+def build(size, seed=0):
+    """Returns a random DAG of 'size' elements, added in random order"""
+    rng = random.Random(seed)
+    elements = [PlusOperator() if i % 10 == 0 else Forwarder() for i in range(size)]   # in topological order
+    diagram = headless.create_diagram()
+    for position, index in enumerate(rng.sample(range(size), size)):
+        diagram.add_element(elements[index], (position, 0))
+    for index, element in enumerate(elements[1:], 1):
+        input_ = list(element.inputs.values())[0]
+        for _ in range(3 if input_.multiple else 1):
+            source = elements[rng.randrange(max(0, index - 50), index)]
+            diagram.connect_io(source.outputs["output"], input_)
+    return diagram
+
+
+def run(size=5000, workers=1):
+    results = {"elements": size}
+    with BookkeepingTimer() as timer:
+        start = time.perf_counter()
+        diagram = build(size)
+        results["build_ms"] = (time.perf_counter() - start) * 1000
+        results["build_bookkeeping_ms"] = timer.take()
+        results["connections"] = len(diagram.connections)
+
+        handle, path = mkstemp(".cvlab")
+        os.close(handle)
+        try:
+            with open(path, "w") as f:
+                f.write(diagram.save_to_json(os.path.dirname(path)))
+            diagram.clear()
+            timer.take()
+
+            start = time.perf_counter()
+            diagram = headless.load_diagram(path, workers)
+            results["load_ms"] = (time.perf_counter() - start) * 1000
+            results["load_bookkeeping_ms"] = timer.take()
+        finally:
+            os.remove(path)
+
+        order = diagram.topological_order()
+        ranks = {element: rank for rank, element in enumerate(order)}
+        results["valid_order"] = len(order) == size and all(ranks[o.parent] < ranks[i.parent]
+                                                             for o, i in diagram.connections)
+
+        start = time.perf_counter()
+        diagram.clear()
+        results["clear_ms"] = (time.perf_counter() - start) * 1000
+        results["clear_bookkeeping_ms"] = timer.take()
+    return results
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog="python -m cvlab.bench.graph", description=__doc__.strip())
+    parser.add_argument("--sizes", nargs="*", type=int, default=[1000, 5000])
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args(args)
+    print(json.dumps({size: run(size, args.workers) for size in args.sizes}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
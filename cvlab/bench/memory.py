@@ -0,0 +1,68 @@
+"""
+Measures the memory overhead of long sequences of images (e.g. loaded from thousands of files).
+
+All items share one tiny image, so only the overhead of the Data objects is measured - for a sequence
+made of Data items, for a compact ImageSequence, their copies, placeholders and observed sequences.
+"""
+
+import argparse
+import json
+import tracemalloc
+
+import numpy as np
+
+from .. import headless
+from ..diagram.data import Data, Sequence, ImageSequence
+
+
+def measure(build):
+    """Returns the number of bytes allocated by build() and kept alive by its result"""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del result
+    return after - before
+
+
+def observer(data):
+    pass
+
+
+def observed(sequence):
+    sequence.add_observer(observer, True)
+    return sequence
+
+
+def run(items=10000):
+    image = np.zeros((1, 1, 3), np.uint8)
+    sequences = {
+        "sequence": lambda: Sequence([Data(image) for _ in range(items)]),
+        "image_sequence": lambda: ImageSequence([image] * items),
+    }
+    results = {}
+    for name, build in sequences.items():
+        source = build()
+        cases = {
+            "create": build,
+            "copy": source.copy,
+            "placeholder": source.create_placeholder,
+            "observed": lambda: observed(build()),
+            "observed_and_accessed": lambda: [d for d in observed(build())],
+        }
+        results[name] = {case: measure(function) / items for case, function in cases.items()}
+    return {"items": items, "bytes_per_item": results}
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog="python -m cvlab.bench.memory", description=__doc__.strip())
+    parser.add_argument("--items", type=int, default=10000)
+    args = parser.parse_args(args)
+    print(json.dumps(run(args.items), indent=2))
+
+
+if __name__ == "__main__":
+    main()
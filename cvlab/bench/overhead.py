@@ -0,0 +1,171 @@
+"""
+Measures the overhead of the framework per element invocation (hop), with 1x1 images, so that
+processing itself costs nothing: copies of Data, locks, preparing the structure and propagating outputs.
+
+Topologies:
+    forwarders - a chain of Forwarders (the output is the input Data itself)
+    chain      - a chain of no-op elements (each one creates its output Data)
+    fan        - the source connected to parallel branches of no-op elements, joined by one element
+
+Each topology runs with synchronous elements (CoreElement - calculated by the thread changing their inputs)
+and threaded elements (ThreadedElement - calculated by workers of the scheduler).
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from .. import headless
+from ..core.core_element import CoreElement
+from ..diagram.elements.base import *
+from ..diagram.elements.data_flow import Forwarder
+
+
+class Source:
+    name = "Source"
+    comment = "Its output is set by the benchmark"
+
+    def get_attributes(self):
+        return [], [Output("output")], []
+
+    def process(self):
+        pass
+
+
+class NoOp:
+    name = "No-op"
+    comment = "Passes the value of its input in a new Data"
+
+    def get_attributes(self):
+        return [Input("input")], [Output("output")], []
+
+    def process_inputs(self, inputs, outputs, parameters):
+        outputs["output"] = Data(inputs["input"].value)
+
+
+class Join:
+    name = "Join"
+    comment = "Passes the value of its first input in a new Data"
+
+    def get_attributes(self):
+        return [Input("inputs", multiple=True)], [Output("output")], []
+
+    def get_processing_units(self, inputs, parameters):
+        ins = {i: d for i, d in enumerate(inputs["inputs"].value)}
+        return CoreElement.get_default_processing_units(self, ins, parameters, ["output"])
+
+    def process_inputs(self, inputs, outputs, parameters):
+        outputs["output"] = Data(inputs[0].value)
+
+
+class SyncSource(Source, InputGuiElement, CoreElement):
+    pass
+
+
+class ThreadedSource(Source, InputGuiElement, ThreadedElement):
+    pass
+
+
+class SyncNoOp(NoOp, FunctionGuiElement, CoreElement):
+    pass
+
+
+class ThreadedNoOp(NoOp, FunctionGuiElement, ThreadedElement):
+    pass
+
+
+class SyncJoin(Join, FunctionGuiElement, CoreElement):
+    pass
+
+
+class ThreadedJoin(Join, FunctionGuiElement, ThreadedElement):
+    pass
+
+
+class SyncForwarder(FunctionGuiElement, CoreElement):
+    name = Forwarder.name
+    comment = Forwarder.comment
+    get_attributes = Forwarder.get_attributes
+    get_processing_units = Forwarder.get_processing_units
+    process_units = Forwarder.process_units
+
+
+CLASSES = {
+    # mode -> (source, no-op, join, forwarder)
+    "sync": (SyncSource, SyncNoOp, SyncJoin, SyncForwarder),
+    "threaded": (ThreadedSource, ThreadedNoOp, ThreadedJoin, Forwarder),
+}
+
+
+def build(topology, mode, length, width):
+    """Returns (diagram, source, last element, number of hops of one update)"""
+    source_class, noop, join, forwarder = CLASSES[mode]
+    diagram = headless.create_diagram()
+    source = source_class()
+    diagram.add_element(source, (0, 0))
+    source.outputs["output"].put(Data(np.zeros((1, 1), np.uint8)))
+
+    def chain(element_class, previous, count, row):
+        for i in range(count):
+            element = element_class()
+            diagram.add_element(element, (i + 1, row))
+            diagram.connect_io(previous.outputs["output"], element.inputs[list(element.inputs)[0]])
+            previous = element
+        return previous
+
+    if topology == "forwarders":
+        return diagram, source, chain(forwarder, source, length, 0), length
+    if topology == "chain":
+        return diagram, source, chain(noop, source, length, 0), length
+    depth = max(1, length // width)
+    last = join()
+    diagram.add_element(last, (depth + 1, 0))
+    for row in range(width):
+        branch = chain(noop, source, depth, row)
+        diagram.connect_io(branch.outputs["output"], last.inputs["inputs"])
+    return diagram, source, last, depth * width + 1
+
+
+def measure(topology, mode, length, width, iterations, workers):
+    diagram, source, last, hops = build(topology, mode, length, width)
+    if workers:
+        diagram.scheduler.set_workers(workers)
+    data = source.outputs["output"].get()
+    headless.wait_idle(diagram)
+    times = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        # a new value of the source - the Data objects (and the structure) of the diagram stay the same
+        data.set_value(np.full((1, 1), i % 256, np.uint8))
+        headless.wait_idle(diagram)
+        times.append(time.perf_counter() - start)
+    assert last.outputs["output"].get().value[0, 0] == (iterations - 1) % 256
+    diagram.clear()
+    per_update = float(np.median(times))
+    return {"hops": hops, "update_median_us": per_update * 1e6, "update_p95_us": float(np.percentile(times, 95)) * 1e6,
+            "per_hop_us": per_update / hops * 1e6}
+
+
+def run(length=100, width=10, iterations=200, workers=None, topologies=("forwarders", "chain", "fan"),
+        modes=("sync", "threaded")):
+    return {topology: {mode: measure(topology, mode, length, width, iterations, workers) for mode in modes}
+            for topology in topologies}
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog="python -m cvlab.bench.overhead", description=__doc__.strip(),
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--length", type=int, default=100, help="number of elements of each topology")
+    parser.add_argument("--width", type=int, default=10, help="number of branches of the fan topology")
+    parser.add_argument("--iterations", type=int, default=200, help="updates of the source")
+    parser.add_argument("--workers", type=int, default=None, help="worker threads of threaded elements")
+    parser.add_argument("--topologies", nargs="*", default=["forwarders", "chain", "fan"])
+    parser.add_argument("--modes", nargs="*", default=["sync", "threaded"])
+    args = parser.parse_args(args)
+    print(json.dumps(run(args.length, args.width, args.iterations, args.workers, args.topologies, args.modes), indent=2))
+
+
+if __name__ == "__main__":
+    main()
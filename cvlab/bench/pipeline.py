@@ -0,0 +1,161 @@
+"""
+Measures processing of a live stream by a chain of elements, with a join of two branches at the end.
+
+A synthetic source produces frames filled with their frame numbers. The join checks that both of its
+inputs belong to the same frame. The stream policy 'interrupt' restarts each element when a new frame
+arrives (stop-and-go), 'auto' pipelines the frames.
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from .. import headless
+from ..diagram.elements.base import *
+
+
+class SyntheticSource(InputElement):
+    name = "Synthetic source"
+    comment = "Produces frames filled with their frame numbers"
+    dedicated_thread = True
+
+    def __init__(self):
+        super(SyntheticSource, self).__init__()
+        self.frame_number = 0
+        self.skipped_frames = 0
+        self.sent = {}      # frame number -> time of sending
+        self.recalculate(True, True, True)
+
+    def get_attributes(self):
+        return [], [Output("output")], [IntParameter("width", value=640, min_=1, max_=4096),
+                                        IntParameter("height", value=480, min_=1, max_=4096),
+                                        FloatParameter("fps", value=100, min_=0.1, max_=1000)]
+
+    def process(self):
+        if not self.outputs["output"].get():
+            self.outputs["output"].put(Data())
+        data = self.outputs["output"].get()
+        shape = self.parameters["height"].get(), self.parameters["width"].get(), 3
+        period = 1.0 / self.parameters["fps"].get()
+        next_time = time.perf_counter()
+        while True:
+            self.may_interrupt()
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            next_time += period
+            self.frame_number += 1
+            if self.outputs_congested():
+                self.skipped_frames += 1
+                continue
+            image = np.full(shape, self.frame_number % 256, np.uint8)
+            self.sent[self.frame_number] = time.perf_counter()
+            data.set_value(image, self.frame_number)
+
+
+class Stage(NormalElement):
+    name = "Stage"
+    comment = "Blurs its input several times"
+
+    def get_attributes(self):
+        return [Input("input")], [Output("output")], [IntParameter("iterations", value=4, min_=1, max_=100)]
+
+    def process_inputs(self, inputs, outputs, parameters):
+        image = inputs["input"].value
+        for _ in range(parameters["iterations"]):
+            self.may_interrupt()
+            image = cv.GaussianBlur(image, (9, 9), 0)
+        outputs["output"] = Data(image)
+
+
+class Join(NormalElement):
+    name = "Join"
+    comment = "Checks that both inputs belong to the same frame and records the latency"
+
+    def __init__(self):
+        super(Join, self).__init__()
+        self.received = {}      # frame number -> time of receiving
+        self.mismatched = 0
+
+    def get_attributes(self):
+        return [Input("a"), Input("b")], [Output("output")], []
+
+    def process_inputs(self, inputs, outputs, parameters):
+        a, b = inputs["a"], inputs["b"]
+        if a.frame != b.frame or a.value[0, 0, 0] != b.value[0, 0, 0]:
+            self.mismatched += 1
+        self.received[a.frame] = time.perf_counter()
+        outputs["output"] = Data(a.value)
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else None
+
+
+def run(policy, stages=4, iterations=4, fps=100, duration=5.0, width=640, height=480):
+    diagram = headless.create_diagram()
+    source = SyntheticSource()
+    diagram.add_element(source, (0, 0))
+    source.parameters["fps"].set(fps)
+    source.parameters["width"].set(width)
+    source.parameters["height"].set(height)
+
+    elements = []
+    previous = source
+    for i in range(stages):
+        stage = Stage()
+        stage.parameters["iterations"].set(iterations)
+        diagram.add_element(stage, (i + 1, 0))
+        diagram.connect_io(previous.outputs["output"], stage.inputs["input"])
+        elements.append(stage)
+        previous = stage
+    shortcut = Stage()
+    shortcut.parameters["iterations"].set(1)
+    diagram.add_element(shortcut, (1, 1))
+    diagram.connect_io(source.outputs["output"], shortcut.inputs["input"])
+    join = Join()
+    diagram.add_element(join, (stages + 1, 0))
+    diagram.connect_io(previous.outputs["output"], join.inputs["a"])
+    diagram.connect_io(shortcut.outputs["output"], join.inputs["b"])
+    elements += [shortcut, join]
+    for element in elements:
+        element.set_stream_policy(policy)
+
+    time.sleep(duration)
+    sent, received = dict(source.sent), dict(join.received)
+    frames = source.frame_number
+    for element in [source] + elements:
+        element.delete()
+
+    latencies = [(received[f] - sent[f]) * 1000 for f in received if f in sent]
+    return {
+        "frames_produced": frames,
+        "frames_sent": len(sent),
+        "frames_skipped_by_source": source.skipped_frames,
+        "frames_completed": len(received),
+        "throughput_fps": len(received) / duration,
+        "latency_p50_ms": percentile(latencies, 50),
+        "latency_p95_ms": percentile(latencies, 95),
+        "mismatched_joins": join.mismatched,
+    }
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog="python -m cvlab.bench.pipeline", description=__doc__.strip())
+    parser.add_argument("--stages", type=int, default=4)
+    parser.add_argument("--iterations", type=int, default=4, help="blur iterations in each stage")
+    parser.add_argument("--fps", type=float, default=100, help="frame rate of the source")
+    parser.add_argument("--duration", type=float, default=5.0, help="duration of each run in seconds")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--policies", nargs="*", default=["interrupt", "auto"])
+    args = parser.parse_args(args)
+    results = {policy: run(policy, args.stages, args.iterations, args.fps, args.duration, args.width, args.height)
+               for policy in args.policies}
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Runs the sample diagrams (cvlab_samples/*.cvlab) and synthetic diagrams of increasing size headless,
+with fixed inputs, and reports their throughput, latency percentiles, peak RSS and numbers of elements.
+
+Diagrams without live sources are recalculated from their sources in each iteration. Diagrams with live
+sources (video loaders) run until their last elements get the given number of frames - the latency of
+a frame is the time from its reading to its arrival at the last of these elements.
+Peak RSS is the peak of the whole process so far, so it never decreases between the diagrams.
+Experimental elements are enabled, as some of the samples use them.
+
+Save the results of two commits and compare them to catch regressions of the engine.
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from glob import glob
+
+import numpy as np
+
+from .. import headless, CVLAB_DIR
+from ..diagram.elements.blur import OpenCVBlur
+from ..diagram.elements.image_io import ImageLoader
+from ..diagram.elements.operators import MaxOperator
+from ..diagram.elements.video_io import Camera, VideoLoader
+
+
+SAMPLES_DIR = os.path.join(os.path.dirname(CVLAB_DIR), "cvlab_samples")
+IMAGE = os.path.join(CVLAB_DIR, "images", "lena.jpg")
+VIDEO = os.path.join(CVLAB_DIR, "images", "fractal.avi")
+
+PERCENTILES = (50, 95, 99)
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux, in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / (1 << 10)
+
+
+def latency_statistics(latencies):
+    stats = {"latency_mean_ms": float(np.mean(latencies)) if latencies else None}
+    for p in PERCENTILES:
+        stats["latency_p{}_ms".format(p)] = float(np.percentile(latencies, p)) if latencies else None
+    return stats
+
+
+def set_fixed_inputs(diagram, fps):
+    for element in diagram.elements:
+        if isinstance(element, VideoLoader):
+            element.parameters["device"].set(VIDEO)
+            element.parameters["fps"].set(fps)
+        elif isinstance(element, ImageLoader):
+            element.parameters["path"].set(IMAGE)
+
+
+def sinks(diagram, elements):
+    """Returns the elements without successors, reachable from the given elements"""
+    reachable = set()
+    pending = list(elements)
+    while pending:
+        element = pending.pop()
+        if element not in reachable:
+            reachable.add(element)
+            pending += diagram.successors(element)
+    return [e for e in reachable if not diagram.successors(e)]
+
+
+def run_static(diagram, iterations, timeout):
+    sources = [e for e in diagram.elements if not e.inputs]
+    latencies = []
+    calculations = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        diagram.scheduler.reset_counters()
+        begin = time.perf_counter()
+        for source in sources:
+            source.recalculate(True, True, True)
+        if not headless.wait_idle(diagram, timeout):
+            raise TimeoutError("the diagram has not finished in {} seconds".format(timeout))
+        latencies.append((time.perf_counter() - begin) * 1000)
+        calculations.append(diagram.scheduler.counters()["calculations"])
+    duration = time.perf_counter() - start
+    result = {"mode": "static", "iterations": iterations, "throughput_per_s": iterations / duration,
+              "calculations_per_iteration": float(np.mean(calculations))}
+    result.update(latency_statistics(latencies))
+    return result
+
+
+def run_stream(diagram, live_sources, frames, timeout):
+    sent = {}           # frame number -> time of reading
+    received = {}       # frame number -> times of arrival at the last elements
+    last_elements = sinks(diagram, live_sources)
+    completed = []      # frames which arrived at all the last elements
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def on_sent(data):
+        if data.frame is not None:
+            sent.setdefault(data.frame, time.perf_counter())
+
+    def on_received(data):
+        if data.frame is None:
+            return
+        with lock:
+            times = received.setdefault(data.frame, [])
+            times.append(time.perf_counter())
+            if len(times) == len(last_elements):
+                completed.append(data.frame)
+                if len(completed) >= frames:
+                    done.set()
+
+    # the structure of the outputs is settled after the first frame
+    deadline = time.perf_counter() + timeout
+    while any(e.state != e.STATE_READY for e in last_elements):
+        if time.perf_counter() > deadline:
+            raise TimeoutError("the diagram has not produced a frame in {} seconds".format(timeout))
+        time.sleep(0.01)
+    for source in live_sources:
+        for output in source.outputs.values():
+            output.get().add_observer(on_sent, True)
+    for element in last_elements:
+        for output in element.outputs.values():
+            output.get().add_observer(on_received, True)
+
+    start = time.perf_counter()
+    finished = done.wait(max(0.0, deadline - start))
+    duration = time.perf_counter() - start
+    with lock:
+        latencies = [(max(received[f]) - sent[f]) * 1000 for f in completed if f in sent]
+    result = {"mode": "stream", "frames": len(latencies), "finished": finished,
+              "throughput_per_s": len(completed) / duration if duration else None,
+              "frames_read": len(sent)}
+    result.update(latency_statistics(latencies))
+    return result
+
+
+def run_diagram(diagram, iterations, timeout, fps):
+    set_fixed_inputs(diagram, fps)
+    live_sources = [e for e in diagram.elements if isinstance(e, Camera)]
+    try:
+        if live_sources:
+            result = run_stream(diagram, live_sources, iterations, timeout)
+        else:
+            if not headless.wait_idle(diagram, timeout):
+                raise TimeoutError("the diagram has not finished in {} seconds".format(timeout))
+            result = run_static(diagram, iterations, timeout)
+        result["errors"] = sum(e.state == e.STATE_ERROR for e in diagram.elements)
+    finally:
+        counts = {"elements": len(diagram.elements), "connections": len(diagram.connections)}
+        diagram.clear()
+    result.update(counts)
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def synthetic_diagram(size, width=4):
+    """Returns a diagram of 'size' blurs: an image loader, 'width' chains of blurs and a maximum of the chains"""
+    diagram = headless.create_diagram()
+    loader = ImageLoader()
+    diagram.add_element(loader, (0, 0))
+    join = MaxOperator()
+    diagram.add_element(join, (size, 0))
+    for chain in range(width):
+        previous = loader
+        for index in range(chain, size, width):
+            blur = OpenCVBlur()
+            blur.parameters["ratio"].set(3)
+            diagram.add_element(blur, (index // width + 1, chain))
+            diagram.connect_io(previous.outputs["output"], blur.inputs["input"])
+            previous = blur
+        if previous is not loader:
+            diagram.connect_io(previous.outputs["output"], join.inputs["inputs"])
+    return diagram
+
+
+def run(samples=None, sizes=(16, 64, 256), iterations=20, timeout=60.0, fps=120.0, workers=None):
+    results = {"samples": {}, "synthetic": {}}
+    if samples is None:
+        samples = sorted(glob(os.path.join(SAMPLES_DIR, "*.cvlab")))
+    try:
+        # some samples use experimental elements (e.g. bloom.cvlab)
+        headless.enable_experimental_elements()
+    except ValueError as e:
+        print("WARNING", e, file=sys.stderr)
+    for path in samples:
+        name = os.path.basename(path)
+        start = time.perf_counter()
+        try:
+            diagram = headless.load_diagram(path, workers, start=False)
+        except Exception as e:
+            # e.g. elements of plugins, which are not installed
+            results["samples"][name] = {"error": "cannot load the diagram: {}".format(e)}
+            continue
+        if any(isinstance(e, Camera) and not isinstance(e, VideoLoader) for e in diagram.elements):
+            diagram.clear()
+            results["samples"][name] = {"skipped": "requires a camera"}
+            continue
+        set_fixed_inputs(diagram, fps)
+        diagram.scheduler.resume()
+        try:
+            results["samples"][name] = result = {"load_ms": (time.perf_counter() - start) * 1000}
+            result.update(run_diagram(diagram, iterations, timeout, fps))
+        except TimeoutError as e:
+            results["samples"][name] = {"error": str(e)}
+    for size in sizes:
+        start = time.perf_counter()
+        diagram = synthetic_diagram(size)
+        if workers:
+            diagram.scheduler.set_workers(workers)
+        try:
+            results["synthetic"][str(size)] = result = {"build_ms": (time.perf_counter() - start) * 1000}
+            result.update(run_diagram(diagram, iterations, timeout, fps))
+        except TimeoutError as e:
+            results["synthetic"][str(size)] = {"error": str(e)}
+    results["workers"] = workers or os.cpu_count()
+    return results
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog="python -m cvlab.bench", description=__doc__.strip(),
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", nargs="*", default=None, metavar="PATH",
+                        help="diagrams to run (default: cvlab_samples/*.cvlab)")
+    parser.add_argument("--sizes", nargs="*", type=int, default=[16, 64, 256],
+                        help="numbers of elements of the synthetic diagrams")
+    parser.add_argument("--iterations", type=int, default=20,
+                        help="recalculations of each diagram (frames of diagrams with live sources)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="maximal duration of each diagram in seconds")
+    parser.add_argument("--fps", type=float, default=120.0, help="frame rate of video loaders")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker threads (default: CPU cores)")
+    parser.add_argument("--output", default=None, metavar="PATH", help="saves the results to a .json file")
+    args = parser.parse_args(args)
+    results = run(args.samples, args.sizes, args.iterations, args.timeout, args.fps, args.workers)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
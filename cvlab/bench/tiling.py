@@ -0,0 +1,87 @@
+"""
+Measures processing of a big image by a chain of local filters (blurs, dilations and erosions), whole and in tiles.
+
+Whole - each element processes the entire image and keeps its full-size output.
+Tiled - the chain is processed tile by tile when the output of its last element is read,
+        the outputs of the other elements are never allocated.
+
+Peak memory is the peak of the arrays allocated during the calculation (traced by tracemalloc),
+besides the source image.
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+import numpy as np
+
+from .. import headless
+from ..core import tiling
+from ..diagram.elements.base import Data
+from ..diagram.elements.blur import OpenCVBlur
+from ..diagram.elements.filters import OpenCVDilate, OpenCVErode
+from .overhead import ThreadedSource
+
+
+def build(image, length):
+    """Returns (diagram, source, last element)"""
+    diagram = headless.create_diagram()
+    source = ThreadedSource()
+    diagram.add_element(source, (0, 0))
+    source.outputs["output"].put(Data(image))
+    previous = source
+    for i in range(length):
+        element = (OpenCVBlur, OpenCVDilate, OpenCVErode)[i % 3]()
+        if isinstance(element, OpenCVBlur):
+            element.parameters["ratio"].set(5)
+        diagram.add_element(element, (i + 1, 0))
+        diagram.connect_io(previous.outputs["output"], element.inputs["input"])
+        previous = element
+    return diagram, source, previous
+
+
+def measure(image, length, tiled, workers):
+    min_pixels = tiling.TILING_MIN_PIXELS
+    tiling.TILING_MIN_PIXELS = 0 if tiled else image.shape[0] * image.shape[1] + 1
+    diagram = None
+    try:
+        tracemalloc.start()
+        start = time.perf_counter()
+        diagram, source, last = build(image, length)
+        if workers:
+            diagram.scheduler.set_workers(workers)
+        headless.wait_idle(diagram)
+        result = last.outputs["output"].get().value
+        duration = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        tiling.TILING_MIN_PIXELS = min_pixels
+        if diagram is not None:
+            diagram.clear()
+    return result, {"time_ms": duration * 1000, "peak_mb": peak / (1 << 20), "output_mb": result.nbytes / (1 << 20)}
+
+
+def run(size=8192, channels=1, length=6, workers=None):
+    shape = (size, size, channels) if channels > 1 else (size, size)
+    image = np.random.default_rng(0).integers(0, 256, shape, np.uint8)
+    whole, results = measure(image, length, False, workers)
+    tiled, results_tiled = measure(image, length, True, workers)
+    return {"image_mb": image.nbytes / (1 << 20), "elements": length, "tile_size": tiling.TILE_SIZE,
+            "whole": results, "tiled": results_tiled, "equal": bool(np.array_equal(whole, tiled))}
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog="python -m cvlab.bench.tiling", description=__doc__.strip(),
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=8192, help="width and height of the image")
+    parser.add_argument("--channels", type=int, default=1)
+    parser.add_argument("--length", type=int, default=6, help="number of elements of the chain")
+    parser.add_argument("--workers", type=int, default=None, help="worker threads of the elements")
+    args = parser.parse_args(args)
+    print(json.dumps(run(args.size, args.channels, args.length, args.workers), indent=2))
+
+
+if __name__ == "__main__":
+    main()
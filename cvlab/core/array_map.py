@@ -0,0 +1,40 @@
+"""
+Values assigned to living arrays (e.g. fingerprints of the result cache, scales of proxies).
+"""
+
+import threading
+import weakref
+
+
+class ArrayMap:
+    """Values assigned to living arrays, by the identity of the array - an entry is removed with its array"""
+
+    def __init__(self):
+        self.values = {}    # id of the array -> (weak reference to the array, value)
+        self.lock = threading.Lock()
+
+    def get(self, array):
+        """Returns the value assigned to the array or None"""
+        with self.lock:
+            entry = self.values.get(id(array))
+        if entry is not None and entry[0]() is array:
+            return entry[1]
+        return None
+
+    def set(self, array, value, replace=True):
+        """Assigns the value to the array (arrays which cannot be weakly referenced are skipped)"""
+        key = id(array)
+
+        def remove(ref):
+            with self.lock:
+                if key in self.values and self.values[key][0] is ref:
+                    del self.values[key]
+
+        with self.lock:
+            entry = self.values.get(key)
+            if entry is not None and entry[0]() is array and not replace:
+                return
+            try:
+                self.values[key] = weakref.ref(array, remove), value
+            except TypeError:
+                pass
@@ -0,0 +1,140 @@
+"""
+Memoization of the results of processing units of cacheable elements (opt-in - deterministic elements without state).
+
+Results are stored under a key made of the element class, its parameters and fingerprints of its inputs.
+Arrays produced by a cached calculation get fingerprints derived from the key, so the content of an image
+is hashed only once, when it comes from an element which is not cacheable (e.g. a loader).
+
+Arrays passed between elements must not be modified in place - it is required by the elements anyway,
+as the same array is shared by all connected elements.
+"""
+
+import hashlib
+import mmap
+import os
+
+import numpy as np
+
+from ..diagram.data import Data
+from .array_map import ArrayMap
+from .lru import LruCache, MEGABYTE
+from .tiling import TiledValue
+
+
+# the cache is disabled, until a budget is set (e.g. in the GUI settings)
+DEFAULT_BUDGET = 0
+
+
+def _hash_array(array):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((array.shape, array.dtype.str)).encode())
+    if isinstance(array, np.memmap) and isinstance(array.base, mmap.mmap):
+        # memory-mapped files (e.g. big volumes) are identified by the file, instead of reading it
+        stat = os.stat(array.filename)
+        h.update(repr((array.filename, array.offset, stat.st_mtime_ns, stat.st_size)).encode())
+    elif array.dtype == object:
+        h.update(repr(array.tolist()).encode())
+    else:
+        h.update(np.ascontiguousarray(array).data)
+    return h.hexdigest()
+
+
+# fingerprints of living arrays - hashed once, or derived from the key of the calculation, which produced them
+_array_fingerprints = ArrayMap()
+
+
+def _array_fingerprint(array):
+    fingerprint = _array_fingerprints.get(array)
+    if fingerprint is None:
+        fingerprint = _hash_array(array)
+        _array_fingerprints.set(array, fingerprint, False)
+    return fingerprint
+
+
+def _unread(data):
+    """Returns the value of image Data, without computing lazy tiled values"""
+    value = data._value
+    return value if isinstance(value, TiledValue) else data.value
+
+
+def fingerprint(value):
+    """Returns a hashable fingerprint of a value (Data, array or a parameter value)"""
+    if isinstance(value, Data):
+        if value.type() == Data.SEQUENCE:
+            return "sequence", tuple(fingerprint(d) for d in value.value)
+        return "data", fingerprint(_unread(value))
+    if isinstance(value, np.ndarray):
+        return "array", _array_fingerprint(value)
+    if hasattr(value, "fingerprint"):
+        # e.g. ChunkedArray
+        return value.fingerprint()
+    if isinstance(value, (list, tuple)):
+        return type(value).__name__, tuple(fingerprint(v) for v in value)
+    if isinstance(value, dict):
+        return "dict", tuple(sorted((repr(k), fingerprint(v)) for k, v in value.items()))
+    return type(value).__name__, repr(value)
+
+
+def result_key(element, inputs, parameters, *extra):
+    """Returns the key of results of the element for given inputs and parameters"""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr((element.__class__.__module__, element.__class__.__name__,
+                   fingerprint(parameters), fingerprint(inputs)) + extra).encode())
+    return h.hexdigest()
+
+
+def _derive_fingerprints(value, fingerprint):
+    if isinstance(value, Data):
+        if value.type() == Data.SEQUENCE:
+            for i, d in enumerate(value.value):
+                _derive_fingerprints(d, fingerprint + ":" + str(i))
+        else:
+            _derive_fingerprints(_unread(value), fingerprint)
+    elif isinstance(value, np.ndarray):
+        _array_fingerprints.set(value, fingerprint, False)
+
+
+def derive_fingerprints(key, outputs):
+    """Assigns fingerprints to the output arrays of a calculation, so that their content is never hashed"""
+    for name, data in outputs.items():
+        _derive_fingerprints(data, key + ":" + str(name))
+
+
+def _size(value):
+    if isinstance(value, Data):
+        if value.type() == Data.SEQUENCE:
+            return sum(_size(d) for d in value.value)
+        return _size(_unread(value))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, TiledValue):
+        return _size(value._array)
+    return 64
+
+
+class ResultCache(LruCache):
+    """Results of processing units, limited by the total size of the stored arrays (LRU eviction)"""
+
+    def __init__(self, budget=DEFAULT_BUDGET):
+        super().__init__(budget)   # entries: key -> (outputs, size)
+
+    def enabled(self):
+        return self.budget > 0
+
+    def key(self, element, inputs, parameters):
+        return result_key(element, inputs, parameters)
+
+    def get(self, key):
+        """Returns the stored outputs (a dict of Data) or None"""
+        with self.lock:
+            outputs = self._lookup(key)
+            return dict(outputs) if outputs is not None else None
+
+    def put(self, key, outputs):
+        derive_fingerprints(key, outputs)
+        size = sum(_size(data) for data in outputs.values())
+        with self.lock:
+            self._store(key, dict(outputs), size)
+
+
+result_cache = ResultCache()
@@ -1,16 +1,48 @@
 import inspect
 import re
+from collections import defaultdict
 
 from .hooks import *
 from .exceptions import *
+from . import tracer
+from .cache import result_cache
+from .disk_cache import disk_cache
+from .parallel import process_in_parallel
+from .process_pool import get_process_pool
+from .tiling import tiling_applies, process_lazily
+from .proxy import proxy_inputs, mark_proxies
 
 
 TEST_QT = False
 
+# smaller images are not worth splitting their channels between threads
+PARALLEL_CHANNELS_MIN_SIZE = 1 << 16
+
 
 class CoreElement(Element):
     """Base class for all diagram elements"""
 
+    # processing units (e.g. sequence items) and channels are processed in parallel, by several threads at once -
+    # opt-in for elements whose process_inputs does not change the element (self) or any other shared state
+    parallel_units = False
+
+    # process_channels processes each channel of a multi-channel image independently, so it gets entire images
+    # instead of the channels split into separate arrays
+    vectorized_channels = False
+
+    # outputs depend only on inputs and parameters, so they may be taken from the result cache - opt-in for
+    # deterministic elements without state (not for random generators, accumulators, savers...)
+    cacheable = False
+
+    # results are expensive to compute and depend only on inputs, parameters and files, so they are stored on disk
+    disk_cacheable = False
+
+    # process_inputs does not depend on the state of the element in the GUI process, so it may run in a worker process
+    out_of_process_supported = False
+
+    # each output pixel depends only on the input pixels within tile_halo, so big images may be processed in tiles
+    tileable = False
+
     def __init__(self):
         super(CoreElement, self).__init__()
         for o in self.outputs.values():
@@ -40,7 +72,8 @@ class CoreElement(Element):
                 self.set_state(self.STATE_BUSY)
                 for unit in self.units:
                     unit.calculated = False
-                self.process()
+                with tracer.span("process", "element", self):
+                    self.process()
                 self.set_state(self.STATE_READY)
             except (InterruptException, ProcessingBreak):
                 pass
@@ -51,10 +84,42 @@ class CoreElement(Element):
                 break
         self.is_recalculating = False
 
+    def tile_halo(self, parameters):
+        """
+        Returns the radius of the neighborhood of input pixels, which an output pixel depends on
+        (None - the output depends on the whole image, e.g. with wrapped borders)
+        """
+        return 0
+
+    def scale_parameters(self, parameters, scale):
+        """
+        Returns the parameters for input images downscaled by 'scale' (proxy evaluation),
+        e.g. with kernel sizes in pixels scaled - see scale_pixel_parameters
+        """
+        return parameters
+
     def may_interrupt(self):
         """Informs the program that element may be interrupted here"""
         return self.delayed_recalculate
 
+    def invalidate(self):
+        """Called before the outputs are reset, when the element is about to be recalculated"""
+
+    def input_changed(self, unit, data):
+        """Called when input data of the processing unit change"""
+        self.recalculate(False, False, unit.is_being_processed())
+
+    def is_congested(self):
+        """Returns True if new input data would be dropped (here or further in the diagram), so live sources may skip them"""
+        return False
+
+    def outputs_congested(self):
+        """
+        Returns True if any element connected to the outputs is congested.
+        Live sources skip such frames, so that all branches of the diagram get the same frames.
+        """
+        return any(i.parent.is_congested() for o in self.outputs.values() for i in o.connected_to)
+
     def process_channels(self, inputs, outputs, parameters):
         """Does processing of input channels and returns the outputs"""
         print("process channels")
@@ -62,16 +127,31 @@ class CoreElement(Element):
     def process_inputs(self, inputs, outputs, parameters):
         """Does processing of inputs and returns the outputs"""
 
+        if self.vectorized_channels:
+            self.process_channels(inputs, outputs, parameters)
+            return
+
         ins = defaultdict(dict)  # [channel number][name] -> input channel image
         for iname, idata in inputs.items():
             for chnum, ich in enumerate(cv.split(idata.value)):
                 ins[chnum][iname] = Data(ich)
-        outs = defaultdict(dict)  # [output name][channel number] -> output channel image
-        for chnum, ich in ins.items():
+
+        def process_channel(ich):
             o = {}
             self.may_interrupt()
             self.process_channels(ich, o, parameters)
             self.may_interrupt()
+            return o
+
+        channel_inputs = list(ins.values())
+        if self.parallel_units and len(channel_inputs) > 1 and \
+                max(d.value.size for d in channel_inputs[0].values()) >= PARALLEL_CHANNELS_MIN_SIZE:
+            results = process_in_parallel(process_channel, channel_inputs)
+        else:
+            results = [process_channel(ich) for ich in channel_inputs]
+
+        outs = defaultdict(dict)  # [output name][channel number] -> output channel image
+        for chnum, o in enumerate(results):
             for outname, outch in o.items():
                 outs[outname][chnum] = outch
         for outname, channels in outs.items():
@@ -141,11 +221,17 @@ class CoreElement(Element):
 
     def prepare_data(self):
         if self.structure_changed:
-            self.prepare_structure()
+            with tracer.span("prepare_structure", "element", self):
+                self.prepare_structure()
         elif self.parameters_changed:
             self.prepare_parameters()
 
     def process_units(self):
+        if self.parallel_units:
+            units = [unit for unit in self.units if not unit.calculated and unit.ready_to_execute()]
+            if len(units) > 1:
+                process_in_parallel(self.process_unit, units)
+                return
         for unit in self.units:
             assert isinstance(unit, ProcessingUnit)
             if unit.calculated:
@@ -153,22 +239,77 @@ class CoreElement(Element):
             if not unit.ready_to_execute():
                 continue
             self.actual_processing_unit = unit
+            self.process_unit(unit)
+            self.actual_processing_unit = None
             self.may_interrupt()
-            inputs = {n: d.copy() for n, d in unit.inputs.items()}
+
+    def process_unit(self, unit):
+        unit.being_processed = True
+        try:
             self.may_interrupt()
-            outputs = {}
-            self.process_inputs(inputs, outputs, unit.parameters)
+            changes = unit.changes
+            inputs = unit.next_inputs()
+            if inputs is None:
+                # frames of a live stream on different inputs do not match yet
+                return
+            frame = unit.inputs_frame(inputs)
+            parameters = unit.parameters
+            scale = None
+            if self.diagram is not None and self.diagram.scheduler.proxy:
+                inputs, scale = proxy_inputs(inputs)
+                if scale is not None:
+                    parameters = self.scale_parameters(dict(parameters), scale)
             self.may_interrupt()
+            cache_key = None
+            outputs = None
+            if self.cacheable and result_cache.enabled() and scale is None:
+                cache_key = result_cache.key(self, inputs, parameters)
+                outputs = result_cache.get(cache_key)
+                if outputs is not None:
+                    cache_key = None
+            disk_key = None
+            if outputs is None and self.disk_cacheable and disk_cache.enabled() and scale is None:
+                disk_key = disk_cache.key(self, inputs, parameters)
+                outputs = disk_cache.get(disk_key)
+                if outputs is not None:
+                    disk_key = None
+            if outputs is None:
+                outputs = {}
+                if self.out_of_process:
+                    get_process_pool().process_inputs(self, inputs, outputs, parameters)
+                elif self.tileable and tiling_applies(self, inputs, parameters):
+                    process_lazily(self, inputs, outputs, parameters)
+                else:
+                    self.process_inputs(inputs, outputs, parameters)
+                self.may_interrupt()
+                if disk_key is not None:
+                    disk_cache.put(disk_key, outputs)
+            if cache_key is not None:
+                result_cache.put(cache_key, outputs)
+            if scale is not None:
+                mark_proxies(outputs, scale)
+                self.diagram.scheduler.proxy_calculated(self)
 
             # TODO: This is a workaround. Elements should never remove objects from 'outputs'
             # We should really modify Elements to no stop doing that
             # Also, this is probably wrong if there is more than one ProcessingUnit!
             for output_name in outputs:
-                unit.outputs[output_name].assign(outputs[output_name])
+                unit.outputs[output_name].assign(outputs[output_name], frame)
+            unit.frame = frame
 
-            unit.calculated = True
-            self.actual_processing_unit = None
-            self.may_interrupt()
+            # inputs changed during the calculation (and it was not interrupted) - the unit must be calculated again
+            unit.calculated = unit.changes == changes and not unit.queued_inputs
+        finally:
+            unit.being_processed = False
+
+    def set_out_of_process(self, value):
+        """Switches processing of the element to a worker process (see process_pool)"""
+        if not self.out_of_process_supported:
+            value = False
+        if self.out_of_process and not value:
+            get_process_pool().release(self)
+        self.out_of_process = value
+        self.recalculate(True, False, True)
 
     def process(self):
         self.prepare_data()
@@ -176,6 +317,8 @@ class CoreElement(Element):
         self.may_interrupt()
 
     def delete(self):
+        if self.out_of_process:
+            get_process_pool().release(self)
         self.prepare_empty_data()  # disconnects data connections
         for o in self.outputs.values():
             o.disconnect_all()
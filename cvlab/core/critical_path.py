@@ -0,0 +1,106 @@
+"""
+Critical path analysis of a diagram.
+
+An element starts when all its inputs are ready, so the latency of a result at a sink (an element without
+successors) is the longest sum of processing times of the elements on a path from a source to the sink.
+The critical path is the longest of these paths - making any other element faster does not make the diagram
+faster. Slack of an element is how much its processing time may grow before the critical path gets longer.
+
+Processing times are measured (see profiler.py) - the median of recent runs of each element.
+"""
+
+
+def element_time(element):
+    """Returns the measured processing time of the element in milliseconds (0 if it was not calculated)"""
+    profile = getattr(element, "profile", None)
+    if profile is not None:
+        time = profile.statistics()["wall_p50_ms"]
+        if time is not None:
+            return time
+    info = getattr(element, "processing_time_info", None)
+    return float(info.work_time) if info is not None else 0.0
+
+
+class CriticalPath:
+    """Longest latency paths of the diagram, computed for given or measured processing times"""
+
+    def __init__(self, diagram, times=None):
+        self.order = diagram.topological_order()
+        self.times = times if times is not None else {e: element_time(e) for e in self.order}
+        self.predecessors = {e: [] for e in self.order}
+        self.successors = {e: [] for e in self.order}
+        for output, input_ in diagram.connections:
+            source, target = output.parent, input_.parent
+            if source in self.successors and target in self.predecessors and target not in self.successors[source]:
+                self.successors[source].append(target)
+                self.predecessors[target].append(source)
+        self.sources = [e for e in self.order if not self.predecessors[e]]
+        self.sinks = [e for e in self.order if not self.successors[e]]
+
+        # the longest path ending at each element
+        self.finish, self.previous = self._longest_paths(self.order)
+        self.length = max((self.finish[e] for e in self.sinks), default=0.0)
+        last = max(self.sinks, key=self.finish.get, default=None)
+        self.elements = self._backtrack(last, self.previous)
+
+        # the latest finish, which does not make the critical path longer
+        latest = {}
+        for e in reversed(self.order):
+            latest[e] = min((latest[s] - self.times[s] for s in self.successors[e]), default=self.length)
+        self.slack = {e: latest[e] - self.finish[e] for e in self.order}
+
+    def _longest_paths(self, elements):
+        finish = {}
+        previous = {}
+        for e in elements:
+            before = [p for p in self.predecessors[e] if p in finish]
+            previous[e] = max(before, key=finish.get, default=None)
+            finish[e] = self.times[e] + (finish[previous[e]] if previous[e] is not None else 0.0)
+        return finish, previous
+
+    @staticmethod
+    def _backtrack(element, previous):
+        path = []
+        while element is not None:
+            path.append(element)
+            element = previous[element]
+        return path[::-1]
+
+    def is_critical(self, element):
+        return element in self.elements
+
+    def critical_connections(self):
+        """Returns the connections (output, input) between consecutive elements of the critical path"""
+        connections = []
+        for source, target in zip(self.elements, self.elements[1:]):
+            for output in source.outputs.values():
+                connections += [(output, i) for i in output.connected_to if i.parent is target]
+        return connections
+
+    def paths(self):
+        """Returns the longest path from each source to each sink reachable from it"""
+        paths = []
+        for source in self.sources:
+            reachable = {source}
+            for e in self.order:
+                if e in reachable:
+                    reachable.update(self.successors[e])
+            finish, previous = self._longest_paths([e for e in self.order if e in reachable])
+            for sink in self.sinks:
+                if sink in finish:
+                    paths.append({"source": source, "sink": sink, "length": finish[sink],
+                                  "elements": self._backtrack(sink, previous)})
+        return sorted(paths, key=lambda p: -p["length"])
+
+    def report(self):
+        """Returns a json-able description of the critical path, the paths and the slack of the elements"""
+        def describe(element):
+            return {"id": element.unique_id, "name": element.name, "time_ms": self.times[element]}
+
+        return {
+            "length_ms": self.length,
+            "critical_path": [describe(e) for e in self.elements],
+            "paths": [{"source": p["source"].unique_id, "sink": p["sink"].unique_id, "length_ms": p["length"],
+                       "elements": [e.unique_id for e in p["elements"]]} for p in self.paths()],
+            "slack_ms": {e.unique_id: self.slack[e] for e in self.order},
+        }
@@ -0,0 +1,228 @@
+"""
+Persistent cache of results of expensive elements (e.g. loading of big 3D images or segmentation).
+
+Results of elements with 'disk_cacheable' set are saved in .npz files in the cache directory, under the same
+key as in the result cache (see cache.py), extended with the modification times and sizes of the files
+given in parameters - so e.g. a loader is recalculated when its files change. When a diagram is opened again,
+the results are loaded from the files instead of being recalculated.
+
+Only arrays and picklable objects can be stored. The total size of the files is limited, the least recently
+used files are removed first.
+"""
+
+import json
+import os
+import threading
+import uuid
+
+import numpy as np
+
+from .cache import result_key, derive_fingerprints
+from ..diagram.data import Data, Sequence, EmptyData
+
+
+# the cache is disabled, until a budget is set (e.g. in the GUI settings)
+DEFAULT_BUDGET = 0
+
+CACHE_EXTENSION = ".npz"
+STRUCTURE_ENTRY = "__structure__"
+
+
+def default_directory():
+    # For Windows
+    if os.name == 'nt':
+        return os.path.join(os.environ['appdata'], 'CVLab', 'cache')
+    # For Unix
+    else:
+        return os.path.expanduser(os.path.join('~', '.cvlab', 'cache'))
+
+
+def _file_stats(value):
+    """Returns (path, modification time, size) of all existing files given in a parameter value"""
+    if isinstance(value, str):
+        if len(value) < 4096 and os.path.isfile(value):
+            stat = os.stat(value)
+            return [(os.path.abspath(value), stat.st_mtime_ns, stat.st_size)]
+        return []
+    if isinstance(value, (list, tuple)):
+        return [s for v in value for s in _file_stats(v)]
+    if isinstance(value, dict):
+        return [s for v in value.values() for s in _file_stats(v)]
+    return []
+
+
+class _NotCacheable(Exception):
+    pass
+
+
+def _encode(data, arrays):
+    """Converts Data to a json-able description, the values are put into 'arrays'"""
+    if data is None or data.type() == Data.NONE:
+        return "none",
+    if data.type() == Data.SEQUENCE:
+        return "sequence", [_encode(d, arrays) for d in data.value]
+    name = "v" + str(len(arrays))
+    value = data.value
+    if not getattr(value, "disk_cacheable", True):
+        # e.g. arrays in temporary files
+        raise _NotCacheable()
+    if isinstance(value, np.ndarray) and value.dtype != object:
+        arrays[name] = value
+        return "array", name
+    stored = np.empty((), object)
+    stored[()] = value
+    arrays[name] = stored
+    return "object", name
+
+
+def _decode(description, arrays):
+    kind = description[0]
+    if kind == "none":
+        return EmptyData()
+    if kind == "sequence":
+        return Sequence([_decode(d, arrays) for d in description[1]])
+    if kind == "object":
+        return Data(arrays[description[1]][()])
+    return Data(arrays[description[1]])
+
+
+class DiskCache:
+    """Results of processing units stored in files, limited by the total size of the files (LRU eviction)"""
+
+    def __init__(self, directory=None, budget=DEFAULT_BUDGET):
+        self.directory = directory or default_directory()
+        self.budget = budget
+        self.size = None    # total size of the files, computed when needed
+        self.lock = threading.Lock()
+        self.reset_statistics()
+
+    def enabled(self):
+        return self.budget > 0
+
+    def set_budget(self, budget):
+        """Sets the maximal size of the cache files in bytes (0 disables the cache, but keeps the files)"""
+        with self.lock:
+            self.budget = budget
+            if self.enabled():
+                self._evict()
+
+    def set_directory(self, directory):
+        with self.lock:
+            self.directory = directory
+            self.size = None
+
+    def key(self, element, inputs, parameters):
+        return result_key(element, inputs, parameters, "disk", tuple(_file_stats(parameters)))
+
+    def path(self, key):
+        return os.path.join(self.directory, key + CACHE_EXTENSION)
+
+    def get(self, key):
+        """Returns the stored outputs (a dict of Data) or None"""
+        path = self.path(key)
+        try:
+            with np.load(path, allow_pickle=True) as stored:
+                arrays = {name: stored[name] for name in stored.files}
+            structure = json.loads(str(arrays.pop(STRUCTURE_ENTRY)))
+            outputs = {name: _decode(description, arrays) for name, description in structure.items()}
+        except FileNotFoundError:
+            with self.lock:
+                self.misses += 1
+            return None
+        except Exception as e:
+            print("WARNING: Cannot read cached results from '{}': {}".format(path, e))
+            self.remove(key)
+            with self.lock:
+                self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        derive_fingerprints(key, outputs)
+        with self.lock:
+            self.hits += 1
+        return outputs
+
+    def put(self, key, outputs):
+        arrays = {}
+        try:
+            structure = {name: _encode(data, arrays) for name, data in outputs.items()}
+        except _NotCacheable:
+            return
+        arrays[STRUCTURE_ENTRY] = np.array(json.dumps(structure))
+        path = self.path(key)
+        temporary = "{}.{}.tmp".format(path, uuid.uuid4().hex)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temporary, "wb") as f:
+                np.savez(f, **arrays)
+            size = os.path.getsize(temporary)
+            if size > self.budget:
+                os.remove(temporary)
+                return
+            os.replace(temporary, path)
+        except Exception as e:
+            # e.g. objects, which cannot be pickled, or a full disk
+            print("WARNING: Cannot store results in the disk cache: {}".format(e))
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            return
+        with self.lock:
+            if self.size is not None:
+                self.size += size
+            self._evict()
+
+    def remove(self, key):
+        try:
+            os.remove(self.path(key))
+        except OSError:
+            pass
+        with self.lock:
+            self.size = None
+
+    def clear(self):
+        """Removes all cache files"""
+        with self.lock:
+            for entry in self._entries():
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+            self.size = 0
+
+    def _entries(self):
+        try:
+            return [e for e in os.scandir(self.directory) if e.name.endswith(CACHE_EXTENSION) and e.is_file()]
+        except OSError:
+            return []
+
+    def _evict(self):
+        if self.size is not None and self.size <= self.budget:
+            return
+        entries = sorted(self._entries(), key=lambda e: e.stat().st_mtime)
+        self.size = sum(e.stat().st_size for e in entries)
+        for entry in entries:
+            if self.size <= self.budget:
+                break
+            try:
+                os.remove(entry.path)
+            except OSError:
+                continue
+            self.size -= entry.stat().st_size
+            self.evictions += 1
+
+    def reset_statistics(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def statistics(self):
+        with self.lock:
+            entries = self._entries()
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "entries": len(entries), "bytes": sum(e.stat().st_size for e in entries),
+                    "budget": self.budget, "directory": self.directory}
+
+
+disk_cache = DiskCache()
@@ -0,0 +1,44 @@
+"""
+Recently read values of files of lazy sequences (see FileValue in diagram/data.py).
+
+Items of long sequences (e.g. a directory with thousands of images) keep only paths of their files.
+The files are read when the values are accessed, the values are kept here - limited by their total size,
+so elements can go through sequences much bigger than the memory.
+"""
+
+import numpy as np
+
+from .lru import LruCache, MEGABYTE
+
+
+DEFAULT_BUDGET = 256 * MEGABYTE
+
+
+def _size(value):
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    return 64
+
+
+class FileCache(LruCache):
+    """Values read from files, limited by their total size (LRU eviction)"""
+
+    def __init__(self, budget=DEFAULT_BUDGET):
+        super().__init__(budget)
+
+    def get(self, file_value):
+        """Returns the value of the file, read by its reader if it is not cached"""
+        key = file_value.key()
+        with self.lock:
+            value = self._lookup(key)
+        if value is not None:
+            return value
+        value = file_value.reader(file_value.path)
+        if value is None:
+            return None
+        with self.lock:
+            self._store(key, value, _size(value))
+        return value
+
+
+file_cache = FileCache()
@@ -1,27 +1,7 @@
-from ..diagram.diagram import Diagram
+from . import tracer
 from ..diagram.interface import *
 
 
-class Notifier:
-    def __init__(self):
-        self._lock = threading.Condition()
-        self._do_notify = False
-
-    def notify(self):
-        with self._lock:
-            self._do_notify = True
-            self._lock.notifyAll()
-
-    def wait(self):
-        with self._lock:
-            while not self._do_notify:
-                self._lock.wait()
-            self._do_notify = False
-
-    def is_set(self):
-        return self._do_notify
-
-
 class Hook(QObject, object):
     """Hook for joining diagram elements together"""
 
@@ -50,9 +30,11 @@ class InputHook(Hook):
     def set_data(self, data, from_hook):
         assert data is not None
         assert from_hook is not None
+        # the data may come from an output which has just been disconnected (its propagation does not lock the diagram)
         if self.connector.multiple:
             with self.lock:
-                assert from_hook in self.sequence_indices
+                if from_hook not in self.sequence_indices:
+                    return
                 index = self.sequence_indices[from_hook]
                 if data is self.data.value[index]:
                     return
@@ -60,6 +42,7 @@ class InputHook(Hook):
         else:
             with self.lock:
                 if self.data is data: return
+                if from_hook.connector not in self.connector.connected_from: return
                 self.data = data
         self.connector.parent.recalculate(False, True, True)
 
@@ -84,7 +67,8 @@ class InputHook(Hook):
                 for i, hook in enumerate(self.sequence_indices.keys()):
                     self.sequence_indices[hook] = i
         else:
-            self.data = self.empty_data
+            with self.lock:
+                self.data = self.empty_data
         self.connector.parent.recalculate(False, True, True)
 
 
@@ -117,13 +101,13 @@ class OutputHook(Hook):
     # gui thread or element thread
     # @pyqtSlot()
     def actualize_outputs(self):
-        with Diagram.diagram_lock.reader, self.lock:
-            if self.connector.desequencing and self.data and self.data.type() == Data.SEQUENCE and len(
-                    self.connector.connected_to) > 1:
-                for input, data in zip(self.connector.connected_to, self.data.value):
+        with tracer.span("actualize_outputs", "hook", self.connector.parent, output=self.connector.id), self.lock:
+            inputs = self.connector.connected_to   # snapshot - changes of the connections replace the tuple
+            if self.connector.desequencing and self.data and self.data.type() == Data.SEQUENCE and len(inputs) > 1:
+                for input, data in zip(inputs, self.data.value):
                     input.hook.set_data(data, self)
             else:
-                for i in self.connector.connected_to:
+                for i in inputs:
                     i.hook.set_data(self.data, self)
 
     # gui thread or other element thread
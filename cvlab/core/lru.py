@@ -0,0 +1,78 @@
+"""
+Base of the caches of values limited by their total size, evicting the least recently used entries.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+MEGABYTE = 1 << 20
+
+
+class LruCache:
+    """Entries (value, size) limited by their total size in bytes (LRU eviction)"""
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.entries = OrderedDict()   # key -> (value, size)
+        self.size = 0
+        self.lock = threading.Lock()
+        self.reset_statistics()
+
+    def set_budget(self, budget):
+        """Sets the maximal size of the stored values in bytes (0 disables the cache)"""
+        with self.lock:
+            self.budget = budget
+            self._evict()
+
+    def _lookup(self, key):
+        """Returns the value or None, counting hits and misses - called with the lock held"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def _store(self, key, value, size):
+        """Stores the value unless it is bigger than the budget - called with the lock held"""
+        if size > self.budget:
+            return
+        if key in self.entries:
+            self.size -= self.entries.pop(key)[1]
+        self.entries[key] = value, size
+        self.size += size
+        self._evict()
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+    def trim(self, size):
+        """Evicts the least recently used entries to free at least 'size' bytes. Returns the freed bytes."""
+        with self.lock:
+            before = self.size
+            while self.entries and before - self.size < size:
+                self._pop()
+            return before - self.size
+
+    def _evict(self):
+        while self.entries and self.size > self.budget:
+            self._pop()
+
+    def _pop(self):
+        _, (_, size) = self.entries.popitem(last=False)
+        self.size -= size
+        self.evictions += 1
+
+    def reset_statistics(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def statistics(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "entries": len(self.entries), "bytes": self.size, "budget": self.budget}
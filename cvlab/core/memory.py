@@ -0,0 +1,193 @@
+"""
+Memory retained by the elements and wires of diagrams.
+
+Arrays are shared - the same image is the output of one element and the input of all connected elements,
+outputs of cacheable elements are kept by the result cache, and views (e.g. channels or slices) share
+the buffer of their base array. So each buffer is counted once, for the first owner:
+outputs of the elements, then their internal state (e.g. memory of Accumulator, DelayLine and code elements),
+queued inputs and frame history of their processing units, then their inputs (e.g. copies) and the caches.
+Memory-mapped files and files of lazy sequences are not counted - they are not kept in the memory.
+
+The optional memory budget is checked after calculations - when it is exceeded, the caches are trimmed
+and a warning is printed, if it is still exceeded.
+"""
+
+import mmap
+import threading
+import time
+import weakref
+from collections import deque
+
+import numpy as np
+
+from ..diagram.data import Data, DataList
+from .cache import result_cache, MEGABYTE
+from .file_cache import file_cache
+from .tiling import TiledValue
+
+
+def _collect(value, buffers):
+    """Adds the buffers of the arrays held by the value (id of the buffer -> array owning it)"""
+    if isinstance(value, Data):
+        _collect(value._value, buffers)
+    elif isinstance(value, DataList):
+        for item in value._raw_values():
+            _collect(item, buffers)
+    elif isinstance(value, np.ndarray):
+        root = value
+        while isinstance(root.base, np.ndarray):
+            root = root.base
+        if isinstance(root.base, mmap.mmap):
+            return
+        buffers.setdefault(id(root), root)
+        if root.dtype == object:
+            for item in root.flat:
+                _collect(item, buffers)
+    elif isinstance(value, TiledValue):
+        _collect(value.source, buffers)
+        _collect(value._array, buffers)
+    elif isinstance(value, (list, tuple, deque, set, frozenset)):
+        for item in list(value):
+            _collect(item, buffers)
+    elif isinstance(value, dict):
+        for item in list(value.values()):
+            _collect(item, buffers)
+
+
+def buffers_of(*values):
+    buffers = {}
+    for value in values:
+        _collect(value, buffers)
+    return buffers
+
+
+def nbytes(buffers):
+    return sum(array.nbytes for array in buffers.values())
+
+
+def _outputs(element):
+    data = getattr(element, "data", None)
+    return list(data.outputs.values()) if data is not None else []
+
+
+def _state(element):
+    return [getattr(element, "memory", None)]
+
+
+def _units(element):
+    values = []
+    for unit in list(getattr(element, "units", ())):
+        values += [unit.outputs, list(unit.queued_inputs), unit.frame_history]
+    return values
+
+
+def _inputs(element):
+    data = getattr(element, "data", None)
+    return list(data.inputs.values()) if data is not None else []
+
+
+# parts of the elements, in the order of ownership of shared buffers
+PARTS = (("outputs", _outputs), ("state", _state), ("units", _units), ("inputs", _inputs))
+
+
+def _cached_outputs():
+    with result_cache.lock:
+        return [outputs for outputs, size in result_cache.entries.values()]
+
+
+class MemoryUsage:
+    """Bytes retained by the elements and wires of a diagram (and the caches), each buffer counted once"""
+
+    def __init__(self, diagram):
+        self.elements = {}      # element -> {part: bytes, "total": bytes}
+        self.wires = {}         # (output, input) -> bytes of the data passed by the wire
+        owned = {}
+        elements = list(diagram.elements)
+        for element in elements:
+            self.elements[element] = {"total": 0}
+        for part, values in PARTS:
+            for element in elements:
+                new = {key: array for key, array in buffers_of(*values(element)).items() if key not in owned}
+                owned.update(new)
+                self.elements[element][part] = nbytes(new)
+                self.elements[element]["total"] += nbytes(new)
+        self.elements_total = nbytes(owned)
+
+        for output, input_ in list(diagram.connections):
+            self.wires[(output, input_)] = nbytes(buffers_of(output.get()))
+
+        cached = {key: array for key, array in buffers_of(_cached_outputs()).items() if key not in owned}
+        self.caches = {"result_cache": nbytes(cached), "file_cache": file_cache.statistics()["bytes"]}
+        self.total = self.elements_total + sum(self.caches.values())
+
+    def report(self):
+        """Returns a json-able description of the memory usage"""
+        return {
+            "total_bytes": self.total,
+            "elements_bytes": self.elements_total,
+            "caches_bytes": self.caches,
+            "elements": [dict(id=e.unique_id, name=e.name, **usage)
+                         for e, usage in sorted(self.elements.items(), key=lambda item: -item[1]["total"])],
+            "wires": [{"from": "{}.{}".format(o.parent.unique_id, o.id), "to": "{}.{}".format(i.parent.unique_id, i.id),
+                       "bytes": size} for (o, i), size in self.wires.items()],
+        }
+
+
+def format_bytes(size):
+    if size < 1 << 10:
+        return "{} B".format(size)
+    if size < MEGABYTE:
+        return "{:.1f} kB".format(size / (1 << 10))
+    if size < 1 << 30:
+        return "{:.1f} MB".format(size / MEGABYTE)
+    return "{:.2f} GB".format(size / (1 << 30))
+
+
+class MemoryBudget:
+    """Limit of the memory retained by all diagrams and the caches (0 - no limit)"""
+
+    # the memory is accounted at most once per interval (in seconds), accounting walks all the data
+    CHECK_INTERVAL = 1.0
+
+    def __init__(self, budget=0):
+        self.budget = budget
+        self.diagrams = weakref.WeakSet()
+        self.last_check = 0
+        self.exceeded = False
+        self.lock = threading.Lock()
+
+    def set_budget(self, budget):
+        self.budget = budget
+        self.exceeded = False
+
+    def maybe_check(self, diagram):
+        """Checks the budget after a calculation in the diagram, unless it was checked recently"""
+        if not self.budget or diagram is None:
+            return
+        now = time.monotonic()
+        with self.lock:
+            self.diagrams.add(diagram)
+            if now - self.last_check < self.CHECK_INTERVAL:
+                return
+            self.last_check = now
+        self.check()
+
+    def check(self, diagram=None):
+        """Trims the caches if the budget is exceeded. Returns the retained bytes."""
+        if diagram is not None:
+            self.diagrams.add(diagram)
+        diagrams = list(self.diagrams)
+        usages = [MemoryUsage(diagram) for diagram in diagrams]
+        total = sum(usage.elements_total for usage in usages) + max((sum(u.caches.values()) for u in usages), default=0)
+        if total > self.budget:
+            total -= result_cache.trim(total - self.budget)
+        if total > self.budget:
+            total -= file_cache.trim(total - self.budget)
+        if total > self.budget and not self.exceeded:
+            print("WARNING: Memory budget of {} is exceeded, diagrams retain {}".format(
+                format_bytes(self.budget), format_bytes(total)))
+        self.exceeded = total > self.budget
+        return total
+
+
+memory_budget = MemoryBudget()
@@ -0,0 +1,59 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from .profiler import current_timer, set_current_timer
+from .scheduler import default_workers
+
+
+# processing units are executed on a separate pool - the scheduler's workers wait here for their units
+_executor = None
+_executor_lock = threading.Lock()
+_local = threading.local()
+
+
+def _mark_pool_thread():
+    _local.in_pool = True
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(default_workers(), "CV Lab unit worker", _mark_pool_thread)
+        return _executor
+
+
+def _timed(function, timer):
+    """Adds CPU time of the call to the timer of the run, which requested it"""
+    def timed(item):
+        start = time.thread_time_ns()
+        set_current_timer(timer)
+        try:
+            return function(item)
+        finally:
+            set_current_timer(None)
+            timer.add_cpu(time.thread_time_ns() - start)
+    return timed
+
+
+def process_in_parallel(function, items):
+    """
+    Calls the function for all items in parallel, waits for all of them and returns the results.
+    The first exception (in order of items, e.g. an interrupt) cancels the calls which have not started yet
+    and is raised when the running ones end.
+    Nested calls (e.g. channels of a unit, which is already processed in parallel) are executed serially,
+    so that the pool threads never wait for each other.
+    """
+    if getattr(_local, "in_pool", False):
+        return [function(item) for item in items]
+    timer = current_timer()
+    if timer is not None:
+        function = _timed(function, timer)
+    futures = [get_executor().submit(function, item) for item in items]
+    try:
+        return [future.result() for future in futures]
+    finally:
+        for future in futures:
+            future.cancel()
+        wait(futures)
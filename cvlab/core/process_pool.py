@@ -0,0 +1,248 @@
+"""
+Execution of elements in separate processes.
+
+Pure-python code (e.g. in code elements) holds the GIL and slows down all other elements.
+Elements with 'out_of_process' set are processed by a pool of persistent worker processes instead.
+Each element is assigned to one worker, which keeps an instance of the element between calculations
+(so e.g. the memory of code elements is preserved).
+
+Arrays are passed through shared memory, only their descriptions are sent through the pipes.
+"""
+
+import builtins
+import importlib
+import multiprocessing
+import os
+import threading
+import time
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from .exceptions import InterruptException
+from .scheduler import default_workers
+from ..diagram.errors import ProcessingError
+
+
+# how long a worker may ignore the interrupt request, before it is restarted
+INTERRUPT_TIMEOUT = 2.0
+
+# how often the state of the element and the worker is checked while waiting for the results
+POLL_INTERVAL = 0.02
+
+
+def _share_array(array, shared_blocks):
+    shm = SharedMemory(create=True, size=max(array.nbytes, 1))
+    shared = np.ndarray(array.shape, array.dtype, buffer=shm.buf)
+    shared[...] = array
+    del shared
+    shared_blocks.append(shm)
+    return "array", shm.name, array.shape, array.dtype.str
+
+
+def _encode(data, shared_blocks):
+    """Converts Data to a picklable description, arrays are copied to new shared memory blocks"""
+    from ..diagram.data import Data
+    if data is None or data.type() == Data.NONE:
+        return "none",
+    if data.type() == Data.SEQUENCE:
+        return "sequence", [_encode(d, shared_blocks) for d in data.value]
+    value = data.value
+    if isinstance(value, np.ndarray) and value.dtype != object:
+        return _share_array(value, shared_blocks)
+    return "object", value
+
+
+def _decode(description, shared_blocks, copy):
+    """Converts the description back to Data. Arrays are copied only if 'copy' is set."""
+    from ..diagram.data import Data, Sequence, EmptyData
+    kind = description[0]
+    if kind == "none":
+        return EmptyData()
+    if kind == "sequence":
+        return Sequence([_decode(d, shared_blocks, copy) for d in description[1]])
+    if kind == "object":
+        return Data(description[1])
+    name, shape, dtype = description[1:]
+    shm = SharedMemory(name)
+    shared_blocks.append(shm)
+    array = np.ndarray(shape, np.dtype(dtype), buffer=shm.buf)
+    return Data(array.copy() if copy else array)
+
+
+def _close(shared_blocks, unlink=False, retained=None):
+    for shm in shared_blocks:
+        try:
+            shm.close()
+        except BufferError:
+            # arrays are still used (e.g. kept in the memory of the element) - try again later
+            if retained is not None:
+                retained.append(shm)
+            continue
+        if unlink:
+            shm.unlink()
+
+
+def _worker_main(connection, interrupt_flag):
+    os.environ["CVLAB_HEADLESS"] = "1"
+
+    def may_interrupt():
+        if interrupt_flag.value:
+            raise InterruptException()
+
+    elements = {}
+    retained = []
+    while True:
+        message = connection.recv()
+        if message[0] == "release":
+            elements.pop(message[1], None)
+            continue
+        _, key, module, class_name, inputs, parameters = message
+        input_blocks = []
+        output_blocks = []
+        reply = None
+        try:
+            element = elements.get(key)
+            if element is None or element.__class__.__name__ != class_name:
+                element = getattr(importlib.import_module(module), class_name)()
+                element.may_interrupt = may_interrupt
+                elements[key] = element
+            inputs = {name: _decode(d, input_blocks, False) for name, d in inputs.items()}
+            outputs = {}
+            element.process_inputs(inputs, outputs, parameters)
+            may_interrupt()
+            reply = ("ok", {name: _encode(d, output_blocks) for name, d in outputs.items()})
+            connection.send(reply)
+        except InterruptException:
+            connection.send(("interrupted",))
+        except Exception as e:
+            connection.send(("error", e.__class__.__name__, [str(arg) for arg in e.args]))
+        inputs = outputs = None
+        # the parent removes the blocks with outputs, unless they were not sent
+        _close(output_blocks, unlink=reply is None)
+        blocks, retained = retained + input_blocks, []
+        _close(blocks, retained=retained)
+
+
+def _remote_exception(class_name, args):
+    """Recreates the exception raised in the worker (built-in exceptions keep their class)"""
+    exception_class = getattr(builtins, class_name, None)
+    if isinstance(exception_class, type) and issubclass(exception_class, Exception):
+        return exception_class(*args)
+    return ProcessingError(class_name + ": " + ", ".join(args))
+
+
+class ProcessWorker:
+    def __init__(self, context):
+        self.context = context
+        self.lock = threading.Lock()
+        self.elements = set()
+        self.start()
+
+    def start(self):
+        self.connection, child_connection = self.context.Pipe()
+        self.interrupt_flag = self.context.Value("b", 0, lock=False)
+        self.process = self.context.Process(target=_worker_main, args=(child_connection, self.interrupt_flag),
+                                            name="CV Lab process worker", daemon=True)
+        self.process.start()
+        child_connection.close()
+
+    def restart(self):
+        self.process.terminate()
+        self.process.join()
+        self.connection.close()
+        self.start()
+
+    def process_inputs(self, element, inputs, parameters):
+        shared_blocks = []
+        try:
+            message = ("process", id(element), element.__class__.__module__, element.__class__.__name__,
+                       {name: _encode(d, shared_blocks) for name, d in inputs.items()}, parameters)
+            with self.lock:
+                self.interrupt_flag.value = 0
+                self.connection.send(message)
+                reply = self.wait_for_reply(element)
+        finally:
+            _close(shared_blocks, unlink=True)
+
+        if reply[0] == "interrupted":
+            raise InterruptException()
+        if reply[0] == "error":
+            raise _remote_exception(reply[1], reply[2])
+        output_blocks = []
+        try:
+            return {name: _decode(d, output_blocks, True) for name, d in reply[1].items()}
+        finally:
+            _close(output_blocks, unlink=True)
+
+    def wait_for_reply(self, element):
+        interrupted_at = None
+        while not self.connection.poll(POLL_INTERVAL):
+            if not self.process.is_alive():
+                exitcode = self.process.exitcode
+                self.restart()
+                raise ProcessingError("Worker process has terminated unexpectedly (exit code {})".format(exitcode))
+            if interrupted_at is None:
+                try:
+                    element.may_interrupt()
+                except InterruptException:
+                    self.interrupt_flag.value = 1
+                    interrupted_at = time.perf_counter()
+            elif time.perf_counter() - interrupted_at > INTERRUPT_TIMEOUT:
+                # the code does not call intpoint() - the only way to stop it is to kill the worker
+                self.restart()
+                raise InterruptException()
+        return self.connection.recv()
+
+    def release(self, element):
+        with self.lock:
+            self.elements.discard(element)
+            if self.process.is_alive():
+                self.connection.send(("release", id(element)))
+
+
+class ProcessPool:
+    """Pool of persistent worker processes, each element is always processed by the same worker"""
+
+    def __init__(self, workers=None):
+        self.workers = workers or default_workers()
+        self.context = multiprocessing.get_context("spawn")
+        self.pool = []
+        self.assigned = {}
+        self.lock = threading.Lock()
+
+    def get_worker(self, element):
+        with self.lock:
+            worker = self.assigned.get(element)
+            if worker is None:
+                if len(self.pool) < self.workers:
+                    worker = ProcessWorker(self.context)
+                    self.pool.append(worker)
+                else:
+                    worker = min(self.pool, key=lambda w: len(w.elements))
+                worker.elements.add(element)
+                self.assigned[element] = worker
+            return worker
+
+    def process_inputs(self, element, inputs, outputs, parameters):
+        """Does the same as element.process_inputs, but in the worker process of the element"""
+        outputs.update(self.get_worker(element).process_inputs(element, inputs, parameters))
+
+    def release(self, element):
+        """Removes the instance of the element from its worker"""
+        with self.lock:
+            worker = self.assigned.pop(element, None)
+        if worker is not None:
+            worker.release(element)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPool()
+        return _pool
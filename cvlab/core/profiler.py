@@ -0,0 +1,144 @@
+"""
+Profiling of calculations of elements.
+
+Each run of an element (ThreadedElement.work) is measured with high-resolution timers: wall time and CPU time.
+CPU time includes the time of the unit pool threads working for the element (see parallel.py), but not
+of worker processes (out of process elements). Percentiles are computed over a window of recent runs.
+Interrupted runs are only counted - their times are not representative.
+"""
+
+import csv
+import json
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+
+# number of recent runs used to compute the percentiles
+WINDOW = 512
+
+PERCENTILES = (50, 95, 99)
+
+RUN_DONE = "done"
+RUN_INTERRUPTED = "interrupted"
+RUN_ERROR = "error"
+
+_local = threading.local()
+
+
+class RunTimer:
+    """Measures one run of an element, started in the current thread"""
+
+    def __init__(self):
+        self.wall_start = time.perf_counter_ns()
+        self.cpu_start = time.thread_time_ns()
+        self.pool_cpu = 0
+        self.lock = threading.Lock()
+
+    def add_cpu(self, nanoseconds):
+        """Adds CPU time of another thread working for the run"""
+        with self.lock:
+            self.pool_cpu += nanoseconds
+
+    def stop(self):
+        """Returns (wall time, CPU time) of the run in nanoseconds"""
+        wall = time.perf_counter_ns() - self.wall_start
+        cpu = time.thread_time_ns() - self.cpu_start
+        with self.lock:
+            return wall, cpu + self.pool_cpu
+
+
+def current_timer():
+    """Returns the timer of the run executed by the current thread (or None)"""
+    return getattr(_local, "timer", None)
+
+
+def set_current_timer(timer):
+    _local.timer = timer
+
+
+class ElementProfile:
+    """Statistics of runs of an element"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.runs = 0
+            self.interrupted = 0
+            self.errors = 0
+            self.total_wall = 0     # times in nanoseconds
+            self.total_cpu = 0
+            self.last_wall = None
+            self.last_cpu = None
+            self.wall_times = deque(maxlen=WINDOW)
+            self.cpu_times = deque(maxlen=WINDOW)
+
+    def record(self, wall, cpu, outcome=RUN_DONE):
+        with self.lock:
+            self.runs += 1
+            if outcome == RUN_INTERRUPTED:
+                self.interrupted += 1
+                return
+            if outcome == RUN_ERROR:
+                self.errors += 1
+            self.total_wall += wall
+            self.total_cpu += cpu
+            self.last_wall = wall
+            self.last_cpu = cpu
+            self.wall_times.append(wall)
+            self.cpu_times.append(cpu)
+
+    def statistics(self):
+        """Returns the statistics with times in milliseconds"""
+        with self.lock:
+            completed = self.runs - self.interrupted
+            stats = {"runs": self.runs, "interrupted": self.interrupted, "errors": self.errors}
+            for name, last, total, times in (("wall", self.last_wall, self.total_wall, self.wall_times),
+                                             ("cpu", self.last_cpu, self.total_cpu, self.cpu_times)):
+                stats[name + "_last_ms"] = last / 1e6 if last is not None else None
+                stats[name + "_mean_ms"] = total / completed / 1e6 if completed else None
+                values = np.percentile(times, PERCENTILES) / 1e6 if times else [None] * len(PERCENTILES)
+                for p, value in zip(PERCENTILES, values):
+                    stats["{}_p{}_ms".format(name, p)] = float(value) if value is not None else None
+            return stats
+
+
+def profile_rows(elements):
+    """Returns the statistics of the elements, which have profiles"""
+    rows = []
+    for element in elements:
+        profile = getattr(element, "profile", None)
+        if profile is None:
+            continue
+        row = {"id": element.unique_id, "name": element.name, "class": element.__class__.__name__}
+        row.update(profile.statistics())
+        rows.append(row)
+    return rows
+
+
+def export_json(path, elements):
+    with open(path, "w") as f:
+        json.dump(profile_rows(elements), f, indent=2)
+
+
+def export_csv(path, elements):
+    rows = profile_rows(elements)
+    with open(path, "w", newline="") as f:
+        if not rows:
+            return
+        writer = csv.DictWriter(f, list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def export(path, elements):
+    """Saves the statistics of the elements to a .json or .csv file (by the extension)"""
+    if path.lower().endswith(".json"):
+        export_json(path, elements)
+    else:
+        export_csv(path, elements)
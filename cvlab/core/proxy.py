@@ -0,0 +1,89 @@
+"""
+Proxy evaluation - elements process downscaled images while a parameter is being dragged in the GUI.
+
+In proxy mode (see Scheduler.interactive_change) the recalculated elements get their big input images
+downscaled to about PROXY_PIXELS, and their parameters in pixels scaled (CoreElement.scale_parameters).
+Their outputs are remembered as proxies with the scale, so the following elements get them as they are.
+After the parameter is idle for a while, the elements are recalculated at full resolution.
+
+Results of proxy calculations are not cached.
+"""
+
+import cv2 as cv
+import numpy as np
+
+from ..diagram.data import Data, Sequence
+from .array_map import ArrayMap
+
+
+# size of the proxy images
+PROXY_PIXELS = 1 << 20
+
+RESIZABLE_TYPES = (np.uint8, np.int8, np.uint16, np.int16, np.float32, np.float64)
+
+
+_proxy_scales = ArrayMap()     # proxy array -> its scale
+_proxies = ArrayMap()          # full resolution array -> (its proxy, scale), so it is downscaled once
+
+
+def _is_image(value):
+    return isinstance(value, np.ndarray) and value.dtype.type in RESIZABLE_TYPES and \
+        (value.ndim == 2 or value.ndim == 3 and value.shape[2] <= 4)
+
+
+def proxy_scale(array):
+    """Returns the scale of a proxy array (None for other values)"""
+    return _proxy_scales.get(array)
+
+
+def make_proxy(array):
+    """Returns (proxy of the array, its scale) - proxies and small arrays are returned as they are"""
+    if not _is_image(array):
+        return array, None
+    scale = proxy_scale(array)
+    if scale is not None:
+        return array, scale
+    height, width = array.shape[:2]
+    if height * width <= PROXY_PIXELS:
+        return array, None
+    proxy = _proxies.get(array)
+    if proxy is not None:
+        return proxy
+    scale = (PROXY_PIXELS / (height * width)) ** 0.5
+    size = max(1, int(round(width * scale))), max(1, int(round(height * scale)))
+    proxy = cv.resize(array, size, interpolation=cv.INTER_AREA)
+    if proxy.ndim < array.ndim:
+        proxy = proxy[:, :, np.newaxis]
+    _proxy_scales.set(proxy, scale)
+    _proxies.set(array, (proxy, scale))
+    return proxy, scale
+
+
+def _proxy_data(data, scales):
+    if data.type() == Data.SEQUENCE:
+        return Sequence([_proxy_data(d, scales) for d in data.value])
+    value, scale = make_proxy(data.value)
+    if scale is None:
+        return data
+    scales.append(scale)
+    proxy = Data(value)
+    proxy.frame = data.frame
+    return proxy
+
+
+def proxy_inputs(inputs):
+    """Returns (inputs with proxies of big images, the scale of the proxies) - the scale is None without proxies"""
+    scales = []
+    proxies = {name: _proxy_data(data, scales) for name, data in inputs.items()}
+    if not scales:
+        return inputs, None
+    return proxies, min(scales)
+
+
+def mark_proxies(outputs, scale):
+    """Remembers the output images of a proxy calculation as proxies"""
+    for data in outputs.values():
+        if data.type() == Data.SEQUENCE:
+            mark_proxies(dict(enumerate(data.value)), scale)
+        elif _is_image(data.value):
+            _proxy_scales.set(data.value, scale)
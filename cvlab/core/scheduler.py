@@ -0,0 +1,414 @@
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from . import tracer
+
+
+# idle pool workers exit after this time, so closed diagrams do not keep their threads
+WORKER_IDLE_TIMEOUT = 30
+
+# proxy evaluation ends, when the interactive changes stop for this time (in seconds)
+PROXY_IDLE = 0.5
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+class Scheduler:
+    """
+    Runs calculations of threaded elements on a bounded pool of worker threads.
+
+    Each element is queued at most once and is never calculated by two workers at the same time.
+    If an element is recalculated while it is running, it is queued again when the running calculation ends.
+    Elements with 'dedicated_thread' set (e.g. live sources, which never finish) get a separate thread.
+
+    When an element is scheduled, its whole downstream closure is marked dirty. A dirty element waits
+    until none of its predecessors (except dedicated ones) is dirty or running, so that each dirty
+    element is calculated exactly once, in topological order. Dirty elements which were not requested to recalculate
+    (their inputs have not changed) are just marked clean.
+
+    Elements scheduled for new frames of live streams ('pipelined') do not mark their successors dirty
+    and are not blocked by their predecessors - each element may process a different frame at the same time.
+    Older frames are processed first.
+
+    Calculations may be suspended (e.g. while a diagram is loaded) - the scheduled elements stay dirty,
+    and when the scheduler is resumed, each of them is calculated once, in topological order.
+
+    In demand-driven mode only the needed elements are calculated: sinks (element.sink), observed elements
+    (element.observed, e.g. with a visible preview) and all their ancestors. Other elements are deferred
+    (live sources are stopped) until something needs them.
+
+    While a parameter is changed interactively (e.g. a slider is dragged), the elements may be calculated
+    on downscaled images (proxy evaluation, see core/proxy.py). When the changes stop, the elements calculated
+    on proxies are recalculated at full resolution.
+
+    Interrupts of running elements are requested (element.interrupt()) and cleared when a calculation
+    starts (element.clear_interrupt()) under the lock of the scheduler, so that no request is lost.
+
+    The graph is given by 'graph' object (the diagram), which provides successors(element),
+    predecessors(element), topological_rank(element) and the set of elements.
+    """
+
+    # calculate only the elements needed by sinks and observed elements (default for new diagrams)
+    demand_driven = False
+
+    # calculate on downscaled images while parameters are dragged (set in the GUI settings)
+    proxy_enabled = False
+
+    def __init__(self, workers=None, graph=None):
+        self.requested_workers = workers
+        self.workers = workers or default_workers()
+        self.graph = graph
+        self._condition = threading.Condition()
+        self._ready = []            # heap of (priority, sequence number, element), see _enqueue
+        self._queued = {}           # element -> sequence number of its entry in _ready
+        self._sequence = itertools.count()
+        self._dirty = set()
+        self._running = set()
+        self._pipelined = {}        # dirty elements with new frames of live streams -> the oldest frame number
+        self._streaming = set()     # running elements, which process frames of live streams
+        self._threads = 0
+        self._idle_threads = 0
+        self._suspended = 0
+        self._deferred = set()      # elements waiting for demand (demand-driven mode)
+        self._needed = None         # needed elements (demand-driven mode), None - to be found
+        self.proxy = False          # elements are calculated on proxies
+        self._proxied = set()       # elements calculated on proxies, to be recalculated at full resolution
+        self._proxy_deadline = 0
+        self._proxy_timer = None
+        self.reset_counters()
+
+    def set_workers(self, workers=None):
+        """Sets the size of the pool (None means the number of CPU cores)"""
+        with self._condition:
+            self.requested_workers = workers
+            self.workers = workers or default_workers()
+            self._start_workers()
+            self._condition.notify_all()
+
+    def reset_counters(self):
+        """Resets the calculation counters (e.g. at the beginning of a benchmark frame)"""
+        self.calculations = 0
+        self.skipped = 0
+        self.calculation_counts = Counter()
+
+    def counters(self):
+        """Returns numbers of calculated and skipped (dirty, but not changed) elements since the last reset"""
+        with self._condition:
+            return {"calculations": self.calculations, "skipped": self.skipped}
+
+    def schedule(self, element, force_break=False, frame=None):
+        """Requests a calculation of the element, 'frame' is the number of a new frame of a live stream"""
+        with self._condition:
+            element.work_pending = True
+            if force_break and element in self._running:
+                element.interrupt()
+                tracer.instant("interrupt requested", "interrupt", element)
+            if frame is not None:
+                self._pipelined.setdefault(element, frame)
+                self._dirty.add(element)
+            else:
+                self._mark_dirty(element)
+            self._release([element])
+
+    def invalidate(self, element):
+        """
+        Marks the element and its descendants dirty before its outputs are reset (the element is scheduled next),
+        so that the descendants wait for its new outputs instead of calculating on the reset ones
+        """
+        with self._condition:
+            self._mark_dirty(element)
+
+    def suspend(self):
+        """Defers all calculations until resume() is called (the calls may be nested)"""
+        with self._condition:
+            self._suspended += 1
+
+    def resume(self):
+        """Starts the deferred calculations"""
+        with self._condition:
+            self._suspended -= 1
+            if not self._suspended:
+                self._release(list(self._dirty))
+                self._release_needed()
+
+    @contextmanager
+    def suspended(self):
+        self.suspend()
+        try:
+            yield
+        finally:
+            self.resume()
+
+    def set_demand_driven(self, demand_driven):
+        """Enables or disables demand-driven mode of this scheduler"""
+        with self._condition:
+            self.demand_driven = demand_driven
+        self.demand_changed()
+
+    def demand_changed(self):
+        """Must be called when sinks or observed elements change - deferred elements may be needed now"""
+        with self._condition:
+            self._needed = None
+            self._release_needed()
+            for element in list(self._running):
+                if element.dedicated_thread and not self._is_needed(element):
+                    # the live source is stopped and deferred, see _dedicated_work
+                    element.work_pending = True
+                    self._dirty.add(element)
+                    element.interrupt()
+
+    def _is_needed(self, element):
+        if not self.demand_driven or self.graph is None:
+            return True
+        if self._needed is None:
+            # the demand flows upstream from sinks and observed elements
+            self._needed = set()
+            stack = [e for e in list(self.graph.elements) if e.sink or e.observed]
+            while stack:
+                e = stack.pop()
+                if e not in self._needed:
+                    self._needed.add(e)
+                    stack.extend(self._predecessors(e))
+        return element in self._needed
+
+    def _release_needed(self):
+        if self._suspended or not self._deferred:
+            return
+        needed = [e for e in self._deferred if self._is_needed(e)]
+        for element in needed:
+            self._deferred.discard(element)
+            self._mark_dirty(element)
+        self._release(needed)
+
+    def interactive_change(self):
+        """
+        Informs that a parameter is being changed interactively - if proxy evaluation is enabled,
+        the elements are calculated on proxies, until the changes stop for PROXY_IDLE seconds
+        """
+        if not self.proxy_enabled:
+            return
+        with self._condition:
+            self.proxy = True
+            self._proxy_deadline = time.monotonic() + PROXY_IDLE
+            if self._proxy_timer is None:
+                self._proxy_timer = threading.Thread(target=self._proxy_work, name="CV Lab proxy timer", daemon=True)
+                self._proxy_timer.start()
+
+    def _proxy_work(self):
+        with self._condition:
+            while True:
+                delay = self._proxy_deadline - time.monotonic()
+                if delay <= 0:
+                    break
+                self._condition.wait(delay)
+            self._proxy_timer = None
+            self.proxy = False
+            elements = list(self._proxied)
+            self._proxied.clear()
+        for element in elements:
+            element.recalculate(False, False, True, force_units_recalc=True)
+
+    def proxy_calculated(self, element):
+        """Called after a calculation on proxies - the element is recalculated at full resolution after proxy mode"""
+        with self._condition:
+            if self.proxy:
+                self._proxied.add(element)
+                return
+        element.recalculate(False, False, False, force_units_recalc=True)
+
+    def element_added(self, element):
+        """Schedules calculations requested before the element was added to the diagram"""
+        with self._condition:
+            self._needed = None
+        if getattr(element, "work_pending", False):
+            self.schedule(element)
+
+    def graph_changed(self, elements=None):
+        """
+        Must be called after the connections change - dirty elements may be unblocked.
+        'elements' are the ones whose predecessors changed (default: all dirty elements).
+        """
+        with self._condition:
+            self._needed = None
+            self._release(list(self._dirty) if elements is None else list(elements))
+            self._release_needed()
+
+    def cancel(self, element):
+        """Removes the element from the queue and waits until its calculations end"""
+        with self._condition:
+            self._queued.pop(element, None)
+            self._dirty.discard(element)
+            self._deferred.discard(element)
+            self._proxied.discard(element)
+            self._pipelined.pop(element, None)
+            element.work_pending = False
+            while element in self._running:
+                self._condition.wait()
+            self._release(list(self._successors(element)))
+
+    def is_idle(self):
+        return not self._dirty and not self._running
+
+    def wait_idle(self, timeout=None):
+        """Waits until there are no calculations left. Returns False on timeout."""
+        with self._condition:
+            return self._condition.wait_for(self.is_idle, timeout)
+
+    def running_elements(self):
+        with self._condition:
+            return list(self._running)
+
+    def _successors(self, element):
+        return self.graph.successors(element) if self.graph is not None else []
+
+    def _predecessors(self, element):
+        return self.graph.predecessors(element) if self.graph is not None else []
+
+    def _mark_dirty(self, element):
+        # all descendants of a dirty element are already dirty, so the search stops on them
+        stack = [element]
+        while stack:
+            e = stack.pop()
+            if e in self._dirty:
+                continue
+            self._dirty.add(e)
+            stack.extend(self._successors(e))
+
+    def _is_blocked(self, element):
+        for predecessor in self._predecessors(element):
+            # dedicated elements (live sources) and elements processing frames of live streams
+            # stream their outputs, their successors do not wait for them
+            if predecessor.dedicated_thread or predecessor in self._pipelined or predecessor in self._streaming:
+                continue
+            if predecessor in self._dirty or predecessor in self._running:
+                return True
+        return False
+
+    def _release(self, elements):
+        """Queues the given dirty elements which are not blocked, cleans the ones which have nothing to do"""
+        if self._suspended:
+            return
+        stack = list(elements)
+        while stack:
+            element = stack.pop()
+            if element not in self._dirty or element in self._queued or element in self._running:
+                continue
+            if element.work_pending and not self._is_needed(element):
+                # nothing needs its outputs - it waits for demand, its successors are not needed either
+                self._dirty.remove(element)
+                self._pipelined.pop(element, None)
+                self._deferred.add(element)
+                stack.extend(self._successors(element))
+                continue
+            if element not in self._pipelined and self._is_blocked(element):
+                continue
+            if element.work_pending:
+                if element.dedicated_thread:
+                    self._start_dedicated(element)
+                    stack.extend(self._successors(element))
+                else:
+                    self._enqueue(element)
+            else:
+                self._dirty.remove(element)
+                self._pipelined.pop(element, None)
+                self.skipped += 1
+                stack.extend(self._successors(element))
+        if self.is_idle():
+            self._condition.notify_all()
+
+    def _enqueue(self, element):
+        rank = self.graph.topological_rank(element) if self.graph is not None else 0
+        sequence = next(self._sequence)
+        self._queued[element] = sequence
+        # edits go first, frames of live streams are processed from the oldest, so that the pipeline drains
+        frame = self._pipelined.get(element)
+        priority = (0, 0, rank) if frame is None else (1, frame, rank)
+        heapq.heappush(self._ready, (priority, sequence, element))
+        self._start_workers()
+        self._condition.notify()
+
+    def _dequeue(self):
+        while self._ready:
+            priority, sequence, element = heapq.heappop(self._ready)
+            if self._queued.get(element) == sequence:
+                del self._queued[element]
+                return element
+        return None
+
+    def _take(self, element):
+        self._dirty.discard(element)
+        if self._pipelined.pop(element, None) is not None:
+            self._streaming.add(element)
+        self._running.add(element)
+        element.work_pending = False
+        element.clear_interrupt()
+        self.calculations += 1
+        self.calculation_counts[element] += 1
+
+    def _finish(self, element):
+        self._running.remove(element)
+        self._streaming.discard(element)
+        self._release([element] + list(self._successors(element)))
+        self._condition.notify_all()
+
+    def _start_workers(self):
+        while self._threads < self.workers and len(self._queued) > self._idle_threads:
+            self._threads += 1
+            thread = threading.Thread(target=self._pool_work)
+            thread.daemon = True
+            thread.name = "CV Lab worker " + str(self._threads)
+            thread.start()
+
+    def _has_work_or_too_many_threads(self):
+        return self._queued or self._threads > self.workers
+
+    def _pool_work(self):
+        with self._condition:
+            while True:
+                if self._threads > self.workers:
+                    break
+                element = self._dequeue()
+                if element is None:
+                    self._idle_threads += 1
+                    self._condition.wait_for(self._has_work_or_too_many_threads, WORKER_IDLE_TIMEOUT)
+                    self._idle_threads -= 1
+                    if not self._queued:
+                        break
+                    continue
+                self._take(element)
+                self._condition.release()
+                try:
+                    element.work()
+                finally:
+                    self._condition.acquire()
+                    self._finish(element)
+            self._threads -= 1
+
+    def _start_dedicated(self, element):
+        self._take(element)
+        thread = threading.Thread(target=self._dedicated_work, args=(element,))
+        thread.daemon = True
+        thread.name = "Worker for '" + element.__class__.__name__ + "'"
+        thread.start()
+
+    def _dedicated_work(self, element):
+        # successors of a dedicated element are not blocked by it - it streams its outputs while running
+        with self._condition:
+            while True:
+                self._condition.release()
+                try:
+                    element.work()
+                finally:
+                    self._condition.acquire()
+                if not element.work_pending or not self._is_needed(element):
+                    break
+                self._take(element)
+                self._release(self._successors(element))
+            self._finish(element)
@@ -3,61 +3,123 @@ import time
 from .hooks import *
 from .exceptions import *
 from .processing_time import ProcessingTimeInfo
+from . import tracer
+from .memory import memory_budget
+from .profiler import ElementProfile, RunTimer, set_current_timer, RUN_INTERRUPTED, RUN_ERROR
 from .core_element import CoreElement
 
 
 class ThreadedElement(CoreElement):
-    """Base class for all threaded elements"""
+    """Base class for all threaded elements - they are calculated by the scheduler of their diagram"""
+
+    # elements which never finish their calculations (e.g. live sources) shall not occupy the shared pool
+    dedicated_thread = False
 
     def __init__(self):
         super(ThreadedElement, self).__init__()
         self.state = self.STATE_UNSET
         self._do_abort = False
         self._do_break = False
-        self._notifier = Notifier()
-        self._worker = threading.Thread(target=self.work)
-        self._worker.daemon = True
-        self._worker.name = "Worker for '" + self.__class__.__name__ + "'"
-        self._worker.start()
+        self.work_pending = False
         self.processing_time_info = None
+        self.profile = ElementProfile()
 
     def recalculate(self, refresh_parameters, refresh_structure, force_break, force_units_recalc=False):
+        if self._do_abort: return
+        if force_units_recalc:
+            for unit in self.units:
+                unit.calculated = False
         self.structure_changed |= refresh_structure
         self.parameters_changed |= refresh_parameters
-        self._do_break |= force_break
-        self._notifier.notify()
+        self.schedule(force_break)
+
+    def schedule(self, force_break, frame=None):
+        if self.diagram is not None:
+            self.diagram.scheduler.schedule(self, force_break, frame)
+        else:
+            # calculations start when the element is added to a diagram
+            self.work_pending = True
+
+    def invalidate(self):
+        if self.diagram is not None:
+            self.diagram.scheduler.invalidate(self)
 
     def may_interrupt(self):
         if self._do_break:
             raise InterruptException()
 
+    # the scheduler requests and clears interrupts under its lock, so that no request is lost
+    def interrupt(self):
+        self._do_break = True
+
+    def clear_interrupt(self):
+        self._do_break = False
+
+    def get_stream_policy(self, data):
+        if self.stream_policy == self.STREAM_AUTO:
+            return self.STREAM_INTERRUPT if data is not None and data.frame is None else self.STREAM_LATEST
+        return self.stream_policy
+
+    def input_changed(self, unit, data):
+        if self._do_abort: return
+        policy = self.get_stream_policy(data)
+        busy = unit.is_being_processed()
+        if busy and policy == self.STREAM_DROP:
+            return
+        if policy == self.STREAM_QUEUE:
+            unit.queue_inputs(self.stream_queue_size)
+        # frames of live streams are pipelined - the element does not wait for the previous elements,
+        # which may already process the next frame
+        self.schedule(busy and policy == self.STREAM_INTERRUPT, data.frame)
+
+    def is_congested(self):
+        policy = self.get_stream_policy(None)
+        if policy == self.STREAM_INTERRUPT:
+            return False
+        units = list(self.units)
+        if policy == self.STREAM_DROP:
+            congested = any(unit.is_being_processed() for unit in units)
+        elif policy == self.STREAM_QUEUE:
+            congested = any(len(unit.queued_inputs) >= self.stream_queue_size for unit in units)
+        else:
+            # a frame is already waiting, the next one would replace it
+            congested = self.work_pending
+        return congested or self.outputs_congested()
+
     def delete(self):
         self._do_abort = True
         self._do_break = True
-        self._notifier.notify()
-        self._worker.join()
+        if self.diagram is not None:
+            self.diagram.scheduler.cancel(self)
         CoreElement.delete(self)
+        self.set_state(self.STATE_UNSET)
 
     def work(self):
-        self.set_state(self.STATE_UNSET)
-        while True:
-            self._notifier.wait()
-            if self._do_abort: break
-            try:
-                self.set_state(self.STATE_BUSY)
-                start = time.clock()
-                self._do_break = False
+        if self._do_abort: return
+        timer = RunTimer()
+        set_current_timer(timer)
+        try:
+            self.set_state(self.STATE_BUSY)
+            start = time.perf_counter()
+            with tracer.span("process", "element", self):
                 self.process()
                 self.may_interrupt()
-                end = time.clock()
-                previous_time_infos = self.get_previous_time_infos()
-                self.processing_time_info = ProcessingTimeInfo(start, end, len(self.units), previous_time_infos)
-                self.set_state(self.STATE_READY)
-            except (InterruptException, ProcessingBreak):
-                pass
-            except Exception as e:
-                self.set_state(self.STATE_ERROR, e)
-        self.set_state(self.STATE_UNSET)
+            end = time.perf_counter()
+            self.profile.record(*timer.stop())
+            previous_time_infos = self.get_previous_time_infos()
+            self.processing_time_info = ProcessingTimeInfo(start, end, len(self.units), previous_time_infos)
+            self.set_state(self.STATE_READY)
+            memory_budget.maybe_check(self.diagram)
+        except (InterruptException, ProcessingBreak):
+            self.profile.record(*timer.stop(), RUN_INTERRUPTED)
+            tracer.instant("interrupted", "interrupt", self)
+        except Exception as e:
+            self.profile.record(*timer.stop(), RUN_ERROR)
+            self.set_state(self.STATE_ERROR, e)
+        finally:
+            set_current_timer(None)
+        if any(unit.queued_inputs for unit in self.units):
+            self.recalculate(False, False, False)
 
     def get_previous_time_infos(self):
         time_infos = []
@@ -67,4 +129,3 @@ class ThreadedElement(CoreElement):
                     time_infos.append(inpt.parent.processing_time_info)
         return time_infos
 
-
@@ -0,0 +1,129 @@
+"""
+Tiled processing of very large images by local filters.
+
+Tileable elements compute each output pixel from a limited neighborhood of the input pixel - its radius
+is given by tile_halo for the parameters. Big images are split into tiles, each tile is extended by the halo
+(clipped at the borders of the image, where the element handles the border itself), processed, and its inner
+part is written to the output. The tiles are processed in parallel.
+
+Processing is lazy - the output of a tileable element is a TiledValue: the source array and the steps to apply.
+A tileable element getting such a value adds its step, so chains of tileable elements are processed tile by tile
+(with the sum of their halos), when the value is read - by the first element which is not tileable, or the GUI.
+The intermediate images are never allocated: the peak memory is the output and a few tiles per worker.
+"""
+
+import threading
+
+import numpy as np
+
+from .parallel import process_in_parallel
+
+
+# size of the tiles (without the halo) in pixels
+TILE_SIZE = 1024
+
+# smaller images are processed whole
+TILING_MIN_PIXELS = 1 << 24
+
+# chains with bigger halos are computed up to the previous element, so that the tiles are not mostly halo
+MAX_HALO = TILE_SIZE // 4
+
+
+class TiledValue:
+    """Value of Data: the source array processed by a chain of tileable elements, computed when it is read"""
+
+    __slots__ = ("source", "steps", "halo", "lock", "_array")
+
+    def __init__(self, source, steps):
+        self.source = source
+        self.steps = steps      # [(element, parameters, halo)]
+        self.halo = sum(step[2] for step in steps)
+        self.lock = threading.Lock()
+        self._array = None
+
+    def then(self, step):
+        """Returns the value processed by one more element"""
+        array = self._array
+        if array is not None:
+            return TiledValue(array, [step])
+        return TiledValue(self.source, self.steps + [step])
+
+    def read(self):
+        with self.lock:
+            if self._array is None:
+                self._array = process_tiled(self.source, self.steps)
+            return self._array
+
+    def fingerprint(self):
+        from .cache import fingerprint
+        return "tiled", fingerprint(self.source), tuple((e.__class__.__module__, e.__class__.__name__, fingerprint(p))
+                                                        for e, p, halo in self.steps)
+
+    def __repr__(self):
+        return "TiledValue({}, {})".format(self.source.shape, [e.__class__.__name__ for e, p, halo in self.steps])
+
+
+def _process_step(element, parameters, image):
+    from ..diagram.data import Data
+    outputs = {}
+    element.process_inputs({next(iter(element.inputs)): Data(image)}, outputs, parameters)
+    result = outputs[next(iter(element.outputs))].value
+    if not isinstance(result, np.ndarray) or result.shape[:2] != image.shape[:2]:
+        raise ValueError("Tileable element {} has changed the size of a tile".format(element.name))
+    return result
+
+
+def process_tiled(source, steps):
+    """Returns the source array processed by the steps (element, parameters, halo), tile by tile"""
+    height, width = source.shape[:2]
+    halo = sum(step[2] for step in steps)
+    tiles = [(y, x) for y in range(0, height, TILE_SIZE) for x in range(0, width, TILE_SIZE)]
+
+    def process(tile):
+        y, x = tile
+        bottom, right = min(y + TILE_SIZE, height), min(x + TILE_SIZE, width)
+        top, left = max(0, y - halo), max(0, x - halo)
+        image = source[top:min(bottom + halo, height), left:min(right + halo, width)]
+        for element, parameters, _ in steps:
+            image = _process_step(element, parameters, image)
+        return image[y - top:bottom - top, x - left:right - left]
+
+    # the first tile gives the type and channels of the output
+    first = process(tiles[0])
+    output = np.empty((height, width) + first.shape[2:], first.dtype)
+    output[:first.shape[0], :first.shape[1]] = first
+
+    def store(tile):
+        part = process(tile)
+        output[tile[0]:tile[0] + part.shape[0], tile[1]:tile[1] + part.shape[1]] = part
+
+    process_in_parallel(store, tiles[1:])
+    return output
+
+
+def tiling_applies(element, inputs, parameters):
+    """Tells if the element should process its inputs lazily, in tiles"""
+    if len(inputs) != 1 or len(element.outputs) != 1:
+        return False
+    halo = element.tile_halo(parameters)
+    if halo is None or halo > MAX_HALO:
+        return False
+    value = next(iter(inputs.values()))._value
+    if isinstance(value, TiledValue):
+        return True
+    return isinstance(value, np.ndarray) and value.dtype != object and value.ndim in (2, 3) and \
+        value.shape[0] * value.shape[1] >= TILING_MIN_PIXELS
+
+
+def process_lazily(element, inputs, outputs, parameters):
+    """Sets the output of a tileable element to its input processed lazily, chained with the previous elements"""
+    from ..diagram.data import Data
+    data = next(iter(inputs.values()))
+    parameters = dict(parameters)
+    step = element, parameters, element.tile_halo(parameters)
+    value = data._value
+    if isinstance(value, TiledValue) and value.halo + step[2] <= MAX_HALO:
+        value = value.then(step)
+    else:
+        value = TiledValue(data.value, [step])
+    outputs[next(iter(element.outputs))] = Data(value)
@@ -0,0 +1,121 @@
+"""
+Timeline of the execution of diagrams, saved in the Chrome trace event format.
+
+The saved .json files can be opened in chrome://tracing or https://ui.perfetto.dev - each thread
+(the GUI thread, workers of the scheduler, unit pool threads) has its own track with the spans of
+calculations of elements (process, prepare_structure), propagation of outputs (actualize_outputs),
+interrupts and updates of the previews.
+
+Recording is disabled by default - spans are then a shared no-op context manager.
+"""
+
+import json
+import os
+import threading
+import time
+
+
+enabled = False
+
+_events = []        # (phase, name, category, thread id, start, duration, args), times in nanoseconds
+_threads = {}       # thread id -> name
+_start = 0
+
+
+class _Span:
+    __slots__ = ("name", "category", "args", "begin")
+
+    def __init__(self, name, args, category):
+        self.name = name
+        self.args = args
+        self.category = category
+
+    def __enter__(self):
+        self.begin = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["exception"] = exc_type.__name__
+        _record("X", self.name, self.category, self.begin, end - self.begin, self.args)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+def _record(phase, name, category, begin, duration, args):
+    thread = threading.current_thread()
+    if thread.ident not in _threads:
+        _threads[thread.ident] = thread.name
+    _events.append((phase, name, category, thread.ident, begin, duration, args))
+
+
+def _describe(name, element, args):
+    """Returns the name of the event and its arguments"""
+    if element is None:
+        return name, args
+    args["element"] = element.name
+    args["id"] = element.unique_id
+    return "{} ({})".format(name, element.name), args
+
+
+def start():
+    """Clears the recorded events and starts recording"""
+    global enabled, _start
+    _events.clear()
+    _threads.clear()
+    _start = time.perf_counter_ns()
+    enabled = True
+
+
+def stop():
+    global enabled
+    enabled = False
+
+
+def span(name, category, element=None, **args):
+    """Returns a context manager recording the time of its block (if the recording is enabled)"""
+    if not enabled:
+        return NULL_SPAN
+    return _Span(*_describe(name, element, args), category)
+
+
+def instant(name, category, element=None, **args):
+    """Records a moment (e.g. an interrupt request)"""
+    if enabled:
+        name, args = _describe(name, element, args)
+        _record("i", name, category, time.perf_counter_ns(), 0, args)
+
+
+def events():
+    """Returns the recorded events in the Chrome trace event format"""
+    pid = os.getpid()
+    trace = [{"ph": "M", "name": "thread_name", "pid": pid, "tid": tid, "args": {"name": name}}
+             for tid, name in list(_threads.items())]
+    for phase, name, category, tid, begin, duration, args in list(_events):
+        event = {"ph": phase, "name": name, "cat": category, "pid": pid, "tid": tid,
+                 "ts": (begin - _start) / 1000, "args": args}
+        if phase == "X":
+            event["dur"] = duration / 1000
+        else:
+            event["s"] = "t"
+        trace.append(event)
+    return trace
+
+
+def export(path):
+    """Saves the recorded events to a .json file"""
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events(), "displayTimeUnit": "ms"}, f)
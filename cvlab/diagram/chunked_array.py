@@ -0,0 +1,203 @@
+"""
+Arrays stored in directories as .npy files with chunks of consecutive slices (along the first axis),
+for volumes bigger than the memory. The chunks are memory-mapped, so indexing reads only the needed
+parts of the files - e.g. a slice of a volume, or a row of all slices.
+
+Directory layout:
+    chunks.json                 - {"shape": [...], "dtype": "...", "chunk": number of slices in a chunk}
+    00000.npy, 00001.npy, ...   - the chunks
+"""
+
+import json
+import os
+import re
+import shutil
+import threading
+import weakref
+from tempfile import mkdtemp
+
+import numpy as np
+
+
+META_FILE = "chunks.json"
+CHUNK_PATTERN = re.compile(r"^\d{5}\.npy$")
+CHUNK_BYTES = 64 << 20  # default size of a chunk
+
+
+def default_chunk(shape, dtype):
+    """Returns the number of slices in chunks of the default size"""
+    slice_bytes = int(np.prod(shape[1:], dtype=np.int64)) * np.dtype(dtype).itemsize
+    return max(1, CHUNK_BYTES // max(1, slice_bytes))
+
+
+class ChunkedArray:
+    """Array stored in a directory of chunks, indexed like a numpy array (indexing returns numpy arrays)"""
+
+    def __init__(self, directory, mode="r"):
+        self.directory = directory
+        self.mode = mode    # mode of the memory maps: "r" or "r+"
+        meta_path = os.path.join(directory, META_FILE)
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        self.shape = tuple(meta["shape"])
+        self.dtype = np.dtype(meta["dtype"])
+        self.chunk = meta["chunk"]
+        self.mtime = os.stat(meta_path).st_mtime_ns
+        self._owns_directory = False    # the directory is removed with the array
+        self._writes = 0    # writes through memory maps do not change the mtimes of the files until they are flushed
+        self._chunks = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, directory, shape, dtype, chunk=None):
+        """Creates an array (filled with zeros) in the directory, replacing chunks of a previous array"""
+        shape = tuple(int(s) for s in shape)
+        chunk = chunk or default_chunk(shape, dtype)
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if CHUNK_PATTERN.match(name):
+                os.remove(os.path.join(directory, name))
+        for index, start in enumerate(range(0, shape[0], chunk)):
+            chunk_shape = (min(chunk, shape[0] - start),) + shape[1:]
+            np.lib.format.open_memmap(cls.chunk_path(directory, index), "w+", dtype, chunk_shape).flush()
+        with open(os.path.join(directory, META_FILE), "w") as f:
+            json.dump({"shape": shape, "dtype": np.dtype(dtype).str, "chunk": chunk}, f)
+        return cls(directory, "r+")
+
+    @classmethod
+    def temporary(cls, shape, dtype, chunk=None):
+        """Creates an array in a temporary directory, which is removed when the array is not used anymore"""
+        directory = mkdtemp(prefix="cvlab-chunks-")
+        array = cls.create(directory, shape, dtype, chunk)
+        array._owns_directory = True
+        weakref.finalize(array, shutil.rmtree, directory, True)
+        return array
+
+    @classmethod
+    def save(cls, directory, array, chunk=None):
+        """Saves an array (e.g. a numpy array, a memory map or another ChunkedArray) slice by slice"""
+        chunked = cls.create(directory, array.shape, array.dtype, chunk)
+        for index in range(len(array)):
+            chunked[index] = array[index]
+        chunked.flush()
+        return chunked
+
+    @staticmethod
+    def chunk_path(directory, index):
+        return os.path.join(directory, "{:05d}.npy".format(index))
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape, dtype=np.int64))
+
+    @property
+    def nbytes(self):
+        return self.size * self.dtype.itemsize
+
+    @property
+    def disk_cacheable(self):
+        return not self._owns_directory
+
+    def __len__(self):
+        return self.shape[0]
+
+    def _chunk(self, index):
+        with self._lock:
+            chunk = self._chunks.get(index)
+            if chunk is None:
+                chunk = np.load(self.chunk_path(self.directory, index), mmap_mode=self.mode)
+                self._chunks[index] = chunk
+            return chunk
+
+    def _split(self, key):
+        """Returns (groups of the first axis indices by chunks, rest of the key)"""
+        key = key if isinstance(key, tuple) else (key,)
+        first, rest = key[0], key[1:]
+        if first is Ellipsis:
+            first, rest = slice(None), key
+        if isinstance(first, (int, np.integer)):
+            index = int(first) + len(self) if first < 0 else int(first)
+            if not 0 <= index < len(self):
+                raise IndexError("index {} is out of bounds for axis 0 with size {}".format(first, len(self)))
+            return index, rest
+        if not isinstance(first, slice):
+            raise TypeError("ChunkedArray supports only integers and slices in the first axis")
+        indices = np.arange(len(self))[first]
+        chunks = indices // self.chunk
+        bounds = np.flatnonzero(np.diff(chunks)) + 1
+        groups = [(int(c[0]), i - c[0] * self.chunk)
+                  for c, i in zip(np.split(chunks, bounds), np.split(indices, bounds)) if len(c)]
+        return groups, rest
+
+    def __getitem__(self, key):
+        groups, rest = self._split(key)
+        if isinstance(groups, int):
+            return self._chunk(groups // self.chunk)[(groups % self.chunk,) + rest]
+        if not groups:
+            return self._chunk(0)[(np.arange(0),) + rest]
+        return np.concatenate([self._chunk(c)[(local,) + rest] for c, local in groups])
+
+    def __setitem__(self, key, value):
+        groups, rest = self._split(key)
+        self._writes += 1
+        if isinstance(groups, int):
+            self._chunk(groups // self.chunk)[(groups % self.chunk,) + rest] = value
+            return
+        value = np.asanyarray(value)
+        # values without the first axis of the selection are broadcast to all selected slices
+        selected_ndim = np.broadcast_to(False, (1,) + self.shape[1:])[(slice(None),) + rest].ndim
+        start = 0
+        for c, local in groups:
+            part = value[start:start + len(local)] if value.ndim == selected_ndim else value
+            self._chunk(c)[(local,) + rest] = part
+            start += len(local)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __array__(self, dtype=None):
+        array = self[:]
+        return array.astype(dtype) if dtype is not None else array
+
+    def flush(self):
+        with self._lock:
+            for chunk in self._chunks.values():
+                chunk.flush()
+
+    def fingerprint(self):
+        """Identifies the content - changes with writes to this array and with modifications of the chunk files"""
+        chunks = (len(self) + self.chunk - 1) // self.chunk
+        mtimes = tuple(os.stat(self.chunk_path(self.directory, index)).st_mtime_ns for index in range(chunks))
+        return "chunked", os.path.abspath(self.directory), self.mtime, mtimes, self._writes
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_chunks"] = {}
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return "ChunkedArray({!r}, shape={}, dtype={})".format(self.directory, self.shape, self.dtype)
+
+
+def save_npy(path, array):
+    """Saves an array to a .npy file slice by slice, so that big (e.g. memory-mapped) arrays are not loaded at once"""
+    if not path.endswith(".npy"):
+        path += ".npy"
+    if isinstance(array, np.ndarray) and not isinstance(array, np.memmap):
+        np.save(path, array)
+        return
+    stored = np.lib.format.open_memmap(path, "w+", array.dtype, array.shape)
+    for index in range(len(array)):
+        stored[index] = array[index]
+    stored.flush()
+    del stored
@@ -1,3 +1,7 @@
+# Lists of connections are copy-on-write tuples - they are changed under the diagram lock,
+# while the data is propagated through the current tuple without locking.
+
+
 class Input:
     def __init__(self, id, name=None, multiple=False, optional=False):
         super(Input, self).__init__()
@@ -7,7 +11,7 @@ class Input:
         self.name = name
         self.multiple = multiple
         self.optional = optional
-        self.connected_from = []
+        self.connected_from = ()
         self.hook = None
         from .diagram import Diagram
         self.diagram_write_lock = Diagram.diagram_lock.writer
@@ -17,13 +21,13 @@ class Input:
             if output in self.connected_from: return
             if not self.multiple:
                 self.disconnect_all()
-            self.connected_from.append(output)
+            self.connected_from += (output,)
             self.hook.connected(output.hook)
 
     def disconnect(self, output):
         with self.diagram_write_lock:
             if output not in self.connected_from: return
-            self.connected_from.remove(output)
+            self.connected_from = tuple(o for o in self.connected_from if o is not output)
             output.disconnect(self)
             self.hook.disconnected(output.hook)
             self.parent.diagram.notify_disconnect(output, self)
@@ -45,7 +49,7 @@ class Output:
         if name is None: name = id
         self.name = name
         self.desequencing = desequencing
-        self.connected_to = []
+        self.connected_to = ()
         self.hook = None
         from .diagram import Diagram
         self.diagram_write_lock = Diagram.diagram_lock.writer
@@ -53,13 +57,13 @@ class Output:
     def connect(self, input_):
         with self.diagram_write_lock:
             if input_ in self.connected_to: return
-            self.connected_to.append(input_)
+            self.connected_to += (input_,)
             self.hook.connected(input_.hook)
 
     def disconnect(self, input_):
         with self.diagram_write_lock:
             if input_ not in self.connected_to: return
-            self.connected_to.remove(input_)
+            self.connected_to = tuple(i for i in self.connected_to if i is not input_)
             input_.disconnect(self)
             self.hook.disconnected(input_.hook)
 
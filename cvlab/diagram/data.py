@@ -1,7 +1,11 @@
-from collections import defaultdict
+import os
+from collections import deque, OrderedDict
+from collections.abc import MutableSequence
 from threading import Lock, RLock
 
 from .errors import ProcessingError
+from ..core.file_cache import file_cache
+from ..core.tiling import TiledValue
 
 
 class Data:
@@ -9,70 +13,103 @@ class Data:
     SEQUENCE = 1
     IMAGE = 2
 
+    # Long sequences consist of thousands of Data objects, so they have no per-object locks or dicts.
+    # All Data share the locks below - they are held only for short operations on the values.
+    __slots__ = ("_type", "_value", "frame", "observers")
+
+    lock = RLock()
+    observers_lock = Lock()
+
     def __init__(self, value=None, _type=IMAGE):
         self._type = _type
         if _type == Data.SEQUENCE and value is None:
             self._value = []
         else:
             self._value = value
-        self.observers = defaultdict(int)
-        self.observers_lock = Lock()
-        self.lock = RLock()
+        self.frame = None   # sequence number of a frame of a live stream (None for data which are not streamed)
+        self.observers = ()     # an observer is repeated as many times as it was added
 
     def add_observer(self, observer, recursive):
         with self.observers_lock:
-            self.observers[observer] += 1
+            self.observers += (observer,)
         if recursive and self._type == Data.SEQUENCE:
             with self.lock:
-                for v in self._value:
-                    v.add_observer(observer, True)
+                if isinstance(self._value, DataList):
+                    self._value.add_observer(observer)
+                else:
+                    for v in self._value:
+                        v.add_observer(observer, True)
 
     def remove_observer(self, observer, recursive):
         with self.observers_lock:
-            self.observers[observer] -= 1
-            if self.observers[observer] <= 0:
-                del self.observers[observer]
+            self.observers = _without(self.observers, observer)
         if recursive and self._type == Data.SEQUENCE:
             with self.lock:
-                for v in self._value:
-                    v.remove_observer(observer, True)
+                if isinstance(self._value, DataList):
+                    self._value.remove_observer(observer)
+                else:
+                    for v in self._value:
+                        v.remove_observer(observer, True)
 
     def clear(self):
-        with self.lock:
-            if self._type == Data.SEQUENCE:
-                for d in self._value:
-                    d.clear()
-            else:
-                self.value = None
+        if self._type == Data.SEQUENCE:
+            # observers are notified without holding the lock
+            with self.lock:
+                if isinstance(self._value, DataList):
+                    items = self._value.clear_values()
+                else:
+                    items = list(self._value)
+            for d in items:
+                d.clear()
+        else:
+            self.value = None
 
     def copy(self):
         with self.lock:
             if self._type == self.NONE:
                 return EmptyData()
             if self._type == self.SEQUENCE:
+                if isinstance(self._value, DataList):
+                    return Sequence(self._value.copy())
                 return Sequence([d.copy() for d in self._value])
             elif self._type == self.IMAGE:
                 if self._value is None or (hasattr(self._value, "size") and not len(self._value)):
                     pass
-                return ImageData(self._value)
+                copy = ImageData(self._value)
+                copy.frame = self.frame
+                return copy
             else:
                 raise TypeError("Wrong Data.type")
 
     @property
     def value(self):
-        return self._value
+        value = self._value
+        if value.__class__ is FileValue or value.__class__ is TiledValue:
+            return value.read()
+        return value
 
     @value.setter
     def value(self, new_value):
+        self.set_value(new_value)
+
+    def set_value(self, new_value, frame=None):
+        """Sets the value and the frame number (for data of live streams) at once"""
         with self.lock:
-            if self._value is new_value:
+            if self._value is new_value and self.frame == frame:
                 return
             self._value = new_value
-        with self.observers_lock:
-            for o in self.observers:
-                o(self)
-
-    def assign(self, other):
+            self.frame = frame
+        self.notify_observers()
+
+    def notify_observers(self):
+        observers = self.observers
+        if len(observers) > 1:
+            observers = dict.fromkeys(observers)
+        for o in observers:
+            o(self)
+
+    def assign(self, other, frame=None):
+        """Copies the value of other Data, with its frame number or the given one"""
         assert isinstance(other, Data)
         if not self.is_compatible(other):
             raise ProcessingError("Data.assign: Data not compatible")
@@ -80,9 +117,10 @@ class Data:
             if len(self._value) != len(other._value):
                 raise ProcessingError("Data.assign: Sequence not compatible")
             for mine, her in zip(self._value, other._value):
-                mine.assign(her)
+                mine.assign(her, frame)
         else:
-            self.value = other.value
+            # files of lazy sequences are not read here
+            self.set_value(other._value, frame if frame is not None else other.frame)
 
     def is_compatible(self, other):
         assert isinstance(other, Data)
@@ -94,7 +132,7 @@ class Data:
 
     def type(self):
         with self.lock:
-            if self._value is None or (self._type == Data.IMAGE and hasattr(self.value, "size") and not self._value.size):
+            if self._value is None or (self._type == Data.IMAGE and hasattr(self._value, "size") and not self._value.size):
                 return Data.NONE
             else:
                 return self._type
@@ -121,8 +159,10 @@ class Data:
         """Returns a one-dimensional array with all sequence values"""
         with self.lock:
             if self._type == Data.NONE: return [None]
-            if self._type == Data.IMAGE: return [self._value]
+            if self._type == Data.IMAGE: return [self.value]
             if self._type == Data.SEQUENCE:
+                if isinstance(self._value, DataList):
+                    return self._value.values()
                 t = []
                 for d in self._value:
                     t += d.desequence_all()
@@ -141,6 +181,8 @@ class Data:
 
     def create_placeholder(self):
         if self._type == Data.SEQUENCE:
+            if isinstance(self._value, DataList):
+                return Data(self._value.placeholder(), Data.SEQUENCE)
             return Data([d.create_placeholder() for d in self._value], Data.SEQUENCE)
         else:
             return Data()
@@ -206,6 +248,8 @@ class Data:
 
 
 class EmptyOptionalData(Data):
+    __slots__ = ()
+
     def ready(self):
         return True
 
@@ -222,6 +266,153 @@ def ImageData(value=None):
     return Data(value, Data.IMAGE)
 
 
+def ImageSequence(values=()):
+    """Returns a flat sequence of images (or Nones or FileValues), stored compactly in a DataList"""
+    return Data(DataList(values), Data.SEQUENCE)
+
+
+class FileValue:
+    """
+    Value of Data kept in a file (e.g. an image of a long sequence), read when the value is accessed.
+    Recently read values are cached (see core/file_cache.py).
+    """
+
+    __slots__ = ("path", "reader", "mtime")
+
+    def __init__(self, path, reader):
+        self.path = path
+        self.reader = reader    # function reading the file, e.g. cv.imread
+        try:
+            self.mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            self.mtime = None
+
+    def key(self):
+        return self.path, self.mtime, self.reader
+
+    def read(self):
+        return file_cache.get(self)
+
+    def __repr__(self):
+        return "FileValue({!r})".format(self.path)
+
+
+def _without(observers, observer):
+    """Returns the observers with one occurrence of the observer removed"""
+    observers = list(observers)
+    if observer in observers:
+        observers.remove(observer)
+    return tuple(observers)
+
+
+class DataList(MutableSequence):
+    """
+    Items of a flat sequence of images, kept as a list of values.
+    Data objects of the items are created only when they are accessed, so copies and placeholders
+    of long sequences (e.g. thousands of files) cost a few pointers per item.
+    """
+
+    __slots__ = ("_values", "_items", "_observers")
+
+    def __init__(self, values=()):
+        self._values = list(values)
+        self._items = [None] * len(self._values)
+        self._observers = ()    # observers added to the sequence recursively, they get all the items
+
+    def __len__(self):
+        return len(self._values)
+
+    def _item(self, index):
+        item = self._items[index]
+        if item is None:
+            with Data.lock:
+                item = self._items[index]
+                if item is None:
+                    item = Data(self._values[index])
+                    item.observers = self._observers
+                    self._items[index] = item
+                    self._values[index] = None  # from now on, the value is kept by the item
+        return item
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._item(i) for i in range(*index.indices(len(self)))]
+        return self._item(index)
+
+    def __setitem__(self, index, data):
+        with Data.lock:
+            if isinstance(index, slice):
+                data = list(data)
+                self._items[index] = data
+                self._values[index] = [None] * len(data)
+            else:
+                self._items[index] = data
+                self._values[index] = None
+
+    def __delitem__(self, index):
+        with Data.lock:
+            del self._items[index]
+            del self._values[index]
+
+    def insert(self, index, data):
+        with Data.lock:
+            self._items.insert(index, data)
+            self._values.insert(index, None)
+
+    def __iter__(self):
+        return (self._item(i) for i in range(len(self)))
+
+    def __repr__(self):
+        return "DataList({} items)".format(len(self))
+
+    def _raw_values(self):
+        with Data.lock:
+            return [value if item is None else item._value for value, item in zip(self._values, self._items)]
+
+    def values(self):
+        """Returns the values of all items (files of lazy sequences are read)"""
+        return [value.read() if value.__class__ is FileValue else value for value in self._raw_values()]
+
+    def set_value(self, index, value):
+        """Sets the value of an item, without creating its Data object if nobody observes it"""
+        with Data.lock:
+            if self._items[index] is None and not self._observers:
+                self._values[index] = value
+                return
+        self._item(index).value = value
+
+    def clear_values(self):
+        """Clears values which are not held by Data objects and returns the Data objects to clear"""
+        with Data.lock:
+            self._values[:] = [None] * len(self._values)
+            return [item for item in self._items if item is not None]
+
+    def copy(self):
+        with Data.lock:
+            copy = DataList(self._raw_values())
+            for i, item in enumerate(self._items):
+                if item is not None and item.frame is not None:
+                    copy._item(i).frame = item.frame
+            return copy
+
+    def placeholder(self):
+        return DataList([None] * len(self))
+
+    def add_observer(self, observer):
+        with Data.lock:
+            self._observers += (observer,)
+            items = [item for item in self._items if item is not None]
+        for item in items:
+            item.add_observer(observer, True)
+
+    def remove_observer(self, observer):
+        with Data.lock:
+            self._observers = _without(self._observers, observer)
+            items = [item for item in self._items if item is not None]
+        for item in items:
+            item.remove_observer(observer, True)
+
+
 
 class DataSet:
     def __init__(self, inputs=None, parameters=None, outputs=None):
@@ -243,14 +434,82 @@ class DataSet:
     __repr__ = __str__
 
 
+# maximal number of recent frames of live streams remembered by units with many inputs, to match frames
+# which come through branches of the diagram with different latencies
+FRAME_HISTORY = 32
+
+
 class ProcessingUnit(DataSet):
     def __init__(self, element, inputs=None, parameters=None, outputs=None):
         super(ProcessingUnit, self).__init__(inputs, parameters, outputs)
         self.element = element
         self.calculated = False
+        self.being_processed = False
+        self.changes = 0                # number of changes of the inputs, to detect changes during a calculation
+        self.queued_inputs = deque()    # copies of inputs waiting for processing (see Element.STREAM_QUEUE)
+        self.frame = None               # frame number of the last calculation
+        self.frame_history = {}         # input name -> OrderedDict(frame number -> copy of the input)
+        self.history_lock = Lock()
 
     def is_being_processed(self):
-        return self.element.actual_processing_unit is self
+        return self.being_processed
+
+    def queue_inputs(self, size):
+        """Stores a copy of the actual inputs for a later calculation (the oldest copies are dropped)"""
+        inputs = {name: data.copy() for name, data in self.inputs.items()}
+        if not all(data.ready() for data in inputs.values()):
+            return
+        self.queued_inputs.append(inputs)
+        while len(self.queued_inputs) > size:
+            self.queued_inputs.popleft()
+
+    def next_inputs(self):
+        """
+        Returns a copy of the inputs to process - the oldest queued ones or the actual ones.
+        If the inputs belong to different frames of a live stream, the newest frame available
+        on all inputs is taken. None is returned if there is no such frame or it was already calculated.
+        """
+        try:
+            inputs = self.queued_inputs.popleft()
+        except IndexError:
+            inputs = {name: data.copy() for name, data in self.inputs.items()}
+        if len({data.frame for data in inputs.values() if data.frame is not None}) <= 1:
+            return inputs
+        return self.match_frames(inputs)
+
+    def remember_frames(self):
+        with self.history_lock:
+            actual = {}
+            for name, data in self.inputs.items():
+                data = data.copy()
+                if data.frame is None:
+                    continue
+                actual[name] = data.frame
+                history = self.frame_history.setdefault(name, OrderedDict())
+                if data.frame not in history:
+                    history[data.frame] = data
+            # frames older than the actual frame of the slowest input will never be matched
+            oldest = min(actual.values(), default=None)
+            for history in self.frame_history.values():
+                while history and (len(history) > FRAME_HISTORY or next(iter(history)) < oldest):
+                    history.popitem(last=False)
+
+    def match_frames(self, inputs):
+        with self.history_lock:
+            available = [set(self.frame_history.get(name, ())) | {data.frame}
+                         for name, data in inputs.items() if data.frame is not None]
+            common = set.intersection(*available)
+            if not common:
+                return None
+            frame = max(common)
+            if self.frame is not None and frame <= self.frame:
+                return None
+            return {name: data if data.frame is None or data.frame == frame else self.frame_history[name][frame]
+                    for name, data in inputs.items()}
+
+    def inputs_frame(self, inputs):
+        """Returns the frame number of the inputs (None if they are not streamed)"""
+        return max((data.frame for data in inputs.values() if data.frame is not None), default=None)
 
     def ready_to_execute(self):
         return all(d.ready() for d in self.inputs.values())
@@ -258,8 +517,15 @@ class ProcessingUnit(DataSet):
     def data_changed(self, data):
         if self.calculated:
             self.calculated = False
-            self.reset_outputs()
-        self.element.recalculate(False, False, self.is_being_processed())
+            # results of the previous frame of a live stream are kept until the next ones are ready
+            if data.frame is None:
+                # the following elements must wait for the new outputs, not calculate on the reset ones
+                self.element.invalidate()
+                self.reset_outputs()
+        self.changes += 1
+        if data.frame is not None and len(self.inputs) > 1:
+            self.remember_frames()
+        self.element.input_changed(self, data)
 
     def connect_observables(self):
         for input in self.inputs.values():
@@ -2,14 +2,16 @@ from _thread import get_ident
 
 import itertools
 
-from PyQt5.QtCore import pyqtSignal, QObject, QReadWriteLock, QTimer, pyqtSlot
-
-from ..view.styles import StyleManager
+from .qtcore import HEADLESS, pyqtSignal, QObject, QReadWriteLock, QTimer, pyqtSlot
 from .element import *
 from .errors import GeneralException
 from .serialization import ComplexJsonEncoder, ComplexJsonDecoder
+from ..core.scheduler import Scheduler
 from ..version import __version__
 
+if not HEADLESS:
+    from ..view.styles import StyleManager
+
 
 class ReadLocker:
     def __init__(self, parent):
@@ -53,6 +55,114 @@ class DiagramLock(QReadWriteLock):
         self.owner = None
 
 
+class TopologicalOrder:
+    """
+    Ranks of the elements, such that each element has a higher rank than all elements connected to its inputs.
+    A connection which agrees with the order costs O(1). Other connections are only checked for loops
+    (the elements reachable from the target are visited) and remembered - the ranks are fixed with reorder(),
+    when the order is needed, or when the remembered connections make a fraction of the graph. So building
+    a graph connection by connection costs O(V + E) in total, not O(V) per connection.
+    Until then, rank() may not agree with the remembered connections - the scheduler uses ranks only as
+    priorities of elements, which are not blocked by their predecessors anyway.
+    Removing connections and elements never breaks the order.
+    """
+
+    # the ranks are fixed for rank(), when there are more pending connections than 1/UPDATE_FRACTION of the elements
+    UPDATE_FRACTION = 4
+
+    def __init__(self, successors, predecessors):
+        self.successors = successors
+        self.predecessors = predecessors
+        self.ranks = {}
+        self.next_rank = 0
+        self.pending = []       # connections, which do not agree with the ranks yet
+        self.lock = threading.RLock()
+
+    def add(self, element):
+        with self.lock:
+            if element not in self.ranks:
+                self.ranks[element] = self.next_rank
+                self.next_rank += 1
+
+    def remove(self, element):
+        with self.lock:
+            self.ranks.pop(element, None)
+
+    def rank(self, element):
+        if self.pending and len(self.pending) * self.UPDATE_FRACTION >= len(self.ranks):
+            self._update()
+        return self.ranks.get(element, self.next_rank)
+
+    def elements(self):
+        with self.lock:
+            self._update()
+            return sorted(self.ranks, key=self.ranks.get)
+
+    def _update(self):
+        with self.lock:
+            if self.pending:
+                edges = [(e, f) for e in self.ranks for f in self.successors(e)] + self.pending
+                self.pending = []
+                self.reorder(list(self.ranks), edges)
+
+    def reorder(self, elements, edges):
+        """
+        Reassigns the ranks of the given elements, so that they agree with the edges (pairs of the elements),
+        e.g. before the connections of a loaded diagram are made. Elements in loops keep their order.
+        """
+        with self.lock:
+            elements = sorted(set(elements) & set(self.ranks), key=self.ranks.get)
+            following = {e: [] for e in elements}
+            preceding_count = {e: 0 for e in elements}
+            for source, target in edges:
+                if source in following and target in following and source is not target:
+                    following[source].append(target)
+                    preceding_count[target] += 1
+            order = [e for e in elements if not preceding_count[e]]
+            for e in order:
+                for f in following[e]:
+                    preceding_count[f] -= 1
+                    if not preceding_count[f]:
+                        order.append(f)
+            ordered = set(order)
+            order += [e for e in elements if e not in ordered]
+            for element, rank in zip(order, sorted(self.ranks[e] for e in elements)):
+                self.ranks[element] = rank
+
+    def _reaches(self, start, end, inside):
+        """Tells if end is reachable from start through elements with ranks inside the range"""
+        visited = {start}
+        stack = [start]
+        while stack:
+            for element in self.successors(stack.pop()):
+                if element is end:
+                    return True
+                if element not in visited and element in self.ranks and inside(self.ranks[element]):
+                    visited.add(element)
+                    stack.append(element)
+        return False
+
+    def add_connection(self, source, target):
+        """Updates the order for a new connection of source to target. Returns False if it would make a loop."""
+        if source is target:
+            return False
+        with self.lock:
+            self.add(source)
+            self.add(target)
+            upper = self.ranks[source]
+            if not self.pending:
+                if upper < self.ranks[target]:
+                    return True
+                # the ranks are valid - the loop could only go through elements ranked up to the source
+                inside = lambda rank: rank <= upper
+            else:
+                inside = lambda rank: True
+            if self._reaches(target, source, inside):
+                return False
+            self.pending.append((source, target))
+            return True
+
+
 class Diagram(QObject):
     """The processing diagram"""
 
@@ -66,12 +176,15 @@ class Diagram(QObject):
     # global diagram lock for connecting and disconnecting elements
     diagram_lock = DiagramLock()
 
-    def __init__(self):
+    def __init__(self, workers=None):
         super(Diagram, self).__init__()
         self.elements = set()
-        self.connections = []
+        self.connections = {}               # (output, input) -> None, in the order of connecting
+        self._connector_connections = {}    # input or output -> set of its connections
+        self._order = TopologicalOrder(self.successors, self.predecessors)
         self.painter = None
         self.zoom_level = 1.0
+        self.scheduler = Scheduler(workers, self)
 
     def clear(self):
         for e in list(self.elements):
@@ -82,11 +195,15 @@ class Diagram(QObject):
             raise GeneralException("Elements cannot be added to Diagram until the painter is set")
         e.diagram = self
         self.elements.add(e)
+        with self.diagram_lock.writer:
+            self._order.add(e)
         self.element_added.emit(e, position)
+        self.scheduler.element_added(e)
 
     def delete_element(self, e):
         # todo: if we remove element, to which other elements try to access, we gonna have trouble
         with self.diagram_lock.writer:
+            followers = self.successors(e)
             to_connect = []
             if len(e.inputs) == 1 and len(e.outputs) == 1:
                 input_ = list(e.inputs.values())[0]
@@ -105,13 +222,35 @@ class Diagram(QObject):
             self.delete_connections_with_connector(io)
         e.delete()
         self.elements.remove(e)
+        with self.diagram_lock.writer:
+            self._order.remove(e)
+        self.scheduler.graph_changed(followers)
         self.element_deleted.emit(e)
         for i, o in to_connect:
             self.connect_io(i, o)
 
     def delete_connections_with_connector(self, io):
-        for connection in [c for c in self.connections if io in c]:
-            self.connections.remove(connection)
+        for output, input_ in list(self._connector_connections.get(io, ())):
+            self._remove_connection(output, input_)
+
+    def _add_connection(self, output, input_):
+        connection = output, input_
+        if connection in self.connections:
+            return
+        self.connections[connection] = None
+        self._connector_connections.setdefault(output, set()).add(connection)
+        self._connector_connections.setdefault(input_, set()).add(connection)
+
+    def _remove_connection(self, output, input_):
+        connection = output, input_
+        if connection not in self.connections:
+            return
+        del self.connections[connection]
+        for io in connection:
+            connections = self._connector_connections[io]
+            connections.discard(connection)
+            if not connections:
+                del self._connector_connections[io]
 
     def connect_io(self, o1, o2):
         if o1 is o2: return
@@ -122,7 +261,7 @@ class Diagram(QObject):
             else:
                 input_ = o2
                 output = o1
-            if Diagram.makes_loop(output, input_):
+            if not self._order.add_connection(output.parent, input_.parent):
                 print("WARNING Connection loop: {}:{} -> {}:{}".format(output.parent.name, output.name, input_.parent.name, input_.name))
                 # raise ConnectError("This connection would create an infinite loop!")
                 return
@@ -130,7 +269,8 @@ class Diagram(QObject):
             output.connect(input_)
             if output.desequencing:
                 output.hook.actualize_outputs()
-        self.connections.append((output, input_))
+            self._add_connection(output, input_)
+        self.scheduler.graph_changed([input_.parent])
         self.connection_created.emit(output, input_)
 
     def disconnect_io(self, o1, o2):
@@ -146,31 +286,27 @@ class Diagram(QObject):
             input_.disconnect(output)
             if output.desequencing:
                 output.hook.actualize_outputs()
-        self.connections.remove((output, input_))
+            self._remove_connection(output, input_)
+        self.scheduler.graph_changed([input_.parent])
 
     def notify_disconnect(self, output, input_):
+        # connections are also removed by connectors, e.g. when an input accepting one connection is connected again
+        self._remove_connection(output, input_)
         self.connection_deleted.emit(output, input_)
 
-    @staticmethod
-    def makes_loop(output, input_):
-        # DFS
-        with Diagram.diagram_lock.writer:
-            q = [input_.parent]
-            c = set()
-            while q:
-                act = q.pop()
-                if act in c:
-                    continue
-                if act is output.parent:
-                    return True
-                c.add(act)
-                for i in list(act.outputs.values()):
-                    for o in i.connected_to:
-                        if o.parent is output.parent:
-                            return True
-                        if o.parent not in c:
-                            q.append(o.parent)
-        return False
+    def successors(self, element):
+        return [i.parent for o in list(element.outputs.values()) for i in list(o.connected_to)]
+
+    def predecessors(self, element):
+        return [o.parent for i in list(element.inputs.values()) for o in list(i.connected_from)]
+
+    def topological_order(self):
+        """Returns the elements sorted so that each element follows all elements connected to its inputs"""
+        with self.diagram_lock.reader:
+            return self._order.elements()
+
+    def topological_rank(self, element):
+        return self._order.rank(element)
 
     def set_painter(self, painter):
         self.painter = painter
@@ -230,10 +366,18 @@ class Diagram(QObject):
         filetype = "CV-Lab diagram save file. See: https://github.com/cvlab-ai/cvlab "
 
         return {"_type": "diagram", "elements": elements, "wires": wires, "params": connected_params,
-                "zoom_level": self.zoom_level, "_version": __version__, "_filetype": filetype}
+                "zoom_level": self.zoom_level, "workers": self.scheduler.requested_workers,
+                "_version": __version__, "_filetype": filetype}
 
     def from_json(self, data):
+        # elements are calculated once, when the whole diagram is loaded - not with empty inputs after each step
+        with self.scheduler.suspended():
+            self._load_json(data)
+
+    def _load_json(self, data):
         #TODO: catch json parsing errors and present proper message
+        if "workers" in data:
+            self.scheduler.set_workers(data["workers"])
         elements = {}
         sorted_orders = sorted(map(int, data["elements"]))  # sorting is important for preserving z-index
 
@@ -241,12 +385,19 @@ class Diagram(QObject):
             e = data["elements"][str(e_order)]
 
             # workaround for old versions, where hidpi was ignored in saved diagrams
-            if StyleManager.is_highdpi and data.get("_version","") < "1.2.1":
+            if not HEADLESS and StyleManager.is_highdpi and data.get("_version","") < "1.2.1":
                 e.move(e.pos().x()//2,e.pos().y()//2)
                 e.preview.preview_size //= 2
 
             self.add_element(e, (e.pos().x(), e.pos().y()))
             elements[e_order] = e
+            self.painter.loading_progress()
+
+        # the loaded elements are ranked at once, so that connecting them needs no updates of the order
+        wires = data["wires"].values()
+        with self.diagram_lock.writer:
+            self._order.reorder(elements.values(), [(elements[w["from_element"]], elements[w["to_element"]])
+                                                    for w in wires])
 
         sorted_orders = sorted(map(int, data["wires"]))     # sorting is important for preserving connections order
         for c_order in sorted_orders:
@@ -263,6 +414,7 @@ class Diagram(QObject):
             a = elements[from_e_id].outputs[from_o_id]
             b = elements[to_e_id].inputs[to_i_id]
             self.connect_io(a, b)
+            self.painter.loading_progress()
 
         if 'params' in data:
             param_ids = {}
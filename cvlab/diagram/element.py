@@ -12,6 +12,12 @@ class Element:
     name = "Unnamed element"
     comment = ""
     icon = None
+    out_of_process = False
+    stream_policy = "auto"
+    stream_queue_size = 4
+
+    # the element consumes its inputs (e.g. saves them), so they are needed even if nothing observes its outputs
+    sink = False
 
     """
     Interface for all logic and GUI diagram objects.
@@ -24,6 +30,13 @@ class Element:
     STATE_READY = 2
     STATE_ERROR = 3
 
+    # what happens when new input data (e.g. a frame of a live stream) arrive during a calculation
+    STREAM_AUTO = "auto"                # frames of live streams are pipelined (as STREAM_LATEST), other data interrupt
+    STREAM_INTERRUPT = "interrupt"      # the calculation is interrupted and restarted with the new data
+    STREAM_LATEST = "latest"            # the calculation is finished, then the latest data are processed
+    STREAM_DROP = "drop"                # the new data are ignored
+    STREAM_QUEUE = "queue"              # the data are queued (up to stream_queue_size) and processed in order
+
     def __init__(self):
         super(Element, self).__init__()
 
@@ -31,6 +44,7 @@ class Element:
         self.message = ""
         self.lock = threading.RLock()
         self.diagram = None
+        self.observed = False
         self.object_id = id_manager.next_id(self)
         self.unique_id = str(id_manager.unique_id())
 
@@ -74,6 +88,22 @@ class Element:
         """
         print("recalculate.")
 
+    def set_out_of_process(self, value):
+        self.out_of_process = value
+
+    def set_observed(self, observed):
+        """Informs that the outputs are (not) observed, e.g. in a preview - in demand-driven mode only needed elements are calculated"""
+        if observed == self.observed:
+            return
+        self.observed = observed
+        if self.diagram is not None:
+            self.diagram.scheduler.demand_changed()
+
+    def set_stream_policy(self, policy, queue_size=None):
+        self.stream_policy = policy
+        if queue_size is not None:
+            self.stream_queue_size = queue_size
+
     def delete(self):
         pass
 
@@ -108,17 +138,28 @@ class Element:
         self.notify_state_changed()
 
     def to_json(self):
-        return {
+        data = {
             "_type": "element",
             "class": self.__class__.__name__,
             "module": self.__module__,
             "parameters": self.parameters,
             "unique_id": self.unique_id
         }
+        if self.out_of_process:
+            data["out_of_process"] = True
+        if self.stream_policy != Element.stream_policy:
+            data["stream_policy"] = self.stream_policy
+            if self.stream_policy == self.STREAM_QUEUE:
+                data["stream_queue_size"] = self.stream_queue_size
+        return data
 
     def from_json(self, data):
         if "unique_id" in data:
             self.unique_id = data["unique_id"]
+        if data.get("out_of_process"):
+            self.set_out_of_process(True)
+        if "stream_policy" in data:
+            self.set_stream_policy(data["stream_policy"], data.get("stream_queue_size"))
         for param, value in data["parameters"].items():
             if param in self.parameters:
                 self.parameters[param].from_json(value)
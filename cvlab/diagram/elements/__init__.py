@@ -5,6 +5,8 @@ from collections import defaultdict
 
 import re
 
+from ..errors import ElementNotFoundError
+
 ignored_modules = ["sample", "testing"]
 
 
@@ -46,7 +48,7 @@ def get_element_fallback(name):
         if element.__name__ == class_name:
             print("WARN: Loading fallback element. Requested name: {name}. Returned class: {element}".format(**locals()))
             return element
-    raise Exception("Cannot find element " + name)
+    raise ElementNotFoundError("Cannot find element " + name)
 
 
 def get_element(name):
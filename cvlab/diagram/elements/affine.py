@@ -4,6 +4,8 @@ from .base import *
 class Rotate(NormalElement):
     name = "Rotate"
     comment = "Rotates using multiple 90"
+    parallel_units = True
+    cacheable = True
 
     def get_attributes(self):
         return [Input("input")], \
@@ -3,9 +3,14 @@ from subprocess import check_call
 from tempfile import mkstemp, mkdtemp
 
 import cv2 as cv
+import numpy as np
 
 from ...core.threaded_element import ThreadedElement
-from ...view.elements import *
+from ..qtcore import HEADLESS
+if HEADLESS:
+    from ...view.headless_elements import *
+else:
+    from ...view.elements import *
 from ... import CVLAB_DIR
 from ..data import *
 from ..connectors import *
@@ -24,6 +29,45 @@ cvtypes = {
 }
 
 
+def lookup_levels(image, function):
+    """
+    Applies an element-wise function to an 8-bit image through a lookup table.
+    The function gets all 256 levels (an array of shape 1x256xCHANNELS) and returns their new values.
+    """
+    channels = image.shape[2] if image.ndim == 3 else 1
+    levels = np.repeat(np.arange(256, dtype=np.uint8), channels).reshape(1, 256, channels)
+    return cv.LUT(image, function(levels))
+
+
+def gaussian_kernel_radius(ksize, sigmaX, sigmaY=0):
+    """
+    Returns the radius of the kernel of cv.GaussianBlur. Sizes equal to 0 are computed from the sigmas,
+    as for images of floats (kernels of 8-bit images are smaller).
+    """
+    sigmas = sigmaX, sigmaY or sigmaX
+    return max(size // 2 if size > 0 else (int(round(sigma * 4 * 2 + 1)) | 1) // 2
+               for size, sigma in zip(ksize, sigmas))
+
+
+def scale_pixel_parameters(parameters, scale, kernels=(), sizes=(), lengths=()):
+    """
+    Scales the parameters in pixels for images scaled by 'scale' (see CoreElement.scale_parameters):
+    odd kernel sizes, other sizes (at least 1) and lengths (e.g. sigmas). Sizes may be tuples, 0 stays 0 (automatic).
+    """
+    def scaled(value, function):
+        if isinstance(value, tuple):
+            return tuple(scaled(v, function) for v in value)
+        return function(value) if value else value
+
+    for name in kernels:
+        parameters[name] = scaled(parameters[name], lambda size: max(1, int(round((size - 1) * scale / 2)) * 2 + 1))
+    for name in sizes:
+        parameters[name] = scaled(parameters[name], lambda size: max(1, int(round(size * scale))))
+    for name in lengths:
+        parameters[name] = scaled(parameters[name], lambda length: length * scale)
+    return parameters
+
+
 class NormalElement(FunctionGuiElement, ThreadedElement):
     pass
 
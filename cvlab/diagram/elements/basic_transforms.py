@@ -4,6 +4,8 @@ from .base import *
 class Resizer(NormalElement):
     name = "Resize"
     comment = "Resizes its inputs"
+    parallel_units = True
+    cacheable = True
 
     def get_attributes(self):
         return [Input("input")], \
@@ -17,6 +19,8 @@ class Resizer(NormalElement):
 class AutoResizer(NormalElement):
     name = "Automatic resizer"
     comment = "Resizes its inputs to match first input's size"
+    parallel_units = True
+    cacheable = True
 
     def get_attributes(self):
         return [Input("main"), Input("others", multiple=True)], \
@@ -33,6 +37,8 @@ class AutoResizer(NormalElement):
 class Cropper(NormalElement):
     name = "Cropper"
     comment = "Crops the image"
+    parallel_units = True
+    cacheable = True
 
     def get_attributes(self):
         return [Input("input")], \
@@ -55,6 +61,8 @@ class Cropper(NormalElement):
 class AutoCrop(NormalElement):
     name = "Auto cropper"
     comment = "Automatically removes borders from image"
+    parallel_units = True
+    cacheable = True
 
     def get_attributes(self):
         return [Input("input")], \
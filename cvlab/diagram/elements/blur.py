@@ -1,15 +1,25 @@
 from .base import *
+from ..chunked_array import ChunkedArray
 
 
 class OpenCVBlur(NormalElement):
     name = "Blur transform"
     comment = "Simple blurring of the image"
+    tileable = True
+    parallel_units = True
+    cacheable = True
 
     def get_attributes(self):
         return [Input("input")], \
                [Output("output")], \
                [IntParameter("ratio", "Blur ratio", min_=1, max_=255)]
 
+    def tile_halo(self, parameters):
+        return parameters["ratio"] // 2
+
+    def scale_parameters(self, parameters, scale):
+        return scale_pixel_parameters(parameters, scale, sizes=["ratio"])
+
     def process_inputs(self, inputs, outputs, parameters):
         ratio = parameters["ratio"]
         outputs["output"] = Data(cv.blur(inputs["input"].value, (ratio, ratio)))
@@ -19,6 +29,8 @@ class OpenCVBlur(NormalElement):
 class GaussianBlur3D(NormalElement):
     name = 'Gaussian blur 3D'
     comment = 'Gaussian blur for 3D data'
+    parallel_units = True
+    cacheable = True
 
     def get_attributes(self):
         return [Input('src', 'src')], \
@@ -30,13 +42,28 @@ class GaussianBlur3D(NormalElement):
                 IntParameter('borderType', 'borderType')]
 
     def process_inputs(self, inputs, outputs, parameters):
-        image = inputs['src'].value.copy()
+        src = inputs['src'].value
         kernel = parameters['kernel']
         sigmaX = parameters['sigmaX']
         sigmaY = parameters['sigmaY']
         sigmaZ = parameters['sigmaZ']
         borderType = parameters['borderType']
 
+        if isinstance(src, ChunkedArray):
+            # volumes bigger than the memory are processed slice by slice, into chunked files
+            image = ChunkedArray.temporary(src.shape, src.dtype, src.chunk)
+            for z in range(len(src)):
+                self.may_interrupt()
+                image[z] = cv.GaussianBlur(src[z], (kernel, kernel), sigmaX, None, sigmaY, borderType)
+            for y in range(image.shape[1]):
+                self.may_interrupt()
+                image[:, y] = cv.GaussianBlur(image[:, y], (1, kernel), 0, None, sigmaZ, borderType)
+            image.flush()
+            outputs['dst'] = Data(image)
+            return
+
+        image = np.array(src)
+
         for z in image:
             self.may_interrupt()
             cv.GaussianBlur(z, (kernel, kernel), sigmaX, z, sigmaY, borderType)
@@ -4,6 +4,7 @@ from .base import *
 class CodeElement(NormalElement):
     name = "Code element"
     comment = "Runs user-given Python code"
+    out_of_process_supported = True
 
     def __init__(self):
         super(CodeElement, self).__init__()
@@ -135,6 +136,7 @@ def {name}(inputs, outputs, parameters):
 class CodeElementSequence(CodeElementEx, SequenceToSequenceElement):
     name = "Code element (sequence output)"
     num_outputs = 8
+    out_of_process_supported = False    # the number of outputs is changed in process_inputs
 
     def get_attributes(self):
         return [Input("inputs", multiple=True)], \
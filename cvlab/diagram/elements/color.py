@@ -4,6 +4,9 @@ from .base import *
 class ColorNormalizer(NormalElement):
     name = "Color normalizer"
     comment = "Normalizes each color by given mean and standard deviation"
+    vectorized_channels = True
+    parallel_units = True
+    cacheable = True
 
     def get_attributes(self):
         return [Input("input")], \
@@ -16,17 +19,26 @@ class ColorNormalizer(NormalElement):
         outmean = parameters["mean"]
         outstddev = parameters["std dev"]
 
-        mean, stddev = cv.meanStdDev(image)
-        if stddev == 0: stddev = 1
+        mean, stddev = cv.meanStdDev(image)     # one value per channel
+        mean = mean.ravel()
+        stddev = stddev.ravel()
+        stddev[stddev == 0] = 1
 
-        output = (image.astype(np.float32) - mean) * (outstddev/stddev) + outmean
+        def normalize(image):
+            output = (image.astype(np.float32) - mean) * (outstddev/stddev) + outmean
+            return np.clip(output, 0, 255).astype(image.dtype)
 
-        outputs["output"] = Data(np.clip(output, 0, 255).astype(image.dtype))
+        if image.dtype == np.uint8:
+            outputs["output"] = Data(lookup_levels(image, normalize))
+        else:
+            outputs["output"] = Data(normalize(image))
 
 
 class OpenCVInRange(NormalElement):
     name = "InRange"
     comment = "Inrange"
+    parallel_units = True
+    cacheable = True
 
     def get_attributes(self):
         return [Input("input")], \
@@ -48,6 +60,8 @@ class OpenCVInRange(NormalElement):
 class OpenCVInRange3D(NormalElement):
     name = "InRange3D"
     comment = "Inrange"
+    parallel_units = True
+    cacheable = True
 
     def get_attributes(self):
         return [Input("input")], \
@@ -77,6 +91,9 @@ class OpenCVInRange3D(NormalElement):
 class ContrastChange(NormalElement):
     name = "Contrast change"
     comment = "Changes contrast of the image"
+    vectorized_channels = True
+    parallel_units = True
+    cacheable = True
 
     def get_attributes(self):
         return [Input("input")], \
@@ -87,10 +104,15 @@ class ContrastChange(NormalElement):
         image = inputs["input"].value
 
         avg = cv.mean(image)
-        output = cv.add(cv.subtract(np.float64(image), avg) * parameters["factor"], avg)
-        output = cv.add(np.zeros(output.shape, image.dtype), output, dtype=cvtypes[image.dtype.name])
 
-        outputs["output"] = Data(output)
+        def change_contrast(image):
+            output = cv.add(cv.subtract(np.float64(image), avg) * parameters["factor"], avg)
+            return cv.add(np.zeros(output.shape, image.dtype), output, dtype=cvtypes[image.dtype.name])
+
+        if image.dtype == np.uint8:
+            outputs["output"] = Data(lookup_levels(image, change_contrast))
+        else:
+            outputs["output"] = Data(change_contrast(image))
 
 
 register_elements_auto(__name__, locals(), "Color", 4)
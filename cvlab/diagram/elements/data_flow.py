@@ -100,6 +100,7 @@ class Zip(NormalElement):
 class SequenceSelector(NormalElement):
     name = "Sequence selector"
     comment = "Selects a simple image from a sequence"
+    parallel_units = True
 
     def get_attributes(self):
         return [Input("input")], \
@@ -124,6 +125,7 @@ class SequenceSelector(NormalElement):
 class SequenceDeleter(NormalElement):
     name = "Sequence deleter"
     comment = "Deletes a simple image from a sequence"
+    parallel_units = True
 
     def get_attributes(self):
         return [Input("input")], \
@@ -152,6 +154,7 @@ class SequenceDeleter(NormalElement):
 class ConcatenateOperator(MultiInputOneOutputElement):
     name = "Concatenate operator"
     comment = "Concatenates input arrays"
+    parallel_units = True
     package = "Matrix miscellaneous"
 
     def process_inputs(self, inputs, outputs, parameters):
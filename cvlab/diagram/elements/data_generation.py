@@ -1,9 +1,10 @@
 import itertools
 
-from PyQt5.QtCore import Qt
-
 from .base import *
 
+if not HEADLESS:
+    from PyQt5.QtCore import Qt
+
 
 class MatrixGenerator(InputElement):
     name = "Matrix generator"
@@ -39,94 +40,96 @@ class MatrixGenerator(InputElement):
         outputs["output"] = Data(output)
 
 
-class MatrixEditor(InputElement):
-    name = "Matrix editor"
-    comment = "Allows to create a matrix pixel by pixel"
-
-    def __init__(self):
-        super(MatrixEditor, self).__init__()
-        self.last_parameters = {}
-        self.edit_widget = QWidget()
-        self.matrix = None
-        self.layout().addWidget(self.edit_widget)
-        self.edit_widget.setLayout(QGridLayout())
-
-    def get_attributes(self):
-        return [], [Output("output")], [
-            ComboboxParameter("type", {"8-bit unsigned":np.uint8, "8-bit signed":np.int8, "32-bit float": np.float32}),
-            SizeParameter("size"),
-            FloatParameter("step", value=1)]
-
-    def process_inputs(self, inputs, outputs, parameters):
-        if parameters != self.last_parameters:
-            self.last_parameters = parameters.copy()
-            self.recreate_editor()
-        outputs["output"] = Data(self.matrix+0)
-
-    class Button(QLabel):
-        pixel_size = (64, 64)
-
-        def __init__(self, element, x, y, step):
-            QLabel.__init__(self)
-            self.element = element
-            self.matrix_x = x
-            self.matrix_y = y
-            self.step = step
-            self.setFixedSize(self.pixel_size[0], self.pixel_size[1])
-            self.setAlignment(Qt.AlignCenter | Qt.AlignVCenter)
-
-        def mousePressEvent(self, event):
-            if event.button() == Qt.LeftButton:
-                delta = self.step
-            elif event.button() == Qt.RightButton:
-                delta = -self.step
-            else:
-                event.ignore()
-                return
-            event.accept()
-            self.add_value(delta)
-
-        def mouseReleaseEvent(self, event):
-            if event.button() in (Qt.LeftButton, Qt.RightButton):
+# matrix editors are interactive widgets, so they are not available in headless mode
+if not HEADLESS:
+    class MatrixEditor(InputElement):
+        name = "Matrix editor"
+        comment = "Allows to create a matrix pixel by pixel"
+
+        def __init__(self):
+            super(MatrixEditor, self).__init__()
+            self.last_parameters = {}
+            self.edit_widget = QWidget()
+            self.matrix = None
+            self.layout().addWidget(self.edit_widget)
+            self.edit_widget.setLayout(QGridLayout())
+
+        def get_attributes(self):
+            return [], [Output("output")], [
+                ComboboxParameter("type", {"8-bit unsigned":np.uint8, "8-bit signed":np.int8, "32-bit float": np.float32}),
+                SizeParameter("size"),
+                FloatParameter("step", value=1)]
+
+        def process_inputs(self, inputs, outputs, parameters):
+            if parameters != self.last_parameters:
+                self.last_parameters = parameters.copy()
+                self.recreate_editor()
+            outputs["output"] = Data(self.matrix+0)
+
+        class Button(QLabel):
+            pixel_size = (64, 64)
+
+            def __init__(self, element, x, y, step):
+                QLabel.__init__(self)
+                self.element = element
+                self.matrix_x = x
+                self.matrix_y = y
+                self.step = step
+                self.setFixedSize(self.pixel_size[0], self.pixel_size[1])
+                self.setAlignment(Qt.AlignCenter | Qt.AlignVCenter)
+
+            def mousePressEvent(self, event):
+                if event.button() == Qt.LeftButton:
+                    delta = self.step
+                elif event.button() == Qt.RightButton:
+                    delta = -self.step
+                else:
+                    event.ignore()
+                    return
                 event.accept()
-            else:
-                event.ignore()
-
-        def wheelEvent(self, event):
-            event.accept()
-            delta = self.step if event.angleDelta().y() > 0 else -self.step
-            self.add_value(delta)
-
-        def add_value(self, delta):
-            self.element.matrix[self.matrix_y,self.matrix_x] += delta
-            self.setText(str(self.element.matrix[self.matrix_y,self.matrix_x]))
-            self.element.recalculate(False, False, False, force_units_recalc=True)
-
-
-    def recreate_editor(self):
-        QWidget().setLayout(self.edit_widget.layout())
-        layout = QGridLayout()
-        self.edit_widget.setLayout(layout)
-        w, h = self.last_parameters["size"]
-        dtype = self.last_parameters["type"]
-        step = self.last_parameters["step"]
-        self.matrix = np.zeros((h, w), dtype=dtype)
-        layout.setSpacing(0)
-        for x, y in itertools.product(range(w), range(h)):
-            pixel = self.Button(self, x, y, step)
-            pixel.setText("0")
-            layout.addWidget(pixel, y, x)
-
-
-class MatrixEditor2(InputGuiElement, ThreadedElement):
-    name = "Matrix editor 2"
-    comment = "Allows to create a matrix pixel by pixel"
+                self.add_value(delta)
 
-    def get_attributes(self):
-        return [], [Output("output")], [MatrixParameter("matrix")]
+            def mouseReleaseEvent(self, event):
+                if event.button() in (Qt.LeftButton, Qt.RightButton):
+                    event.accept()
+                else:
+                    event.ignore()
 
-    def process_inputs(self, inputs, outputs, parameters):
-        outputs["output"] = Data(parameters["matrix"])
+            def wheelEvent(self, event):
+                event.accept()
+                delta = self.step if event.angleDelta().y() > 0 else -self.step
+                self.add_value(delta)
+
+            def add_value(self, delta):
+                self.element.matrix[self.matrix_y,self.matrix_x] += delta
+                self.setText(str(self.element.matrix[self.matrix_y,self.matrix_x]))
+                self.element.recalculate(False, False, False, force_units_recalc=True)
+
+
+        def recreate_editor(self):
+            QWidget().setLayout(self.edit_widget.layout())
+            layout = QGridLayout()
+            self.edit_widget.setLayout(layout)
+            w, h = self.last_parameters["size"]
+            dtype = self.last_parameters["type"]
+            step = self.last_parameters["step"]
+            self.matrix = np.zeros((h, w), dtype=dtype)
+            layout.setSpacing(0)
+            for x, y in itertools.product(range(w), range(h)):
+                pixel = self.Button(self, x, y, step)
+                pixel.setText("0")
+                layout.addWidget(pixel, y, x)
+
+
+    class MatrixEditor2(InputGuiElement, ThreadedElement):
+        name = "Matrix editor 2"
+        comment = "Allows to create a matrix pixel by pixel"
+
+        def get_attributes(self):
+            return [], [Output("output")], [MatrixParameter("matrix")]
+
+        def process_inputs(self, inputs, outputs, parameters):
+            outputs["output"] = Data(parameters["matrix"])
 
 
 class OpenCVGetStructuringElement(InputElement):
@@ -4,6 +4,8 @@ from .base import *
 class ColorConverter(NormalElement):
     name = "Color converter"
     comment = "Converts image to another color space"
+    parallel_units = True
+    cacheable = True
     package = "Color"
 
     def get_attributes(self):
@@ -31,6 +33,8 @@ class ColorConverter(NormalElement):
 class TypeConverter(NormalElement):
     name = "Type converter"
     comment = "Converts contents of the image to another internal data type"
+    parallel_units = True
+    cacheable = True
     package = "Type conversion"
 
     def get_attributes(self):
@@ -58,6 +62,8 @@ class TypeConverter(NormalElement):
 class ChannelSplitter(NormalElement):
     name = "Channel splitter"
     comment = "Splits the image into channels"
+    parallel_units = True
+    cacheable = True
     package = "Channels"
 
     def get_attributes(self):
@@ -74,6 +80,8 @@ class ChannelSplitter(NormalElement):
 class ChannelMerger(NormalElement):
     name = "Channel merger"
     comment = "Merges the channels into an image"
+    parallel_units = True
+    cacheable = True
     package = "Channels"
 
     def get_attributes(self):
@@ -94,6 +102,8 @@ class ChannelMerger(NormalElement):
 class ColorspaceExtractor(NormalElement):
     name = "Color space extractor"
     comment = "Splits the image into RGB and HSV"
+    parallel_units = True
+    cacheable = True
     package = "Color"
 
     def get_attributes(self):
@@ -4,6 +4,8 @@ from .base import *
 class OpenCVCanny(NormalElement):
     name = "Canny transform"
     comment = "Canny edge detector"
+    parallel_units = True
+    cacheable = True
 
     def get_attributes(self):
         return [Input("input")], \
@@ -4,6 +4,9 @@ from .base import *
 class OpenCVMorphologyEx(NormalElement):
     name = "Morphological transform"
     comment = "Advanced morphological transform"
+    tileable = True
+    parallel_units = True
+    cacheable = True
 
     def get_attributes(self):
         return [Input("input")], \
@@ -25,6 +28,13 @@ class OpenCVMorphologyEx(NormalElement):
                     IntParameter("iterations", "Number of iterations", 1, min_=0, max_=255)
                ]
 
+    def tile_halo(self, parameters):
+        # opening and closing apply the structuring element twice
+        return 2 * (parameters["element size"] // 2) * parameters["iterations"]
+
+    def scale_parameters(self, parameters, scale):
+        return scale_pixel_parameters(parameters, scale, kernels=["element size"])
+
     def process_inputs(self, inputs, outputs, parameters):
         image = np.copy(inputs["input"].value)
         operation = parameters["operation"]
@@ -40,6 +50,9 @@ class OpenCVMorphologyEx(NormalElement):
 class OpenCVDilate(NormalElement):
     name = "Dilate"
     comment = "Dilation morphological transform"
+    tileable = True
+    parallel_units = True
+    cacheable = True
 
     def get_attributes(self):
         return [Input("input")], \
@@ -54,6 +67,12 @@ class OpenCVDilate(NormalElement):
                     IntParameter("iterations", "Number of iterations", 1, min_=0, max_=255)
                ]
 
+    def tile_halo(self, parameters):
+        return parameters["element size"] // 2 * parameters["iterations"]
+
+    def scale_parameters(self, parameters, scale):
+        return scale_pixel_parameters(parameters, scale, kernels=["element size"])
+
     def process_inputs(self, inputs, outputs, parameters):
         image = np.copy(inputs["input"].value)
         element_type = parameters["element type"]
@@ -68,6 +87,9 @@ class OpenCVDilate(NormalElement):
 class OpenCVErode(NormalElement):
     name = "Erode"
     comment = "Erosion morphological transform"
+    tileable = True
+    parallel_units = True
+    cacheable = True
 
     def get_attributes(self):
         return [Input("input")], \
@@ -82,6 +104,12 @@ class OpenCVErode(NormalElement):
                     IntParameter("iterations", "Number of iterations", 1, min_=0, max_=255)
                ]
 
+    def tile_halo(self, parameters):
+        return parameters["element size"] // 2 * parameters["iterations"]
+
+    def scale_parameters(self, parameters, scale):
+        return scale_pixel_parameters(parameters, scale, kernels=["element size"])
+
     def process_inputs(self, inputs, outputs, parameters):
         image = np.copy(inputs["input"].value)
         element_type = parameters["element type"]
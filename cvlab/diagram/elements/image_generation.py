@@ -6,13 +6,19 @@ from .base import *
 class InPaint(NormalElement):
     name = "Inpaint"
     comment = "Inpaint"
+    parallel_units = True
+    cacheable = True
     package = "Photo"
+    vectorized_channels = True    # cv.inpaint processes color images, the mask is common for all channels
 
     def get_attributes(self):
         return [Input("input"), Input("mask")], \
                [Output("output")], \
                [IntParameter("radius", value=3, min_=1, max_=100), IntParameter("flags")]
 
+    def scale_parameters(self, parameters, scale):
+        return scale_pixel_parameters(parameters, scale, sizes=["radius"])
+
     def process_channels(self, inputs, outputs, parameters):
         output = cv.inpaint(inputs["input"].value, inputs["mask"].value, parameters["radius"], parameters["flags"])
         outputs["output"] = Data(output)
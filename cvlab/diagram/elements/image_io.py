@@ -1,4 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
+
 from .base import *
+from ..chunked_array import ChunkedArray, save_npy
+
+
+# arrays are saved by a background thread, in order of saving, so that big arrays do not block the diagram
+_array_writer = ThreadPoolExecutor(1, "CV Lab array writer")
 
 
 class ImageLoader(InputElement):
@@ -23,37 +30,42 @@ class ImageSequenceLoader(InputElement):
         return [], [Output("output", "Sequence")], [MultiPathParameter("paths", value=[CVLAB_DIR+"/images/lena.jpg"])]
 
     def process(self):
+        # images are read when they are processed, so the sequence may be much bigger than the memory
         paths = self.parameters["paths"].get()
-        images = len(paths)
-        sequence = Sequence([Data() for _ in range(images)])
+        sequence = ImageSequence([FileValue(path, cv.imread) if cv.haveImageReader(path) else None for path in paths])
         self.outputs["output"].put(sequence)
-        for path, data in zip(paths, sequence):
-            self.may_interrupt()
-            image = cv.imread(path)
-            if image is not None:
-                data.value = image
 
 
 class ImageLoader3D(InputElement):
     name = "Image loader 3D"
     comment = "Loads multiple images as 3D image"
+    disk_cacheable = True
 
     def get_attributes(self):
-        return [], [Output("output")], [MultiPathParameter("paths", value=[CVLAB_DIR+"/images/lena.jpg"]*10)]
+        return [], [Output("output")], [MultiPathParameter("paths", value=[CVLAB_DIR+"/images/lena.jpg"]*10),
+                                        ComboboxParameter("storage", [("Memory", 0), ("Chunked files (big volumes)", 1)])]
 
     def process_inputs(self, inputs, outputs, parameters):
-        paths = parameters["paths"]
-        image = []
+        paths = sorted(parameters["paths"])
+        image = None
 
-        for path in sorted(paths):
+        for index, path in enumerate(paths):
             slice = cv.imread(path)
             self.may_interrupt()
-            image.append(slice)
-            if slice.shape != image[0].shape:
+            if slice is None:
+                raise ProcessingError("Cannot read image '{}'".format(path))
+            if image is None:
+                shape = (len(paths),) + slice.shape
+                if parameters["storage"]:
+                    image = ChunkedArray.temporary(shape, slice.dtype)
+                else:
+                    image = np.empty(shape, slice.dtype)
+            if slice.shape != image.shape[1:]:
                 raise Exception("Inconsisten slice dimensions")
+            image[index] = slice
 
-        image = np.array(image)
-        outputs["output"] = Data(image)
+        if image is not None:
+            outputs["output"] = Data(image)
 
 
 class RecurrentSequenceLoader(InputElement):
@@ -71,23 +83,23 @@ class RecurrentSequenceLoader(InputElement):
 
     def read_directory(self, directory):
         self.level += 1
-        sequence = Sequence()
+        items = []
         for entry in os.listdir(directory):
             try:
                 if not entry or entry[0] == '.': continue
                 path = directory + "/" + entry
                 if os.path.isdir(path):
                     if self.level >= self.max_level: continue
-                    sequence.value.append(self.read_directory(path))
-                else:
-                    image = cv.imread(path)
-                    if image is not None and image.shape:
-                        data = ImageData(image)
-                        sequence.value.append(data)
+                    items.append(self.read_directory(path))
+                elif cv.haveImageReader(path):
+                    items.append(FileValue(path, cv.imread))
             except Exception:
                 pass
         self.level -= 1
-        return sequence
+        # directories with images only become compact, flat sequences
+        if not any(isinstance(item, Data) for item in items):
+            return ImageSequence(items)
+        return Sequence([item if isinstance(item, Data) else ImageData(item) for item in items])
 
     def process(self):
         self.level = 0
@@ -99,6 +111,7 @@ class RecurrentSequenceLoader(InputElement):
 class ImageSaver(NormalElement):
     name = "Image saver"
     comment = "Saves actual image (optionally makes a sequence from them)"
+    sink = True
 
     def get_attributes(self):
         return [Input("input")], [], [SavePathParameter("path", value="")]
@@ -112,10 +125,13 @@ class ArrayLoader(InputElement):
     comment = "Loads numpy array from disk"
 
     def get_attributes(self):
-        return [], [Output("output")], [PathParameter("path", value=CVLAB_DIR+"/images/default.npy")]
+        return [], [Output("output")], [PathParameter("path", value=CVLAB_DIR+"/images/default.npy"),
+                                        ComboboxParameter("mode", [("Load to memory", ""),
+                                                                   ("Memory-mapped (read only)", "r")])]
 
     def process_inputs(self, inputs, outputs, parameters):
-        d = np.load(parameters["path"])
+        # memory-mapped arrays are read from the file when they are used, so loading takes constant time
+        d = np.load(parameters["path"], mmap_mode=parameters["mode"] or None)
         if d is not None:
             self.may_interrupt()
             outputs["output"] = Data(d)
@@ -124,12 +140,50 @@ class ArrayLoader(InputElement):
 class ArraySaver(NormalElement):
     name = "Array saver"
     comment = "Saves numpy array to disk"
+    sink = True
+
+    def __init__(self):
+        super(ArraySaver, self).__init__()
+        self.saving = None
 
     def get_attributes(self):
         return [Input("input")], [], [SavePathParameter("path", value="")]
 
     def process_inputs(self, inputs, outputs, parameters):
-        np.save(parameters["path"], inputs["input"].value)
+        if self.saving is not None:
+            self.saving.cancel()
+        self.saving = _array_writer.submit(self.save, parameters["path"], inputs["input"].value)
+
+    def save(self, path, array):
+        try:
+            save_npy(path, array)
+        except Exception as e:
+            print("WARNING: Cannot save array to '{}': {}".format(path, e))
+
+
+class ChunkedArrayLoader(InputElement):
+    name = "Chunked array loader"
+    comment = "Loads big array (e.g. 3D image) from a directory of chunks, which are read when they are used"
+
+    def get_attributes(self):
+        return [], [Output("output")], [DirectoryParameter("path", "directory", value="")]
+
+    def process_inputs(self, inputs, outputs, parameters):
+        outputs["output"] = Data(ChunkedArray(parameters["path"]))
+
+
+class ChunkedArraySaver(ArraySaver):
+    name = "Chunked array saver"
+    comment = "Saves big array (e.g. 3D image) to a directory of chunks"
+
+    def get_attributes(self):
+        return [Input("input")], [], [DirectoryParameter("path", "directory", value="")]
+
+    def save(self, path, array):
+        try:
+            ChunkedArray.save(path, array)
+        except Exception as e:
+            print("WARNING: Cannot save array to '{}': {}".format(path, e))
 
 
 register_elements_auto(__name__, locals(), "Image IO", 2)
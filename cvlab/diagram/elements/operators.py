@@ -6,6 +6,8 @@ from .base import *
 class PlusOperator(MultiInputOneOutputElement):
     name = "Plus operator"
     comment = "Adds all input images"
+    parallel_units = True
+    cacheable = True
 
     def process_inputs(self, inputs, outputs, parameters):
         output = Data()
@@ -21,6 +23,8 @@ class PlusOperator(MultiInputOneOutputElement):
 class MinusOperator(NormalElement):
     name = "Minus operator"
     comment = "Subtracts second from first image"
+    parallel_units = True
+    cacheable = True
 
     def get_attributes(self):
         return [Input("from"), Input("what")], [Output("output")], []
@@ -32,6 +36,8 @@ class MinusOperator(NormalElement):
 class AbsDiffOperator(NormalElement):
     name = "Difference operator"
     comment = "Calculates absolute difference between images"
+    parallel_units = True
+    cacheable = True
 
     def get_attributes(self):
         return [Input("1", "Input 1"), Input("2", "Input 2")], [Output("output")], []
@@ -43,6 +49,8 @@ class AbsDiffOperator(NormalElement):
 class AverageOperator(MultiInputOneOutputElement):
     name = "Average operator"
     comment = "Averages all input images"
+    parallel_units = True
+    cacheable = True
 
     def process_inputs(self, inputs, outputs, parameters):
         temp = None
@@ -57,6 +65,8 @@ class AverageOperator(MultiInputOneOutputElement):
 class MaxOperator(MultiInputOneOutputElement):
     name = "Maximum operator"
     comment = "Output image contains maximum pixel values"
+    parallel_units = True
+    cacheable = True
 
     def process_inputs(self, inputs, outputs, parameters):
         temp = None
@@ -71,6 +81,8 @@ class MaxOperator(MultiInputOneOutputElement):
 class MinOperator(MultiInputOneOutputElement):
     name = "Minimum operator"
     comment = "Output image contains minimum pixel values"
+    parallel_units = True
+    cacheable = True
 
     def process_inputs(self, inputs, outputs, parameters):
         temp = None
@@ -85,6 +97,8 @@ class MinOperator(MultiInputOneOutputElement):
 class InvertOperator(NormalElement):
     name = "Invertion operator"
     comment = "Inverts pixel values"
+    parallel_units = True
+    cacheable = True
 
     def get_attributes(self):
         return [Input("input")], [Output("output")], []
@@ -96,6 +110,8 @@ class InvertOperator(NormalElement):
 class ScalarMultiplyOperator(NormalElement):
     name = "Scalar multiply"
     comment = "Multiplies matrice by scalar"
+    parallel_units = True
+    cacheable = True
 
     def get_attributes(self):
         return [Input("input")], [Output("output")], [FloatParameter("factor", min_=0, max_=10)]
@@ -113,6 +129,8 @@ class ScalarMultiplyOperator(NormalElement):
 class ScalarAddOperator(NormalElement):
     name = "Scalar add"
     comment = "Adds constant value to each matrix element"
+    parallel_units = True
+    cacheable = True
 
     def get_attributes(self):
         return [Input("input")], [Output("output")], [FloatParameter("value", min_=-255, max_=255)]
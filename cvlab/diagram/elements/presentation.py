@@ -1,13 +1,11 @@
-from matplotlib.figure import Figure
-from mpl_toolkits.mplot3d import Axes3D
-from matplotlib.backends.backend_qt4agg import FigureCanvasQTAgg
-
 from .base import *
 
 
 class ImagePreview(NormalElement):
     name = "Image preview"
     comment = "Shows an image using selected presentation method"
+    parallel_units = True
+    cacheable = True
 
     def get_attributes(self):
         return [Input("input")], \
@@ -94,6 +92,10 @@ class Plot3d(NormalElement):
 
     def __init__(self):
         super(Plot3d, self).__init__()
+        # matplotlib is imported here, so that it is not loaded by diagrams which do not use plots
+        from matplotlib.figure import Figure
+        from mpl_toolkits.mplot3d import Axes3D
+        from matplotlib.backends.backend_qt4agg import FigureCanvasQTAgg
         self.figure = Figure(figsize=(4, 4), dpi=90, facecolor=(1, 1, 1), edgecolor=(0, 0, 0))
         self.axes = self.figure.add_subplot(111, projection='3d')
         # self.axes.hold(False)
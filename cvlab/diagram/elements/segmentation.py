@@ -4,6 +4,9 @@ from .base import *
 class GrabCut(NormalElement):
     name = "GrabCut"
     comment = "Foreground Extraction using GrabCut Algorithm"
+    disk_cacheable = True
+    parallel_units = True
+    cacheable = True
 
     def get_attributes(self):
         return [Input("image"), Input("classes")], \
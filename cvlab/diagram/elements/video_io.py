@@ -11,12 +11,15 @@ class Camera(InputElement):
     comment = "Reads real-time video from physical camera device"
     device_lock = Lock()
     repeat_after_end = False
+    dedicated_thread = True
 
     def __init__(self):
         super(Camera, self).__init__()
         self.capture = None
         self.actual_parameters = {"device": None, "width": 0, "height": 0, "fps": 0}
         self.last_frame_time = datetime.now()
+        self.skipped_frames = 0
+        self.frame_number = 0
         self.play = Event()  # todo: we should load this state from some parameter
         self.play.set()
         self.recalculate(True, True, True)
@@ -93,14 +96,23 @@ class Camera(InputElement):
                     self.may_interrupt()
             self.last_frame_time = datetime.now()
             self.may_interrupt()
+            if self.outputs_congested():
+                # the frame would be dropped by the next elements - it is grabbed (so that the device
+                # does not buffer old frames), but neither decoded nor sent
+                if not self.capture.grab() and self.repeat_after_end:
+                    self.capture.set(1, 0)
+                self.skipped_frames += 1
+                self.play.wait()
+                continue
             self.set_state(Element.STATE_BUSY)
             retval, image = self.capture.read()
             self.may_interrupt()
             if image is not None and len(image) > 0:
                 if parameters["width"] and parameters["height"] and (image.shape[0] != parameters["height"] or image.shape[1] != parameters["width"]):
                     image = cv.resize(image, (parameters["width"], parameters["height"]))
-                data.value = image
-                self.set_state(Element.STATE_READY)
+                self.frame_number += 1
+                data.set_value(image, self.frame_number)
+                self.set_state(Element.STATE_READY, "Skipped frames: {}".format(self.skipped_frames) if self.skipped_frames else "")
                 self.notify_state_changed()
             elif self.repeat_after_end:
                 # if reading from file, then repeat
@@ -141,7 +153,7 @@ class VideoFrameFilter(NormalElement):
                 return
             self.dropped = 0
             self.may_interrupt()
-            unit.outputs["output"].value = data.value
+            unit.outputs["output"].set_value(data.value, data.frame)
 
 
 
@@ -149,6 +161,7 @@ class VideoFrameFilter(NormalElement):
 class VideoRecorder(FunctionGuiElement, ThreadedElement):
     name = "Video recorder"
     comment = "Saves its input as a video file"
+    sink = True
 
     def __init__(self):
         super(VideoRecorder, self).__init__()
@@ -14,3 +14,7 @@ class ProcessingError(GeneralException):
     pass
 
 
+
+
+class ElementNotFoundError(GeneralException):
+    pass
@@ -6,16 +6,18 @@ from weakref import WeakValueDictionary
 
 objects = WeakValueDictionary()
 lock = RLock()
+last_id = 0
 
 
 def next_id(object2add=None):
+    global last_id
     with lock:
-        if not objects:
-            id = 1
-        else:
-            id = max(objects.keys()) + 1
-        if object2add is not None: objects[id] = object2add
-        return id
+        # ids are not reused - the counter only skips ids taken by change_id
+        last_id += 1
+        while last_id in objects:
+            last_id += 1
+        if object2add is not None: objects[last_id] = object2add
+        return last_id
 
 
 def change_id(old, new):
@@ -3,9 +3,9 @@ import threading
 from collections import OrderedDict
 
 import numpy as np
-from PyQt5.QtCore import pyqtSignal, QObject
 
 from . import id_manager
+from .qtcore import pyqtSignal, QObject
 
 
 class Parameter(QObject):
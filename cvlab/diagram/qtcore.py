@@ -0,0 +1,97 @@
+"""
+Qt primitives used by the diagram model.
+
+In the GUI these are the real PyQt5.QtCore classes. When CV Lab runs headless
+(CVLAB_HEADLESS environment variable is set, see cvlab/headless.py) they are
+replaced with pure-python stand-ins, so that diagrams can be loaded and executed
+without importing PyQt5 at all.
+"""
+
+import os
+import threading
+
+
+HEADLESS = os.environ.get("CVLAB_HEADLESS", "") not in ("", "0")
+
+
+if not HEADLESS:
+    from PyQt5.QtCore import pyqtSignal, pyqtSlot, QObject, QReadWriteLock, QTimer
+
+else:
+    class QObject:
+        def __init__(self, *args, **kwargs):
+            super(QObject, self).__init__()
+
+
+    class BoundSignal:
+        """Signal of a single object - slots are called synchronously in the emitting thread"""
+
+        def __init__(self):
+            self.slots = []
+            self.lock = threading.Lock()
+
+        def connect(self, slot):
+            with self.lock:
+                self.slots.append(slot)
+
+        def disconnect(self, slot=None):
+            with self.lock:
+                if slot is None:
+                    self.slots = []
+                else:
+                    self.slots.remove(slot)
+
+        def emit(self, *args):
+            with self.lock:
+                slots = list(self.slots)
+            for slot in slots:
+                slot(*args)
+
+
+    class pyqtSignal:
+        def __init__(self, *types):
+            self.types = types
+            self.name = None
+
+        def __set_name__(self, owner, name):
+            self.name = name
+
+        def __get__(self, instance, owner):
+            if instance is None:
+                return self
+            # the bound signal is stored in the instance, so the descriptor is called only once per object
+            return instance.__dict__.setdefault(self.name, BoundSignal())
+
+
+    def pyqtSlot(*types, **kwargs):
+        return lambda method: method
+
+
+    class QReadWriteLock:
+        """Recursive lock with the QReadWriteLock interface. Readers are serialized too."""
+
+        Recursive = 1
+        NonRecursive = 0
+
+        def __init__(self, recursion_mode=NonRecursive):
+            self._lock = threading.RLock()
+
+        def tryLockForRead(self):
+            return self._lock.acquire(blocking=False)
+
+        def lockForRead(self):
+            self._lock.acquire()
+
+        def lockForWrite(self):
+            self._lock.acquire()
+
+        def unlock(self):
+            self._lock.release()
+
+
+    class QTimer:
+        @staticmethod
+        def singleShot(msec, callback):
+            timer = threading.Timer(msec / 1000., callback)
+            timer.daemon = True
+            timer.start()
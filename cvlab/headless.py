@@ -0,0 +1,261 @@
+"""
+Running CV Lab diagrams without the GUI.
+
+Importing this module switches CV Lab into headless mode, in which the diagram model
+and the elements do not depend on PyQt5. It must be imported before any other
+cvlab.diagram or cvlab.core module.
+
+Usage:
+    python -m cvlab run diagram.cvlab --inputs "Image loader.path=in.png" --outputs "Blur transform.output=out.png"
+
+Elements are selected by their unique id, name (as shown in the GUI) or class name.
+"""
+
+import os
+
+os.environ["CVLAB_HEADLESS"] = "1"
+
+import argparse
+import json
+import sys
+from glob import glob
+
+import cv2 as cv
+import numpy as np
+
+from .diagram.qtcore import HEADLESS
+from .diagram.diagram import Diagram
+from .diagram.data import Data
+from .diagram.errors import ElementNotFoundError
+from .diagram.parameters import PathParameter, MultiPathParameter, ComboboxParameter
+from .diagram.serialization import ComplexJsonDecoder
+from .core.cache import MEGABYTE
+from .core.disk_cache import disk_cache
+from .core import profiler
+from .core import tracer
+from .core.critical_path import CriticalPath
+from .core.memory import MemoryUsage, memory_budget
+
+if not HEADLESS:
+    raise ImportError("cvlab.headless must be imported before the other cvlab modules")
+
+
+class HeadlessPainter:
+    """Replacement of the workarea - keeps the order of added elements"""
+
+    def __init__(self):
+        self.z_indices = {}
+
+    def element_added(self, element, position):
+        self.z_indices[element] = len(self.z_indices)
+
+    def element_z_index(self, element):
+        return self.z_indices[element]
+
+    def loading_progress(self):
+        pass
+
+
+def create_diagram(workers=None):
+    diagram = Diagram(workers)
+    painter = HeadlessPainter()
+    diagram.set_painter(painter)
+    diagram.element_added.connect(painter.element_added)
+    return diagram
+
+
+def load_diagram(path, workers=None, start=True):
+    """
+    Loads the diagram from the .cvlab file. Elements start calculations when it is loaded,
+    or (if not 'start') when diagram.scheduler.resume() is called, e.g. after setting the inputs.
+    """
+    diagram = create_diagram(workers)
+    diagram.scheduler.suspend()
+    with open(path, "r") as f:
+        ComplexJsonDecoder(diagram, os.path.dirname(os.path.abspath(path))).decode(f.read())
+    if start:
+        diagram.scheduler.resume()
+    return diagram
+
+
+def enable_experimental_elements():
+    """Registers the experimental elements (cvlab_experimental), which are disabled by default"""
+    try:
+        import cvlab_experimental
+    except ImportError as e:
+        raise ValueError("Experimental elements are not available: {}".format(e))
+    cvlab_experimental.load()
+
+
+def wait_idle(diagram, timeout=None):
+    """Waits until all elements finish their calculations. Returns False on timeout."""
+    return diagram.scheduler.wait_idle(timeout)
+
+
+def find_element(diagram, key):
+    for attribute in ("unique_id", "name"):
+        found = [e for e in diagram.elements if getattr(e, attribute) == key]
+        if len(found) == 1:
+            return found[0]
+        if len(found) > 1:
+            raise ValueError("Element '{}' is ambiguous, use its unique id".format(key))
+    found = [e for e in diagram.elements if e.__class__.__name__ == key]
+    if len(found) == 1:
+        return found[0]
+    if len(found) > 1:
+        raise ValueError("Element '{}' is ambiguous, use its unique id".format(key))
+    raise ValueError("Element '{}' not found".format(key))
+
+
+def parse_assignment(diagram, text):
+    """Parses 'ELEMENT.ATTRIBUTE=VALUE' into (element, attribute, value)"""
+    target, sep, value = text.partition("=")
+    key, dot, attribute = target.rpartition(".")
+    if not sep or not dot:
+        raise ValueError("Wrong format of '{}', expected ELEMENT.ATTRIBUTE=VALUE".format(text))
+    return find_element(diagram, key), attribute, value
+
+
+def set_input(parameter, value):
+    if isinstance(parameter, PathParameter):
+        parameter.set(os.path.abspath(value))
+    elif isinstance(parameter, MultiPathParameter):
+        parameter.set([os.path.abspath(path) for path in sorted(glob(value))])
+    elif isinstance(parameter, ComboboxParameter) and value in parameter.values:
+        parameter.set(parameter.values[value])
+    else:
+        try:
+            value = json.loads(value)
+        except ValueError:
+            pass
+        parameter.set(value)
+
+
+def save_output(data, path):
+    """Saves the output Data. Sequences are saved as numbered files (or use '{}' in the path)."""
+    assert isinstance(data, Data)
+    values = [v for v in data.desequence_all() if v is not None]
+    if not values:
+        raise ValueError("Output for '{}' is empty".format(path))
+    if len(values) == 1 and data.type() != Data.SEQUENCE:
+        paths = [path]
+    elif "{}" in path:
+        paths = [path.format(i) for i in range(len(values))]
+    else:
+        base, ext = os.path.splitext(path)
+        paths = ["{}_{:04d}{}".format(base, i, ext) for i in range(len(values))]
+    for value, path in zip(values, paths):
+        if path.endswith(".npy"):
+            np.save(path, value)
+        elif not cv.imwrite(path, value):
+            raise ValueError("Cannot save output to '{}'".format(path))
+
+
+def run(path, inputs=(), outputs=(), timeout=None, workers=None, disk_cache_mb=None, profile=None,
+        critical_path=None, trace=None, memory_budget_mb=None, memory_report=None, demand_driven=False,
+        experimental=False):
+    """Executes the diagram and saves its outputs. Returns the number of elements in error state."""
+    np.seterr(all='raise')
+    if experimental:
+        enable_experimental_elements()
+    if trace:
+        tracer.start()
+    if memory_budget_mb is not None:
+        memory_budget.set_budget(memory_budget_mb * MEGABYTE)
+    if disk_cache_mb is not None:
+        disk_cache.set_budget(disk_cache_mb * MEGABYTE)
+
+    # the inputs are set before the first calculation
+    diagram = load_diagram(path, start=False)
+    try:
+        if workers:
+            diagram.scheduler.set_workers(workers)
+
+        for assignment in inputs:
+            element, name, value = parse_assignment(diagram, assignment)
+            set_input(element.parameters[name], value)
+
+        if demand_driven:
+            # only the saved outputs and sinks (and their inputs) are calculated
+            for assignment in outputs:
+                parse_assignment(diagram, assignment)[0].set_observed(True)
+            diagram.scheduler.set_demand_driven(True)
+    finally:
+        # started also after a wrong input, so that the diagram is not left suspended
+        diagram.scheduler.resume()
+
+    if not wait_idle(diagram, timeout):
+        print("WARNING: Diagram has not finished in {} seconds, saving actual outputs".format(timeout))
+
+    if memory_budget_mb is not None:
+        memory_budget.check(diagram)
+
+    errors = 0
+    for element in diagram.elements:
+        if element.state == element.STATE_ERROR:
+            print("{} [{}]: {}".format(element.name, element.unique_id, element.message), file=sys.stderr)
+            errors += 1
+
+    for assignment in outputs:
+        element, name, output_path = parse_assignment(diagram, assignment)
+        save_output(element.outputs[name].get(), output_path)
+
+    if profile:
+        profiler.export(profile, diagram.elements)
+
+    if critical_path:
+        with open(critical_path, "w") as f:
+            json.dump(CriticalPath(diagram).report(), f, indent=2)
+
+    if trace:
+        tracer.stop()
+        tracer.export(trace)
+
+    if memory_report:
+        with open(memory_report, "w") as f:
+            json.dump(MemoryUsage(diagram).report(), f, indent=2)
+
+    return errors
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog="cvlab run", description="Executes CV Lab diagram without GUI")
+    parser.add_argument("diagram", help="path to the .cvlab file")
+    parser.add_argument("--inputs", nargs="*", default=[], metavar="ELEMENT.PARAMETER=VALUE",
+                        help="parameter values to set before execution")
+    parser.add_argument("--outputs", nargs="*", default=[], metavar="ELEMENT.OUTPUT=PATH",
+                        help="element outputs to save (images or .npy files)")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="maximal execution time in seconds (required for diagrams with live sources)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker threads (default: as saved in the diagram or number of CPU cores)")
+    parser.add_argument("--disk-cache", type=int, default=None, metavar="MB",
+                        help="size of the disk cache of expensive results, kept between runs (default: disabled)")
+    parser.add_argument("--profile", default=None, metavar="PATH",
+                        help="saves processing times of the elements to a .csv or .json file")
+    parser.add_argument("--critical-path", default=None, metavar="PATH",
+                        help="saves the longest latency paths of the diagram and slack of the elements to a .json file")
+    parser.add_argument("--trace", default=None, metavar="PATH",
+                        help="saves the timeline of the execution to a .json file (Chrome trace event format)")
+    parser.add_argument("--memory-budget", type=int, default=None, metavar="MB",
+                        help="limits the memory retained by the diagram and caches - caches are trimmed when it is exceeded")
+    parser.add_argument("--memory-report", default=None, metavar="PATH",
+                        help="saves the memory retained by the elements and wires to a .json file")
+    parser.add_argument("--demand-driven", action="store_true",
+                        help="calculates only the elements needed for the outputs and sinks (e.g. Image saver)")
+    parser.add_argument("--experimental", action="store_true",
+                        help="enables experimental elements (also enabled by CVLAB_EXPERIMENTAL=1)")
+    args = parser.parse_args(args)
+
+    try:
+        errors = run(args.diagram, args.inputs, args.outputs, args.timeout, args.workers, args.disk_cache,
+                     args.profile, args.critical_path, args.trace, args.memory_budget, args.memory_report,
+                     args.demand_driven, args.experimental)
+    except ElementNotFoundError as e:
+        hint = "" if args.experimental else " (experimental elements are enabled with --experimental)"
+        print("ERROR: {}{}".format(e, hint), file=sys.stderr)
+        return 2
+    except (ValueError, KeyError, OSError) as e:
+        print("ERROR:", e, file=sys.stderr)
+        return 2
+    return 1 if errors else 0
@@ -16,6 +16,13 @@ EXPERIMENTAL_ELEMENTS ='experimental'
 UPDATES_SECTION = "updates"
 UPDATE_DONT_REMIND_VERSION = "dont_remind_version"
 
+PROCESSING_SECTION = 'processing'
+RESULT_CACHE_SIZE = 'result_cache_mb'
+DISK_CACHE_SIZE = 'disk_cache_mb'
+MEMORY_BUDGET = 'memory_budget_mb'
+DEMAND_DRIVEN = 'demand_driven'
+PROXY_PREVIEW = 'proxy_preview'
+
 DEFAULTS = {
     VIEW_SECTION: {
         VIEW_HQ_OPTION: 'False',
@@ -29,6 +36,13 @@ DEFAULTS = {
     UPDATES_SECTION: {
         UPDATE_DONT_REMIND_VERSION: "0"
     },
+    PROCESSING_SECTION: {
+        RESULT_CACHE_SIZE: '0',
+        DISK_CACHE_SIZE: '0',
+        MEMORY_BUDGET: '0',
+        DEMAND_DRIVEN: 'False',
+        PROXY_PREVIEW: 'True',
+    },
 }
 
 
@@ -55,9 +55,16 @@ class DiagramManager:
                 encoded = fp.read()
                 scrolled_wa = ScrolledWorkArea(Diagram(), self.style_manager)
                 base_path = os.path.abspath(path + "/../").replace("\\","/")
-                scrolled_wa.load_diagram_from_json(encoded, base_path)
                 full_path = os.path.abspath(str(path))
+                # the tab is opened first, so that the elements appear while the diagram is loaded
                 self.open_diagram(scrolled_wa, full_path)
+                try:
+                    scrolled_wa.load_diagram_from_json(encoded, base_path)
+                except Exception:
+                    self.tabs_container.removeTab(self.tabs_container.indexOf(scrolled_wa))
+                    raise
+                for e in scrolled_wa.diagram.elements:
+                    e.state_changed.emit()
                 scrolled_wa.workarea.actualize_style()
             except Exception as e:
                 print("Error: could not load diagram {} - {}".format(path, e))
@@ -37,6 +37,8 @@ Drag & drop - move element around"""
         self.hints_shown = False
         self.standard_actions = []
         self.group_actions = []
+        self.out_of_process_action = None
+        self.stream_policy_actions = {}
         self.workarea = None
         self.state_notified = False
         self.selected = False
@@ -51,6 +53,12 @@ Drag & drop - move element around"""
         self.workarea.style().unpolish(self.label)
         self.selected = select
 
+    def set_critical(self, critical):
+        """Highlights the element as a part of the critical path of the diagram"""
+        self.setProperty("critical", critical)
+        self.workarea.style().polish(self)
+        self.workarea.style().unpolish(self)
+
     def set_workarea(self, workarea):
         self.workarea = workarea
         for connector in list(self.input_connectors.values()) + list(self.output_connectors.values()):
@@ -181,6 +189,50 @@ Drag & drop - move element around"""
         self.standard_actions.append(action)
         self.addAction(action)
 
+    def create_out_of_process_action(self):
+        if not getattr(self, "out_of_process_supported", False):
+            return
+        action = QAction('Run in separate p&rocess', self)
+        action.setToolTip("Processes the element in a worker process, so that its Python code does not slow down other elements")
+        action.setCheckable(True)
+        action.triggered.connect(self.set_out_of_process)
+        self.out_of_process_action = action
+        self.standard_actions.append(action)
+        self.addAction(action)
+
+    def create_stream_policy_action(self):
+        menu = QMenu(self)
+        group = QActionGroup(self)
+        policies = [(self.STREAM_AUTO, "&Automatic", "Frames of live streams are pipelined (latest frame wins), other changes interrupt the calculation"),
+                    (self.STREAM_INTERRUPT, "&Interrupt on new data", "Current calculation is interrupted and restarted with the new data"),
+                    (self.STREAM_LATEST, "&Latest frame wins", "Current calculation is finished, then the latest data are processed"),
+                    (self.STREAM_DROP, "&Drop frames if busy", "Data arriving during a calculation are ignored"),
+                    (self.STREAM_QUEUE, "&Queue frames...", "Data arriving during a calculation are queued and processed in order")]
+        for policy, title, tooltip in policies:
+            action = QAction(title, group)
+            action.setToolTip(tooltip)
+            action.setCheckable(True)
+            action.setChecked(policy == self.stream_policy)
+            action.triggered.connect(lambda checked, policy=policy: self.choose_stream_policy(policy))
+            menu.addAction(action)
+            self.stream_policy_actions[policy] = action
+        action = QAction('&Stream policy', self)
+        action.setToolTip("What happens when new input data (e.g. camera frames) arrive during a calculation.\n"
+                          "Live sources skip frames, which would be dropped anyway.")
+        action.setMenu(menu)
+        self.standard_actions.append(action)
+        self.addAction(action)
+
+    def choose_stream_policy(self, policy):
+        queue_size = None
+        if policy == self.STREAM_QUEUE:
+            queue_size, ok = QInputDialog.getInt(self, "Queue frames", "Maximal number of queued frames:",
+                                                 self.stream_queue_size, 1, 1000)
+            if not ok:
+                self.stream_policy_actions[self.stream_policy].setChecked(True)
+                return
+        self.set_stream_policy(policy, queue_size)
+
     def create_menu_separator(self):
         separator = QAction(self)
         separator.setSeparator(True)
@@ -387,6 +439,10 @@ Drag & drop - move element around"""
         self.move(options["position"][0]*dpi_factor,options["position"][1]*dpi_factor)
 
         Element.from_json(self, data)
+        if self.out_of_process_action:
+            self.out_of_process_action.setChecked(self.out_of_process)
+        if self.stream_policy in self.stream_policy_actions:
+            self.stream_policy_actions[self.stream_policy].setChecked(True)
         self.update_id()
         self.preview.force_update()
 
@@ -464,6 +520,8 @@ class FunctionGuiElement(GuiElement):
         self.create_break_action()
         self.create_del_action()
         self.create_code_action()
+        self.create_out_of_process_action()
+        self.create_stream_policy_action()
         #self.setFocusPolicy(QtCore.Qt.ClickFocus + QtCore.Qt.TabFocus)
         #self.setAttribute(QtCore.Qt.WA_MacShowFocusRect, 1)     # enable showing focus on a Mac
 
@@ -497,6 +555,7 @@ class OperatorGuiElement(GuiElement):
         self.create_del_action()
         self.create_code_action()
         self.create_duplicate_action()
+        self.create_stream_policy_action()
 
 
 class InputGuiElement(GuiElement):
@@ -0,0 +1,66 @@
+"""
+Qt-free stand-ins for the GUI element classes from elements.py.
+
+They are used instead of the real widgets when CV Lab runs headless. The GUI options
+of loaded elements are kept untouched, so the diagram can be saved back without losing them.
+"""
+
+from ..diagram.element import Element
+from ..diagram.parameters import *
+from ..diagram.qtcore import pyqtSignal
+
+
+DEFAULT_GUI_OPTIONS = {
+    "show_parameters": True,
+    "show_sliders": None,
+    "show_preview": False,
+    "position": (0, 0),
+    "preview_size": 120,
+}
+
+
+class Position(tuple):
+    def x(self):
+        return self[0]
+
+    def y(self):
+        return self[1]
+
+
+class GuiElement(Element):
+    state_changed = pyqtSignal()
+
+    def __init__(self):
+        super(GuiElement, self).__init__()
+        self.gui_options = dict(DEFAULT_GUI_OPTIONS)
+        self.preview = None
+
+    def pos(self):
+        return Position(self.gui_options["position"])
+
+    def move(self, x, y):
+        self.gui_options["position"] = (x, y)
+
+    def notify_state_changed(self):
+        self.state_changed.emit()
+
+    def to_json(self):
+        parent_d = Element.to_json(self)
+        parent_d["gui_options"] = dict(self.gui_options)
+        return parent_d
+
+    def from_json(self, data):
+        self.gui_options.update(data.get("gui_options", {}))
+        Element.from_json(self, data)
+
+
+class FunctionGuiElement(GuiElement):
+    pass
+
+
+class OperatorGuiElement(GuiElement):
+    pass
+
+
+class InputGuiElement(GuiElement):
+    pass
@@ -1,10 +1,17 @@
 from distutils.util import strtobool
 
-from PyQt5.QtCore import Qt, pyqtSlot
+from PyQt5.QtCore import Qt, pyqtSlot, QTimer
 from PyQt5.QtGui import *
 from PyQt5.QtWidgets import *
 
 from . import config
+from ..core.cache import result_cache, MEGABYTE
+from ..core.disk_cache import disk_cache
+from ..core import profiler
+from ..core import tracer
+from ..core.critical_path import CriticalPath
+from ..core.memory import MemoryUsage, memory_budget, format_bytes
+from ..core.scheduler import Scheduler
 
 
 class MenuBar(QMenuBar):
@@ -30,6 +37,20 @@ class MenuBar(QMenuBar):
         view_menu.addAction(ResetZoomAction(view_menu, main_window))
         view_menu.addAction(ExperimentalElementsAction(view_menu, main_window))
 
+        diagram_menu = self.addMenu('&Diagram')
+        diagram_menu.addAction(WorkerThreadsAction(diagram_menu, main_window))
+        diagram_menu.addAction(ResultCacheAction(diagram_menu, main_window))
+        diagram_menu.addAction(DiskCacheAction(diagram_menu, main_window))
+        diagram_menu.addAction(MemoryBudgetAction(diagram_menu, main_window))
+        diagram_menu.addAction(DemandDrivenAction(diagram_menu, main_window))
+        diagram_menu.addAction(ProxyPreviewAction(diagram_menu, main_window))
+        diagram_menu.addSeparator()
+        diagram_menu.addAction(ExportProfileAction(diagram_menu, main_window))
+        diagram_menu.addAction(ResetProfileAction(diagram_menu, main_window))
+        diagram_menu.addAction(CriticalPathAction(diagram_menu, main_window))
+        diagram_menu.addAction(RecordTraceAction(diagram_menu, main_window))
+        diagram_menu.addAction(MemoryUsageAction(diagram_menu, main_window))
+
         help_menu = self.addMenu("&Help")
         help_menu.addAction(AboutAction(help_menu, main_window))
 
@@ -215,6 +236,253 @@ class ExperimentalElementsAction(Action):
         QMessageBox.information(self.main_window, "Information", "You must restart CV Lab to enable/disable experimental elements.")
 
 
+class WorkerThreadsAction(Action):
+    def __init__(self, parent, main_window):
+        super(WorkerThreadsAction, self).__init__('&Worker threads...', parent, main_window)
+        self.setToolTip("Sets the number of threads calculating the elements of actual diagram")
+        self.triggered.connect(self.execute)
+
+    @pyqtSlot()
+    def execute(self):
+        workarea = self.main_window.diagram_manager.current_workarea()
+        if not workarea:
+            return
+        scheduler = workarea.diagram.scheduler
+        workers, ok = QInputDialog.getInt(self.main_window, "Worker threads",
+                                          "Number of worker threads (0 - number of CPU cores):",
+                                          scheduler.requested_workers or 0, 0, 256)
+        if ok:
+            scheduler.set_workers(workers or None)
+
+
+class ResultCacheAction(Action):
+    def __init__(self, parent, main_window):
+        super(ResultCacheAction, self).__init__('Result &cache...', parent, main_window)
+        self.setToolTip("Stores results of elements, so that they are not recalculated for already seen inputs and parameters")
+        self.triggered.connect(self.execute)
+        megabytes = int(self.settings.get_with_default(config.PROCESSING_SECTION, config.RESULT_CACHE_SIZE))
+        result_cache.set_budget(megabytes * MEGABYTE)
+
+    @pyqtSlot()
+    def execute(self):
+        stats = result_cache.statistics()
+        label = "Hits: {hits}, misses: {misses}, evictions: {evictions}\n" \
+                "Stored results: {entries} ({megabytes:.1f} MB)\n\n" \
+                "Cache size in MB (0 - disabled):".format(megabytes=stats["bytes"] / MEGABYTE, **stats)
+        megabytes, ok = QInputDialog.getInt(self.main_window, "Result cache", label,
+                                            result_cache.budget // MEGABYTE, 0, 1 << 20)
+        if ok:
+            result_cache.set_budget(megabytes * MEGABYTE)
+            self.settings.set(config.PROCESSING_SECTION, config.RESULT_CACHE_SIZE, megabytes)
+
+
+class DiskCacheAction(Action):
+    def __init__(self, parent, main_window):
+        super(DiskCacheAction, self).__init__('&Disk cache...', parent, main_window)
+        self.setToolTip("Stores results of expensive elements (e.g. 3D image loaders) on disk, "
+                        "so that they are not recalculated when the diagram is opened again")
+        self.triggered.connect(self.execute)
+        megabytes = int(self.settings.get_with_default(config.PROCESSING_SECTION, config.DISK_CACHE_SIZE))
+        disk_cache.set_budget(megabytes * MEGABYTE)
+
+    @pyqtSlot()
+    def execute(self):
+        stats = disk_cache.statistics()
+        label = "Directory: {directory}\n" \
+                "Hits: {hits}, misses: {misses}, evictions: {evictions}\n" \
+                "Stored results: {entries} ({megabytes:.1f} MB)\n\n" \
+                "Cache size in MB (0 - disabled):".format(megabytes=stats["bytes"] / MEGABYTE, **stats)
+        megabytes, ok = QInputDialog.getInt(self.main_window, "Disk cache", label,
+                                            disk_cache.budget // MEGABYTE, 0, 1 << 24)
+        if ok:
+            disk_cache.set_budget(megabytes * MEGABYTE)
+            self.settings.set(config.PROCESSING_SECTION, config.DISK_CACHE_SIZE, megabytes)
+
+
+class MemoryBudgetAction(Action):
+    def __init__(self, parent, main_window):
+        super(MemoryBudgetAction, self).__init__('&Memory budget...', parent, main_window)
+        self.setToolTip("Limits the memory retained by diagrams and caches - caches are trimmed when it is exceeded")
+        self.triggered.connect(self.execute)
+        megabytes = int(self.settings.get_with_default(config.PROCESSING_SECTION, config.MEMORY_BUDGET))
+        memory_budget.set_budget(megabytes * MEGABYTE)
+
+    @pyqtSlot()
+    def execute(self):
+        megabytes, ok = QInputDialog.getInt(self.main_window, "Memory budget", "Memory budget in MB (0 - no limit):",
+                                            memory_budget.budget // MEGABYTE, 0, 1 << 24)
+        if ok:
+            memory_budget.set_budget(megabytes * MEGABYTE)
+            self.settings.set(config.PROCESSING_SECTION, config.MEMORY_BUDGET, megabytes)
+
+
+class DemandDrivenAction(Action):
+    def __init__(self, parent, main_window):
+        super(DemandDrivenAction, self).__init__('Calculate only &observed elements', parent, main_window)
+        self.setToolTip("Elements are calculated only if their results are needed - by visible previews, "
+                        "open image windows or sinks (e.g. Image saver)")
+        self.setCheckable(True)
+        self.value = bool(strtobool(self.settings.get_with_default(config.PROCESSING_SECTION, config.DEMAND_DRIVEN)))
+        self.setChecked(self.value)
+        Scheduler.demand_driven = self.value
+        self.triggered.connect(self.toggle)
+
+    @pyqtSlot()
+    def toggle(self):
+        self.value = not self.value
+        self.setChecked(self.value)
+        self.settings.set(config.PROCESSING_SECTION, config.DEMAND_DRIVEN, self.value)
+        Scheduler.demand_driven = self.value
+        tabs = self.main_window.diagram_manager.tabs_container
+        for i in range(tabs.count()):
+            tabs.widget(i).diagram.scheduler.set_demand_driven(self.value)
+
+
+class ProxyPreviewAction(Action):
+    def __init__(self, parent, main_window):
+        super(ProxyPreviewAction, self).__init__('&Low resolution while dragging parameters', parent, main_window)
+        self.setToolTip("While a parameter is dragged, big images are downscaled, so that previews follow it "
+                        "in real time - full resolution is calculated when the parameter stops changing")
+        self.setCheckable(True)
+        self.value = bool(strtobool(self.settings.get_with_default(config.PROCESSING_SECTION, config.PROXY_PREVIEW)))
+        self.setChecked(self.value)
+        Scheduler.proxy_enabled = self.value
+        self.triggered.connect(self.toggle)
+
+    @pyqtSlot()
+    def toggle(self):
+        self.value = not self.value
+        self.setChecked(self.value)
+        self.settings.set(config.PROCESSING_SECTION, config.PROXY_PREVIEW, self.value)
+        Scheduler.proxy_enabled = self.value
+
+
+class ExportProfileAction(Action):
+    def __init__(self, parent, main_window):
+        super(ExportProfileAction, self).__init__('&Export profile...', parent, main_window)
+        self.setToolTip("Saves processing times of the elements of actual diagram (percentiles, interrupted runs)")
+        self.triggered.connect(self.execute)
+
+    @pyqtSlot()
+    def execute(self):
+        workarea = self.main_window.diagram_manager.current_workarea()
+        if not workarea:
+            return
+        path, _ = QFileDialog.getSaveFileName(self.main_window, "Export profile", "profile.csv",
+                                              "CSV files (*.csv);;JSON files (*.json)")
+        if path:
+            profiler.export(path, workarea.diagram.elements)
+
+
+class ResetProfileAction(Action):
+    def __init__(self, parent, main_window):
+        super(ResetProfileAction, self).__init__('Reset p&rofile', parent, main_window)
+        self.setToolTip("Clears processing time statistics of the elements of actual diagram")
+        self.triggered.connect(self.execute)
+
+    @pyqtSlot()
+    def execute(self):
+        workarea = self.main_window.diagram_manager.current_workarea()
+        if not workarea:
+            return
+        for element in workarea.diagram.elements:
+            if hasattr(element, "profile"):
+                element.profile.reset()
+
+
+class CriticalPathAction(Action):
+    def __init__(self, parent, main_window):
+        super(CriticalPathAction, self).__init__('Show c&ritical path', parent, main_window)
+        self.setToolTip("Highlights the chain of elements with the longest total processing time "
+                        "and shows how much the other elements may slow down without delaying the results")
+        self.setCheckable(True)
+        self.triggered.connect(self.execute)
+
+    @pyqtSlot()
+    def execute(self):
+        scrolled_workarea = self.main_window.diagram_manager.current_workarea()
+        if not scrolled_workarea:
+            self.setChecked(False)
+            return
+        if not self.isChecked():
+            scrolled_workarea.workarea.show_critical_path(None)
+            return
+        critical_path = CriticalPath(scrolled_workarea.diagram)
+        scrolled_workarea.workarea.show_critical_path(critical_path)
+        lines = ["Critical path: {:.1f} ms".format(critical_path.length)]
+        lines += ["    {} - {:.1f} ms".format(e.name, critical_path.times[e]) for e in critical_path.elements]
+        others = sorted((e for e in critical_path.order if not critical_path.is_critical(e)), key=critical_path.slack.get)
+        if others:
+            lines += ["", "Slack of other elements:"]
+            lines += ["    {} - {:.1f} ms".format(e.name, critical_path.slack[e]) for e in others]
+        QMessageBox.information(self.main_window, "Critical path", "\n".join(lines))
+
+
+class RecordTraceAction(Action):
+    def __init__(self, parent, main_window):
+        super(RecordTraceAction, self).__init__('Record &trace', parent, main_window)
+        self.setToolTip("Records the timeline of calculations in all threads - uncheck to save it "
+                        "(open the file in chrome://tracing or ui.perfetto.dev)")
+        self.setCheckable(True)
+        self.triggered.connect(self.execute)
+
+    @pyqtSlot()
+    def execute(self):
+        if self.isChecked():
+            tracer.start()
+            return
+        tracer.stop()
+        path, _ = QFileDialog.getSaveFileName(self.main_window, "Save trace", "trace.json", "JSON files (*.json)")
+        if path:
+            tracer.export(path)
+
+
+class MemoryUsageAction(Action):
+    # the memory usage is refreshed periodically while it is shown
+    REFRESH_INTERVAL_MS = 1000
+
+    def __init__(self, parent, main_window):
+        super(MemoryUsageAction, self).__init__('Show memory &usage', parent, main_window)
+        self.setToolTip("Shows the memory retained by each element in its status bar and the total in the main status bar")
+        self.setCheckable(True)
+        self.timer = QTimer(self)
+        self.timer.setInterval(self.REFRESH_INTERVAL_MS)
+        self.timer.timeout.connect(self.refresh)
+        self.workarea = None
+        self.triggered.connect(self.execute)
+
+    @pyqtSlot()
+    def execute(self):
+        if self.isChecked():
+            self.timer.start()
+            self.refresh()
+        else:
+            self.timer.stop()
+            self.hide()
+            self.main_window.statusBar().clearMessage()
+
+    def hide(self):
+        if self.workarea is not None:
+            try:
+                self.workarea.workarea.show_memory_usage(None)
+            except RuntimeError:
+                pass    # the workarea is already closed
+            self.workarea = None
+
+    @pyqtSlot()
+    def refresh(self):
+        workarea = self.main_window.diagram_manager.current_workarea()
+        if workarea is not self.workarea:
+            self.hide()
+        if not workarea:
+            return
+        self.workarea = workarea
+        usage = MemoryUsage(workarea.diagram)
+        workarea.workarea.show_memory_usage(usage)
+        self.main_window.statusBar().showMessage("Memory: {} retained by elements, {} by caches".format(
+            format_bytes(usage.elements_total), format_bytes(sum(usage.caches.values()))))
+
+
 class AboutAction(Action):
     message = """\
 <h1>CV Lab - Computer Vision Laboratory</h1>
@@ -15,6 +15,11 @@ class GuiBaseParameter(QHBoxLayout):
         self.setContentsMargins(0,0,0,0)
         self.setSpacing(2)
 
+    def check_dragging(self, element, slider, spin):
+        # while the value is dragged, the diagram is calculated on downscaled images
+        if (slider.isSliderDown() or spin.lineEdit().pressed_pos is not None) and element.diagram is not None:
+            element.diagram.scheduler.interactive_change()
+
 
 class GuiButtonParameter(GuiBaseParameter):
     def __init__(self, parameter):
@@ -189,6 +194,7 @@ class GuiIntParameter(GuiBaseParameter):
     @pyqtSlot(int)
     def gui_value_changed(self, value):
         if self.spin.value() != value or self.slider.value() != value:
+            self.check_dragging(self.element, self.slider, self.spin)
             self.parameter.set(int(value))
 
     @pyqtSlot()
@@ -259,6 +265,7 @@ class GuiFloatParameter(GuiBaseParameter):
         self.ignore_changes = True
         slider_value = self.slider_to_value(value)
         if slider_value != self.parameter.get():
+            self.check_dragging(self.element, self.slider, self.spin)
             self.parameter.set(slider_value)
         self.ignore_changes = False
 
@@ -267,6 +274,7 @@ class GuiFloatParameter(GuiBaseParameter):
         if self.ignore_changes: return
         self.ignore_changes = True
         if value != self.parameter.get():
+            self.check_dragging(self.element, self.slider, self.spin)
             self.parameter.set(value)
         self.ignore_changes = False
 
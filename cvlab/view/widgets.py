@@ -7,6 +7,8 @@ from PyQt5.QtGui import *
 from PyQt5.QtWidgets import *
 
 from .. import CVLAB_DIR
+from ..core import tracer
+from ..core.memory import format_bytes
 from ..diagram.interface import *
 from .mimedata import *
 from . import image_preview
@@ -197,6 +199,11 @@ Double click - open the preview in separate window"""
         if not self.isVisible():
             self.force_update()
         self.setVisible(value)
+        self.update_demand()
+
+    def update_demand(self):
+        # the outputs are observed in the preview (even if its tab is not active) or in image windows
+        self.element.set_observed(not self.isHidden() or self.image_dialogs_count > 0)
 
     def set_outdated(self):
         for preview in self.previews:
@@ -204,8 +211,9 @@ Double click - open the preview in separate window"""
 
     def update_previews(self, state):
         if self.isVisible() or self.image_dialogs_count:
-            for preview in self.previews:
-                preview.update()
+            with tracer.span("update previews", "gui", self.element):
+                for preview in self.previews:
+                    preview.update()
 
     def force_update(self):
         for preview in self.previews:
@@ -338,7 +346,7 @@ class ActionImage(QLabel):
         hq = bool(strtobool(config.ConfigWrapper.get_settings().get_with_default(config.VIEW_SECTION,
                                                                                  config.VIEW_HQ_OPTION)))
         quality = QtCore.Qt.SmoothTransformation if hq else QtCore.Qt.FastTransformation
-        size = self.previews_container.preview_size
+        size = int(self.previews_container.preview_size)
         if not ALLOW_UPSIZE and size > max(qpix.width(), qpix.height()):
             size = max(qpix.width(), qpix.height())
         if qpix.width() > qpix.height():
@@ -369,6 +377,7 @@ class ActionImage(QLabel):
                 self.image_dialog.showNormal()
             self.image_dialog.installEventFilter(self)
             self.previews_container.image_dialogs_count += 1
+            self.previews_container.update_demand()
 
     def prepare_actions(self, enable=True):
         if enable:
@@ -387,6 +396,7 @@ class ActionImage(QLabel):
             if self.previews_container.image_dialogs_count < 0:
                 self.previews_container.image_dialogs_count = 0
                 # todo: report error here: reaching here would mean unexpected circumstances in counting spawning and closing dialogs
+            self.previews_container.update_demand()
 
     def eventFilter(self, source, event):
         if event.type() == QtCore.QEvent.Close and self.image_dialog is not None:
@@ -436,10 +446,15 @@ class ElementStatusBar(StyledWidget):
         self.timings.setObjectName("ElementStatusLabel")
         self.timings.setAlignment(QtCore.Qt.AlignRight)
         # self.timings.setSizePolicy(QSizePolicy.Ignored,QSizePolicy.Ignored)
+        self.memory = QLabel("")
+        self.memory.setVisible(False)
+        self.memory.setObjectName("ElementStatusLabel")
+        self.memory.setAlignment(QtCore.Qt.AlignRight)
         hb = QHBoxLayout()
         hb.setContentsMargins(0, 0, 0, 0)
         hb.setSpacing(0)
         hb.addWidget(self.message)
+        hb.addWidget(self.memory)
         hb.addWidget(self.timings)
         self.setLayout(hb)
         self.element.state_changed.connect(self.update)
@@ -453,6 +468,17 @@ class ElementStatusBar(StyledWidget):
             # Todo: self.message.adjustSize() might be required here
         self.display_processing_time()
 
+    def set_memory(self, usage):
+        """Shows the memory retained by the element (see core/memory.py), or hides it if usage is None"""
+        if usage is None:
+            self.memory.setVisible(False)
+            return
+        self.memory.setText(format_bytes(usage["total"]) + " | ")
+        self.memory.setToolTip("Memory retained by the element (buffers shared with previous elements are not counted)\n\n" +
+                               "\n".join("{} - {}".format(format_bytes(usage[part]), part.capitalize())
+                                         for part in ("outputs", "state", "units", "inputs")))
+        self.memory.setVisible(True)
+
     def display_processing_time(self):
         if not hasattr(self.element, "processing_time_info"): return  # fixme: tymczasowy hack...
         time_info = self.element.processing_time_info
@@ -470,7 +496,12 @@ class ElementStatusBar(StyledWidget):
         time_info = self.element.processing_time_info
         unit_element_time = self.get_text_for_milis(time_info.work_time_per_unit)
         unit_total_time = self.get_text_for_milis(time_info.total_work_time_per_unit)
-        return unit_element_time + " / " + unit_total_time
+        text = unit_element_time + " / " + unit_total_time
+        profile = getattr(self.element, "profile", None)
+        if profile is not None and profile.runs - profile.interrupted > 1:
+            p95 = profile.statistics()["wall_p95_ms"]
+            text += ", p95 " + self.get_text_for_milis(int(round(p95)))
+        return text
 
     def prepare_tooltip(self):
         time_info = self.element.processing_time_info
@@ -478,13 +509,25 @@ class ElementStatusBar(StyledWidget):
         total_time = self.get_text_for_milis(time_info.total_work_time)
         if time_info.work_time == time_info.work_time_per_unit:
             tooltip = "%s - Element processing time\n%s - Total processing time" % (element_time, total_time)
-            return tooltip
         else:
             unit_element_time = self.get_text_for_milis(time_info.work_time_per_unit)
             unit_total_time = self.get_text_for_milis(time_info.total_work_time_per_unit)
             tooltip = "%s - Unit element processing time\n%s - Unit total processing time\n%s - Element processing time\n%s - Total processing time" \
                       % (unit_element_time, unit_total_time, element_time, total_time)
-            return tooltip
+        return tooltip + self.prepare_profile_tooltip()
+
+    def prepare_profile_tooltip(self):
+        profile = getattr(self.element, "profile", None)
+        if profile is None:
+            return ""
+        stats = profile.statistics()
+        text = "\n\nRuns: {runs} (interrupted: {interrupted}, errors: {errors})".format(**stats)
+        for name, label in (("wall", "Wall time"), ("cpu", "CPU time")):
+            if stats[name + "_p50_ms"] is None:
+                continue
+            text += "\n{} p50 / p95 / p99: {:.1f} / {:.1f} / {:.1f} ms".format(
+                label, stats[name + "_p50_ms"], stats[name + "_p95_ms"], stats[name + "_p99_ms"])
+        return text
 
     def get_text_for_milis(self, milis):
         return (str(milis) + " ms") if milis < 1000 else ("%.2f" % (milis / 1000.0) + " s")
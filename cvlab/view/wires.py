@@ -94,6 +94,8 @@ class WiresBackground(WiresBase):
             if wire.selected:
                 painter.strokePath(wire.line, self.wire_tools.pen_selected_background.line)
                 painter.strokePath(wire.line, self.wire_tools.pen_selected.line)
+            elif wire.critical:
+                painter.strokePath(wire.line, self.wire_tools.pen_critical.line)
             else:
                 painter.strokePath(wire.line, self.wire_tools.pen_regular.line)
 
@@ -131,6 +133,11 @@ class WiresBackground(WiresBase):
         if wire_clicked:
             self.update()
 
+    def set_critical_connections(self, connections):
+        for key, wire in self.manager.connectors_map.items():
+            wire.critical = key in connections
+        self.update()
+
     def unselect_wires(self):
         for w in self.manager.wires:
            w.selected = False
@@ -140,6 +147,7 @@ class WiresBackground(WiresBase):
 class Wire:
     def __init__(self, start_object, end_object, manager=None, workarea=None):
         self._selected = False
+        self.critical = False   # the wire is a part of the critical path of the diagram
         self.manager = manager
         self.workarea = workarea if manager is None else manager.workarea
         self.start_widget = None
@@ -468,6 +476,7 @@ class WireTools:
         self.pen_regular = None
         self.pen_selected = None
         self.pen_selected_background = None
+        self.pen_critical = None
 
         self.style_manager = style_manager
         self.wire_style = None
@@ -487,6 +496,8 @@ class WireTools:
                                     dotted=True)
         self.pen_selected_background = WirePen(self.wire_style.pen_selected_bg_color,
                                                self.wire_style.pen_selected_bg_size)
+        self.pen_critical = WirePen(self.wire_style.pen_critical_color,
+                                    self.wire_style.pen_critical_size)
 
     def get_arrow_points(self, point):
         points = []
@@ -537,6 +548,8 @@ class WireStyle:
         self.pen_selected_size = None
         self.pen_selected_bg_color = None
         self.pen_selected_bg_size = None
+        self.pen_critical_color = None
+        self.pen_critical_size = None
 
         # Parse stylesheet
         self.simple_parse_qss(stylesheet)
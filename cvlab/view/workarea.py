@@ -1,5 +1,6 @@
 import os
 import re
+import time
 from datetime import datetime, timedelta
 
 import numpy as np
@@ -17,6 +18,9 @@ from .wires import WiresForeground, NO_FOREGROUND_WIRES, WiresBackground, WireTo
 
 
 class ScrolledWorkArea(QScrollArea):
+    # while a diagram is loaded, it is repainted at this interval (in seconds), so big diagrams appear progressively
+    LOADING_REPAINT_INTERVAL = 0.1
+
     def __init__(self, diagram, style_manager):
         super(ScrolledWorkArea, self).__init__()
         self.setObjectName("ScrolledWorkArea")
@@ -26,12 +30,21 @@ class ScrolledWorkArea(QScrollArea):
         self.setWidget(self.workarea)
         diagram.set_painter(self)
         self.mouse_press_pos = None
+        self.last_repaint = 0
         QTimer.singleShot(50, self.scroll_to_absolute_center)
 
     def load_diagram_from_json(self, ascii_data, base_path):
+        self.last_repaint = time.monotonic()
         self.diagram.load_from_json(ascii_data, base_path)
         QTimer.singleShot(100, self.scroll_to_upperleft)
 
+    def loading_progress(self):
+        """Called by the diagram after each loaded element and wire"""
+        now = time.monotonic()
+        if now - self.last_repaint >= self.LOADING_REPAINT_INTERVAL:
+            self.last_repaint = now
+            QApplication.processEvents(QtCore.QEventLoop.ExcludeUserInputEvents)
+
     def element_z_index(self, element):
         return self.workarea.children().index(element)
 
@@ -193,6 +206,18 @@ Ctrl + mouse wheel - zoom in/out"""
         self.connectors_map.update(element.input_connectors)
         self.connectors_map.update(element.output_connectors)
 
+    def show_critical_path(self, critical_path):
+        """Highlights the critical path (see core/critical_path.py), or removes the highlight if it is None"""
+        for element in self.diagram.elements:
+            element.set_critical(critical_path is not None and critical_path.is_critical(element))
+        connections = critical_path.critical_connections() if critical_path is not None else []
+        self.wires_in_background.set_critical_connections(connections)
+
+    def show_memory_usage(self, memory_usage):
+        """Shows the memory retained by the elements (see core/memory.py), or hides it if memory_usage is None"""
+        for element in self.diagram.elements:
+            element.status_bar.set_memory(memory_usage.elements.get(element) if memory_usage is not None else None)
+
     @pyqtSlot(Element)
     def on_element_deleted(self, element):
         for connector in list(element.outputs.values()) + list(element.inputs.values()):
@@ -1,5 +1,22 @@
+import os
+
 from cvlab.view.config import ConfigWrapper, ELEMENTS_SECTION, EXPERIMENTAL_ELEMENTS
-if ConfigWrapper.get_settings().get_with_default(ELEMENTS_SECTION, EXPERIMENTAL_ELEMENTS) == "True":
+
+loaded = False
+
+
+def load():
+    """Registers the experimental elements (they are loaded once)"""
+    global loaded
+    if loaded:
+        return
+    loaded = True
     from cvlab.diagram.elements import load_auto, ignored_modules
     ignored_modules += ["sample"]
-    load_auto(__file__)
\ No newline at end of file
+    load_auto(__file__)
+
+
+# enabled in the GUI settings, or by CVLAB_EXPERIMENTAL=1 (e.g. for headless runs)
+if ConfigWrapper.get_settings().get_with_default(ELEMENTS_SECTION, EXPERIMENTAL_ELEMENTS) == "True" or \
+        os.environ.get("CVLAB_EXPERIMENTAL") == "1":
+    load()
\ No newline at end of file
@@ -27,6 +27,7 @@ class Enfuse(ProcessElement):
 class AlignStack(ProcessElement):
     name = "Align image stack"
     comment = "align_image_stack from Hugin"
+    disk_cacheable = True
 
     command = "align_image_stack  -midz -c 256 -g 1 --corr=0.3 -f 20 -a {output_dir}/ {inputs}"
 
@@ -12,6 +12,7 @@ from .thirdparty.pykinect import nui
 class Kinect(NormalElement):
     name = "Kinect (pykinect)"
     comment = "Reads data from Kinect device"
+    dedicated_thread = True
     device_lock = Lock()
 
     def __init__(self):
@@ -13,6 +13,7 @@ from cvlab.diagram.elements.video_io import Camera
 class KinectCamera(NormalElement):
     name = "Kinect (OpenNI)"
     comment = "Reads real-time video and depth from physical kinect device"
+    dedicated_thread = True
     device_lock = Camera.device_lock
 
     def __init__(self):
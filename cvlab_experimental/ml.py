@@ -28,6 +28,7 @@ def round_05(data, middle, classes_count=2):
 
 
 class Trainable(NormalElement):
+
     def train(self, train_data, responses, sample_weights):
         pass
 
@@ -10,6 +10,7 @@ class OpenCVAuto2_GaussianBlur(NormalElement):
     name = 'Gaussian Blur'
     comment = '''GaussianBlur(src, ksize, sigmaX[, dst[, sigmaY[, borderType]]]) -> dst\n@brief Blurs an image using a Gaussian filter.\n\nThe function convolves the source image with the specified Gaussian kernel. In-place filtering is\nsupported.\n\n@param src input image; the image can have any number of channels, which are processed\nindependently, but the depth should be CV_8U, CV_16U, CV_16S, CV_32F or CV_64F.\n@param dst output image of the same size and type as src.\n@param ksize Gaussian kernel size. ksize.width and ksize.height can differ but they both must be\npositive and odd. Or, they can be zero's and then they are computed from sigma.\n@param sigmaX Gaussian kernel standard deviation in X direction.\n@param sigmaY Gaussian kernel standard deviation in Y direction; if sigmaY is zero, it is set to be\nequal to sigmaX, if both sigmas are zeros, they are computed from ksize.width and ksize.height,\nrespectively (see #getGaussianKernel for details); to fully control the result regardless of\npossible future modifications of all this semantics, it is recommended to specify all of ksize,\nsigmaX, and sigmaY.\n@param borderType pixel extrapolation method, see #BorderTypes\n\n@sa  sepFilter2D, filter2D, blur, boxFilter, bilateralFilter, medianBlur'''
     package = "Filters"
+    tileable = True
 
     def get_attributes(self):
         return [Input('src', 'src')], \
@@ -19,6 +20,12 @@ class OpenCVAuto2_GaussianBlur(NormalElement):
                 FloatParameter('sigmaY', 'Sigma Y'),
                 ComboboxParameter('borderType', name='Border Type', values=[('BORDER_CONSTANT',0),('BORDER_REPLICATE',1),('BORDER_REFLECT',2),('BORDER_WRAP',3),('BORDER_DEFAULT',4),('BORDER_REFLECT101',4),('BORDER_REFLECT_101',4),('BORDER_TRANSPARENT',5),('BORDER_ISOLATED',16)])]
 
+    def tile_halo(self, parameters):
+        return None if parameters['borderType'] == cv2.BORDER_WRAP else gaussian_kernel_radius(parameters['ksize'], parameters['sigmaX'], parameters['sigmaY'])
+
+    def scale_parameters(self, parameters, scale):
+        return scale_pixel_parameters(parameters, scale, kernels=['ksize'], lengths=['sigmaX', 'sigmaY'])
+
     def process_inputs(self, inputs, outputs, parameters):
         src = inputs['src'].value
         ksize = parameters['ksize']
@@ -16,6 +16,13 @@ class MySampleElement(NormalElement):
     comment = "My first self-created element, hurray! :)"
     package = "My private elements"
 
+    # process_inputs below uses only its arguments, so items of sequences may be processed by several threads at once
+    # (leave it out if the element keeps any state in self)
+    parallel_units = True
+    # the outputs depend only on the inputs and parameters, so they may be taken from the result cache
+    # (leave it out if the results are random or depend on anything else)
+    cacheable = True
+
     def get_attributes(self):
         return [Input("input", name="Input")], \
                [Output("output-1", name="First output"), Output("output-2", name="Second output")], \
@@ -0,0 +1,131 @@
+import unittest
+
+import numpy as np
+
+from cvlab import headless     # switches CV Lab into headless mode, before the elements are imported
+from cvlab.bench.overhead import ThreadedSource
+from cvlab.core.array_map import ArrayMap
+from cvlab.core.cache import result_cache, MEGABYTE
+from cvlab.diagram.elements.base import *
+
+
+class Counted(NormalElement):
+    name = "Counted"
+    comment = "Adds the parameter to its input and counts the calculations"
+    cacheable = True
+
+    def __init__(self):
+        super(Counted, self).__init__()
+        self.calculations = 0
+
+    def get_attributes(self):
+        return [Input("input")], [Output("output")], [IntParameter("add", value=1, min_=0, max_=100)]
+
+    def process_inputs(self, inputs, outputs, parameters):
+        self.calculations += 1
+        outputs["output"] = Data(inputs["input"].value + parameters["add"])
+
+
+class NotCacheable(Counted):
+    name = "Not cacheable"
+    cacheable = False
+
+
+class ResultCacheTest(unittest.TestCase):
+    def setUp(self):
+        budget = result_cache.budget
+        result_cache.set_budget(16 * MEGABYTE)
+        result_cache.clear()
+        result_cache.reset_statistics()
+        self.addCleanup(result_cache.set_budget, budget)
+        self.addCleanup(result_cache.clear)
+
+        self.diagram = headless.create_diagram()
+        self.addCleanup(self.diagram.clear)
+        self.source = ThreadedSource()
+        self.diagram.add_element(self.source, (0, 0))
+        self.image = np.arange(64, dtype=np.int32).reshape(8, 8)
+        self.source.outputs["output"].put(Data(self.image))
+
+    def add(self, element_class):
+        element = element_class()
+        self.diagram.add_element(element, (len(self.diagram.elements), 0))
+        self.diagram.connect_io(self.source.outputs["output"], element.inputs["input"])
+        self.wait()
+        return element
+
+    def wait(self):
+        self.assertTrue(headless.wait_idle(self.diagram, 10))
+
+    def output(self, element):
+        return element.outputs["output"].get().value
+
+    def test_hit_for_the_same_inputs_and_parameters(self):
+        first = self.add(Counted)
+        second = self.add(Counted)
+        self.assertEqual((first.calculations, second.calculations), (1, 0))
+        np.testing.assert_array_equal(self.output(second), self.image + 1)
+        statistics = result_cache.statistics()
+        self.assertEqual((statistics["hits"], statistics["misses"], statistics["entries"]), (1, 1, 1))
+
+    def test_parameter_change_misses(self):
+        element = self.add(Counted)
+        element.parameters["add"].set(5)
+        self.wait()
+        self.assertEqual(element.calculations, 2)
+        np.testing.assert_array_equal(self.output(element), self.image + 5)
+        # the previous value of the parameter is still cached
+        element.parameters["add"].set(1)
+        self.wait()
+        self.assertEqual(element.calculations, 2)
+        np.testing.assert_array_equal(self.output(element), self.image + 1)
+
+    def test_input_change_misses(self):
+        element = self.add(Counted)
+        data = self.source.outputs["output"].get()
+        data.set_value(self.image * 2)
+        self.wait()
+        self.assertEqual(element.calculations, 2)
+        np.testing.assert_array_equal(self.output(element), self.image * 2 + 1)
+        # a new array with already seen content
+        data.set_value(self.image.copy())
+        self.wait()
+        self.assertEqual(element.calculations, 2)
+        np.testing.assert_array_equal(self.output(element), self.image + 1)
+
+    def test_elements_are_not_cached_by_default(self):
+        self.assertFalse(NormalElement.cacheable)
+        first = self.add(NotCacheable)
+        second = self.add(NotCacheable)
+        self.assertEqual((first.calculations, second.calculations), (1, 1))
+        self.assertEqual(result_cache.statistics()["entries"], 0)
+
+    def test_disabled_cache(self):
+        result_cache.set_budget(0)
+        first = self.add(Counted)
+        second = self.add(Counted)
+        self.assertEqual((first.calculations, second.calculations), (1, 1))
+
+
+class ArrayMapTest(unittest.TestCase):
+    def test_values_are_assigned_to_array_objects(self):
+        values = ArrayMap()
+        array = np.zeros(4)
+        values.set(array, "a")
+        self.assertEqual(values.get(array), "a")
+        self.assertIsNone(values.get(array.copy()))
+        values.set(array, "b", replace=False)
+        self.assertEqual(values.get(array), "a")
+        values.set(array, "b")
+        self.assertEqual(values.get(array), "b")
+
+    def test_entries_are_removed_with_arrays(self):
+        values = ArrayMap()
+        array = np.zeros(4)
+        values.set(array, "a")
+        del array
+        self.assertEqual(values.values, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from cvlab import headless     # switches CV Lab into headless mode, before the elements are imported
+from cvlab.diagram.chunked_array import ChunkedArray
+
+
+class ChunkedArrayTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="cvlab_test_")
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.array = np.arange(5 * 4 * 3, dtype=np.int16).reshape(5, 4, 3)
+
+    def test_indexing_across_chunks(self):
+        chunked = ChunkedArray.save(self.directory, self.array, chunk=2)
+        np.testing.assert_array_equal(chunked[:], self.array)
+        np.testing.assert_array_equal(chunked[1:4, 2], self.array[1:4, 2])
+        np.testing.assert_array_equal(chunked[-1], self.array[-1])
+        np.testing.assert_array_equal(chunked[::2, ..., 0], self.array[::2, ..., 0])
+
+    def test_fingerprint_changes_with_writes(self):
+        chunked = ChunkedArray.save(self.directory, self.array, chunk=2)
+        fingerprint = chunked.fingerprint()
+        self.assertEqual(ChunkedArray(self.directory).fingerprint()[:4], fingerprint[:4])
+        chunked[3, 0, 0] = -1
+        self.assertNotEqual(chunked.fingerprint(), fingerprint)
+
+    def test_fingerprint_changes_with_modified_chunks(self):
+        ChunkedArray.save(self.directory, self.array, chunk=2)
+        reader = ChunkedArray(self.directory)
+        fingerprint = reader.fingerprint()
+        writer = ChunkedArray(self.directory, "r+")
+        writer[4] = 0
+        writer.flush()
+        path = ChunkedArray.chunk_path(self.directory, 2)
+        os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 10 ** 9))
+        self.assertNotEqual(reader.fingerprint(), fingerprint)
+        self.assertEqual(reader[4].sum(), 0)
+
+    def test_temporary_arrays(self):
+        chunked = ChunkedArray.temporary((3, 2), np.uint8)
+        directory = chunked.directory
+        self.assertFalse(chunked.disk_cacheable)
+        self.assertTrue(callable(chunked.temporary))
+        self.assertTrue(ChunkedArray(directory).disk_cacheable)
+        del chunked
+        self.assertFalse(os.path.exists(directory))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+import numpy as np
+
+from cvlab import headless     # switches CV Lab into headless mode, before the elements are imported
+from cvlab.diagram.elements.base import *
+from cvlab.diagram.elements.code import CodeElement
+
+
+class ChannelNegation(NormalElement):
+    name = "Channel negation"
+    comment = "Negates each channel separately"
+
+    def get_attributes(self):
+        return [Input("input")], [Output("output")], []
+
+    def process_channels(self, inputs, outputs, parameters):
+        assert inputs["input"].value.ndim == 2
+        outputs["output"] = Data(255 - inputs["input"].value)
+
+
+class ProcessChannelsTest(unittest.TestCase):
+    def setUp(self):
+        self.image = np.random.default_rng(0).integers(0, 256, (32, 48, 3), np.uint8)
+
+    def process(self, element, parameters):
+        outputs = {}
+        element.process_inputs({"input": Data(self.image)}, outputs, parameters)
+        return outputs["output"].value
+
+    def test_channels_are_processed_separately(self):
+        output = self.process(ChannelNegation(), {})
+        np.testing.assert_array_equal(output, 255 - self.image)
+
+    def test_code_element_in_channels_mode(self):
+        element = CodeElement()
+        parameters = {"code": "return image // 2", "split_channels": True}
+        output = self.process(element, parameters)
+        np.testing.assert_array_equal(output, self.image // 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
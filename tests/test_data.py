@@ -0,0 +1,122 @@
+import unittest
+
+import numpy as np
+
+from cvlab import headless     # switches CV Lab into headless mode, before the elements are imported
+from cvlab.bench.overhead import ThreadedSource
+from cvlab.diagram.data import DataList
+from cvlab.diagram.elements.base import *
+
+
+def images(count):
+    return [np.full((2, 2), i, np.uint8) for i in range(count)]
+
+
+def created_items(sequence):
+    """Number of Data objects created for the items of a flat sequence"""
+    return sum(item is not None for item in sequence._value._items)
+
+
+class Increment(NormalElement):
+    name = "Increment"
+    comment = "Adds 1 to its input"
+
+    def get_attributes(self):
+        return [Input("input")], [Output("output")], []
+
+    def process_inputs(self, inputs, outputs, parameters):
+        outputs["output"] = Data(inputs["input"].value + 1)
+
+
+class ImageSequenceTest(unittest.TestCase):
+    def test_items_are_created_on_access(self):
+        sequence = ImageSequence(images(5))
+        self.assertEqual(sequence.type(), Data.SEQUENCE)
+        self.assertEqual(len(sequence.value), 5)
+        self.assertEqual(created_items(sequence), 0)
+        item = sequence.value[3]
+        self.assertIsInstance(item, Data)
+        self.assertIs(sequence.value[3], item)
+        self.assertEqual(item.value[0, 0], 3)
+        self.assertEqual(created_items(sequence), 1)
+        self.assertEqual([v[0, 0] for v in sequence.desequence_all()], list(range(5)))
+
+    def test_copy_and_placeholder_do_not_create_items(self):
+        sequence = ImageSequence(images(5))
+        sequence.value[1].value = np.zeros((3, 3), np.uint8)
+        copy = sequence.copy()
+        placeholder = sequence.create_placeholder()
+        self.assertIsInstance(copy.value, DataList)
+        self.assertEqual((created_items(copy), created_items(placeholder)), (0, 0))
+        self.assertEqual(copy.value[1].value.shape, (3, 3))
+        self.assertTrue(sequence.is_compatible(placeholder))
+        self.assertFalse(placeholder.is_complete())
+        # the copy is independent of the sequence
+        copy.value[0].value = None
+        self.assertEqual(sequence.value[0].value[0, 0], 0)
+
+    def test_assign_and_clear(self):
+        sequence = ImageSequence(images(4))
+        placeholder = sequence.create_placeholder()
+        placeholder.assign(sequence)
+        self.assertTrue(placeholder.is_complete())
+        self.assertEqual([v[0, 0] for v in placeholder.desequence_all()], list(range(4)))
+        placeholder.clear()
+        self.assertEqual(placeholder.desequence_all(), [None] * 4)
+        self.assertEqual(len(sequence.desequence_all()), 4)
+
+    def test_recursive_observers_get_changes_of_items(self):
+        sequence = ImageSequence(images(3))
+        changed = []
+        sequence.add_observer(changed.append, True)
+        sequence.value.set_value(2, np.ones((2, 2), np.uint8))
+        self.assertEqual(changed, [sequence.value[2]])
+        sequence.remove_observer(changed.append, True)
+        sequence.value[2].value = None
+        self.assertEqual(len(changed), 1)
+
+    def test_unobserved_items_are_set_without_data_objects(self):
+        sequence = ImageSequence(images(3))
+        sequence.value.set_value(1, None)
+        self.assertEqual(created_items(sequence), 0)
+        self.assertIsNone(sequence.desequence_all()[1])
+
+    def test_element_processes_each_image(self):
+        diagram = headless.create_diagram()
+        self.addCleanup(diagram.clear)
+        source = ThreadedSource()
+        diagram.add_element(source, (0, 0))
+        source.outputs["output"].put(ImageSequence(images(6)))
+        element = Increment()
+        diagram.add_element(element, (1, 0))
+        diagram.connect_io(source.outputs["output"], element.inputs["input"])
+        self.assertTrue(headless.wait_idle(diagram, 10))
+        output = element.outputs["output"].get()
+        self.assertEqual([v[0, 0] for v in output.desequence_all()], list(range(1, 7)))
+
+
+class DataTest(unittest.TestCase):
+    def test_set_value_notifies_each_observer_once(self):
+        data = Data(1)
+        changed = []
+        data.add_observer(changed.append, False)
+        data.add_observer(changed.append, False)
+        data.set_value(2, 7)
+        self.assertEqual((changed, data.value, data.frame), ([data], 2, 7))
+        # the same value and frame - no notification
+        data.set_value(2, 7)
+        self.assertEqual(len(changed), 1)
+        data.remove_observer(changed.append, False)
+        data.value = 3
+        self.assertEqual(len(changed), 2)
+
+    def test_copy_keeps_frame(self):
+        data = Data(np.zeros(1))
+        data.frame = 5
+        copy = data.copy()
+        self.assertIs(copy.value, data.value)
+        self.assertEqual(copy.frame, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
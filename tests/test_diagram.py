@@ -0,0 +1,63 @@
+import random
+import unittest
+
+from cvlab import headless     # switches CV Lab into headless mode, before the elements are imported
+from cvlab.diagram.elements.data_flow import Forwarder
+from cvlab.diagram.elements.operators import PlusOperator
+
+
+class TopologicalOrderTest(unittest.TestCase):
+    def setUp(self):
+        self.diagram = headless.create_diagram()
+        self.addCleanup(self.diagram.clear)
+
+    def add(self, count):
+        elements = [Forwarder() for _ in range(count)]
+        for i, element in enumerate(elements):
+            self.diagram.add_element(element, (i, 0))
+        return elements
+
+    def connect(self, source, target):
+        self.diagram.connect_io(source.outputs["output"], list(target.inputs.values())[0])
+
+    def assert_valid_order(self):
+        order = self.diagram.topological_order()
+        ranks = {element: rank for rank, element in enumerate(order)}
+        self.assertEqual(set(order), self.diagram.elements)
+        for output, input_ in self.diagram.connections:
+            self.assertLess(ranks[output.parent], ranks[input_.parent])
+        # the ranks used by the scheduler agree with the order
+        self.assertEqual(sorted(order, key=self.diagram.topological_rank), order)
+
+    def test_elements_connected_against_the_order_of_adding(self):
+        a, b, c = self.add(3)
+        self.connect(c, b)
+        self.connect(b, a)
+        self.assertEqual(self.diagram.topological_order(), [c, b, a])
+
+    def test_random_graph(self):
+        rng = random.Random(0)
+        elements = [PlusOperator() if i % 5 == 0 else Forwarder() for i in range(300)]    # in topological order
+        for position, index in enumerate(rng.sample(range(len(elements)), len(elements))):
+            self.diagram.add_element(elements[index], (position, 0))
+        for index, element in enumerate(elements[1:], 1):
+            for _ in range(3 if isinstance(element, PlusOperator) else 1):
+                self.connect(elements[rng.randrange(max(0, index - 20), index)], element)
+        self.assert_valid_order()
+
+    def test_loops_are_rejected(self):
+        a, b, c, d = self.add(4)
+        self.connect(a, b)
+        self.connect(b, c)
+        self.connect(c, a)      # it would make a loop
+        self.assertEqual(len(self.diagram.connections), 2)
+        self.connect(d, a)      # does not agree with the order - remembered until the order is needed
+        self.connect(c, d)      # a loop through the remembered connection
+        self.assertEqual(len(self.diagram.connections), 3)
+        self.assert_valid_order()
+        self.connect(a, a)
+        self.assertEqual(len(self.diagram.connections), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import cv2 as cv
+import numpy as np
+
+from cvlab import headless     # switches CV Lab into headless mode, before the elements are imported
+from cvlab.core.file_cache import FileCache, file_cache
+from cvlab.diagram.data import FileValue
+from cvlab.diagram.elements.base import *
+from cvlab.diagram.elements.image_io import ImageSequenceLoader
+
+
+class CountingReader:
+    def __init__(self):
+        self.reads = []
+
+    def __call__(self, path):
+        self.reads.append(path)
+        return np.load(path)
+
+
+class FilesTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix="cvlab_test_")
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.reader = CountingReader()
+
+    def file(self, name, value):
+        path = os.path.join(self.directory, name)
+        np.save(path, value)
+        return path + ".npy"
+
+
+class FileValueTest(FilesTest):
+    def setUp(self):
+        super(FileValueTest, self).setUp()
+        budget = file_cache.budget
+        self.addCleanup(file_cache.set_budget, budget)
+        self.addCleanup(file_cache.clear)
+        file_cache.clear()
+
+    def test_file_is_read_on_access_only(self):
+        path = self.file("a", np.arange(4))
+        data = Data(FileValue(path, self.reader))
+        placeholder = data.create_placeholder()
+        placeholder.assign(data)
+        copy = data.copy()
+        self.assertEqual(data.type(), Data.IMAGE)
+        self.assertTrue(copy.is_complete())
+        self.assertEqual(self.reader.reads, [])
+        np.testing.assert_array_equal(placeholder.value, np.arange(4))
+        self.assertEqual(self.reader.reads, [path])
+
+    def test_read_values_are_cached(self):
+        path = self.file("a", np.arange(4))
+        value = FileValue(path, self.reader)
+        first = Data(value).value
+        self.assertIs(Data(FileValue(path, self.reader)).value, first)
+        self.assertEqual(len(self.reader.reads), 1)
+
+    def test_modified_file_is_read_again(self):
+        path = self.file("a", np.arange(4))
+        Data(FileValue(path, self.reader)).value
+        self.file("a", np.arange(5))
+        os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 10 ** 9))
+        np.testing.assert_array_equal(Data(FileValue(path, self.reader)).value, np.arange(5))
+        self.assertEqual(len(self.reader.reads), 2)
+
+    def test_disabled_cache_reads_on_each_access(self):
+        file_cache.set_budget(0)
+        data = Data(FileValue(self.file("a", np.arange(4)), self.reader))
+        data.value
+        data.value
+        self.assertEqual(len(self.reader.reads), 2)
+
+    def test_sequence_loader_produces_lazy_items(self):
+        paths = []
+        for i in range(3):
+            paths.append(os.path.join(self.directory, "{}.png".format(i)))
+            cv.imwrite(paths[-1], np.full((4, 4, 3), i * 10, np.uint8))
+        paths.append(os.path.join(self.directory, "not an image.txt"))
+        with open(paths[-1], "w") as f:
+            f.write("text")
+
+        diagram = headless.create_diagram()
+        self.addCleanup(diagram.clear)
+        loader = ImageSequenceLoader()
+        loader.parameters["paths"].set(paths)
+        diagram.add_element(loader, (0, 0))
+        self.assertTrue(headless.wait_idle(diagram, 10))
+        sequence = loader.outputs["output"].get()
+        raw = sequence.value._raw_values()
+        self.assertTrue(all(isinstance(value, FileValue) for value in raw[:3]))
+        self.assertIsNone(raw[3])
+        self.assertEqual([None if v is None else v[0, 0, 0] for v in sequence.desequence_all()], [0, 10, 20, None])
+
+
+class FileCacheTest(FilesTest):
+    def values(self, count, size):
+        return [FileValue(self.file(str(i), np.zeros(size, np.uint8)), self.reader) for i in range(count)]
+
+    def test_least_recently_used_values_are_evicted(self):
+        cache = FileCache(3000)
+        values = self.values(4, 1000)
+        for value in values[:3]:
+            cache.get(value)
+        cache.get(values[0])        # the first value is used again, the second one is the oldest now
+        cache.get(values[3])
+        statistics = cache.statistics()
+        self.assertEqual((statistics["entries"], statistics["bytes"], statistics["evictions"]), (3, 3000, 1))
+        self.assertEqual((statistics["hits"], statistics["misses"]), (1, 4))
+        cache.get(values[1])
+        self.assertEqual(len(self.reader.reads), 5)
+        cache.get(values[0])
+        self.assertEqual(len(self.reader.reads), 5)
+
+    def test_values_bigger_than_the_budget_are_not_stored(self):
+        cache = FileCache(500)
+        value = self.values(1, 1000)[0]
+        self.assertEqual(cache.get(value).size, 1000)
+        self.assertEqual(cache.statistics()["entries"], 0)
+
+    def test_trim_and_budget(self):
+        cache = FileCache(10000)
+        for value in self.values(5, 1000):
+            cache.get(value)
+        self.assertEqual(cache.trim(1500), 2000)
+        self.assertEqual(cache.statistics()["entries"], 3)
+        cache.set_budget(1000)
+        self.assertEqual((cache.statistics()["entries"], cache.statistics()["bytes"]), (1, 1000))
+
+
+if __name__ == "__main__":
+    unittest.main()
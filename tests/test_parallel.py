@@ -0,0 +1,109 @@
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from cvlab import headless     # switches CV Lab into headless mode, before the elements are imported
+from cvlab.bench.overhead import ThreadedSource
+from cvlab.core.parallel import process_in_parallel
+from cvlab.diagram.elements.base import *
+
+
+ITEMS = 8
+
+
+class Delayed(NormalElement):
+    name = "Delayed"
+    comment = "Passes its input on, the first items are the slowest; the item equal to 'fail' raises an error"
+    parallel_units = True
+
+    def __init__(self):
+        super(Delayed, self).__init__()
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def get_attributes(self):
+        return [Input("input")], [Output("output")], [IntParameter("fail", value=-1, min_=-1, max_=ITEMS)]
+
+    def process_inputs(self, inputs, outputs, parameters):
+        value = inputs["input"].value
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        try:
+            time.sleep(0.002 * (ITEMS - int(value[0, 0])))
+            if value[0, 0] == parameters["fail"]:
+                raise ValueError("item {} failed".format(value[0, 0]))
+            outputs["output"] = Data(value + 100)
+        finally:
+            with self.lock:
+                self.running -= 1
+
+
+class Sequential(Delayed):
+    name = "Sequential"
+    parallel_units = False
+
+
+class ParallelUnitsTest(unittest.TestCase):
+    def run_sequence(self, element_class, fail=-1):
+        diagram = headless.create_diagram()
+        self.addCleanup(diagram.clear)
+        source = ThreadedSource()
+        diagram.add_element(source, (0, 0))
+        source.outputs["output"].put(Sequence([Data(np.full((1, 1), i, np.int32)) for i in range(ITEMS)]))
+        element = element_class()
+        element.parameters["fail"].set(fail)
+        diagram.add_element(element, (1, 0))
+        diagram.connect_io(source.outputs["output"], element.inputs["input"])
+        self.assertTrue(headless.wait_idle(diagram, 10))
+        return element
+
+    def test_outputs_keep_order_of_units(self):
+        element = self.run_sequence(Delayed)
+        output = element.outputs["output"].get()
+        self.assertEqual([int(d.value[0, 0]) for d in output.value], list(range(100, 100 + ITEMS)))
+        self.assertEqual(element.state, element.STATE_READY)
+
+    def test_error_of_one_unit_is_reported(self):
+        element = self.run_sequence(Delayed, fail=3)
+        self.assertEqual(element.state, element.STATE_ERROR)
+        self.assertIn("item 3 failed", element.message)
+        self.assertEqual(element.running, 0)
+
+    def test_units_are_sequential_without_opt_in(self):
+        self.assertFalse(NormalElement.parallel_units)
+        element = self.run_sequence(Sequential)
+        self.assertEqual(element.max_running, 1)
+        self.assertEqual([int(d.value[0, 0]) for d in element.outputs["output"].get().value],
+                         list(range(100, 100 + ITEMS)))
+
+
+class ProcessInParallelTest(unittest.TestCase):
+    def test_results_keep_order_of_items(self):
+        results = process_in_parallel(lambda i: time.sleep(0.002 * (10 - i)) or i * i, range(10))
+        self.assertEqual(results, [i * i for i in range(10)])
+
+    def test_error_cancels_waiting_calls_and_waits_for_running_ones(self):
+        started, finished = [], []
+
+        def call(i):
+            started.append(i)
+            if i == 0:
+                raise ValueError("first")
+            time.sleep(0.01)
+            finished.append(i)
+
+        with self.assertRaises(ValueError):
+            process_in_parallel(call, range(200))
+        # nothing is running after the error is raised, and the calls waiting in the pool were not started
+        self.assertEqual(sorted(finished), sorted(i for i in started if i != 0))
+        time.sleep(0.05)
+        self.assertEqual(sorted(finished), sorted(i for i in started if i != 0))
+        self.assertLess(len(started), 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from cvlab import headless     # switches CV Lab into headless mode, before the elements are imported
+from cvlab.bench.overhead import ThreadedSource
+from cvlab.diagram.elements.base import *
+
+
+class Recorded(NormalElement):
+    name = "Recorded"
+    comment = "Adds the parameter to its input and records its calculations in the log of the test"
+    log = None
+    lock = threading.Lock()
+
+    def get_attributes(self):
+        return [Input("input")], [Output("output")], [IntParameter("add", value=1, min_=0, max_=100)]
+
+    def process_inputs(self, inputs, outputs, parameters):
+        time.sleep(0.005)
+        with self.lock:
+            self.log.append(self)
+        outputs["output"] = Data(inputs["input"].value + parameters["add"])
+
+
+class RecordedJoin(Recorded):
+    name = "Recorded join"
+
+    def get_attributes(self):
+        return [Input("a"), Input("b")], [Output("output")], []
+
+    def process_inputs(self, inputs, outputs, parameters):
+        with self.lock:
+            self.log.append(self)
+        outputs["output"] = Data(inputs["a"].value + inputs["b"].value)
+
+
+class SchedulerTest(unittest.TestCase):
+    """
+    Diamond graph:  source -> b ------> join
+                    source -> x -> c -> join
+    """
+
+    def setUp(self):
+        Recorded.log = []
+        self.diagram = headless.create_diagram(workers=4)
+        self.addCleanup(self.diagram.clear)
+        self.scheduler = self.diagram.scheduler
+        self.source = ThreadedSource()
+        self.b, self.x, self.c = Recorded(), Recorded(), Recorded()
+        self.join = RecordedJoin()
+        for i, element in enumerate((self.source, self.b, self.x, self.c, self.join)):
+            self.diagram.add_element(element, (i, 0))
+        self.source.outputs["output"].put(Data(np.zeros((4, 4), np.int32)))
+        self.connect(self.source, self.b, "input")
+        self.connect(self.source, self.x, "input")
+        self.connect(self.x, self.c, "input")
+        self.connect(self.b, self.join, "a")
+        self.connect(self.c, self.join, "b")
+        self.wait()
+        self.reset()
+
+    def connect(self, source, target, name):
+        self.diagram.connect_io(source.outputs["output"], target.inputs[name])
+
+    def wait(self):
+        self.assertTrue(headless.wait_idle(self.diagram, 10))
+
+    def reset(self):
+        self.scheduler.reset_counters()
+        del Recorded.log[:]
+
+    def set_source(self, value):
+        self.source.outputs["output"].get().set_value(np.full((4, 4), value, np.int32))
+
+    def result(self):
+        return int(self.join.outputs["output"].get().value[0, 0])
+
+    def assert_topological(self):
+        log = Recorded.log
+        for before, after in ((self.b, self.join), (self.x, self.c), (self.c, self.join)):
+            if before in log and after in log:
+                self.assertLess(log.index(before), log.index(after))
+
+    def test_each_dirty_element_is_calculated_once(self):
+        self.set_source(10)
+        self.wait()
+        self.assertEqual(self.result(), 11 + 12)
+        self.assertEqual(self.scheduler.counters()["calculations"], 4)
+        self.assertEqual(self.scheduler.calculation_counts[self.join], 1)
+        self.assertEqual(sorted(map(id, Recorded.log)), sorted(map(id, (self.b, self.x, self.c, self.join))))
+        self.assert_topological()
+
+    def test_only_the_changed_branch_is_calculated(self):
+        self.x.parameters["add"].set(5)
+        self.wait()
+        self.assertEqual(self.result(), 1 + 6)
+        self.assertEqual(Recorded.log, [self.x, self.c, self.join])
+        self.assertEqual(self.scheduler.counters()["calculations"], 3)
+
+    def test_changes_while_suspended_are_calculated_once_on_resume(self):
+        with self.scheduler.suspended():
+            self.set_source(10)
+            self.b.parameters["add"].set(2)
+            self.x.parameters["add"].set(3)
+            self.set_source(20)
+            time.sleep(0.05)
+            self.assertEqual(self.scheduler.counters()["calculations"], 0)
+        self.wait()
+        self.assertEqual(self.result(), 22 + 24)
+        for element in (self.b, self.x, self.c, self.join):
+            self.assertEqual(self.scheduler.calculation_counts[element], 1)
+        self.assert_topological()
+
+    def test_nested_suspend(self):
+        self.scheduler.suspend()
+        self.scheduler.suspend()
+        self.set_source(10)
+        self.scheduler.resume()
+        time.sleep(0.05)
+        self.assertEqual(self.scheduler.counters()["calculations"], 0)
+        self.scheduler.resume()
+        self.wait()
+        self.assertEqual(self.result(), 11 + 12)
+        self.assertEqual(self.scheduler.counters()["calculations"], 4)
+
+    def test_suspended_resumes_after_an_error(self):
+        with self.assertRaises(ValueError):
+            with self.scheduler.suspended():
+                self.set_source(10)
+                raise ValueError()
+        self.wait()
+        self.assertEqual(self.result(), 11 + 12)
+
+
+if __name__ == "__main__":
+    unittest.main()
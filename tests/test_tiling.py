@@ -0,0 +1,106 @@
+import unittest
+
+import numpy as np
+
+from cvlab import headless     # switches CV Lab into headless mode, before the elements are imported
+from cvlab.bench.overhead import ThreadedSource
+from cvlab.core import tiling
+from cvlab.diagram.elements.base import *
+from cvlab.diagram.elements.blur import OpenCVBlur
+from cvlab.diagram.elements.filters import OpenCVDilate, OpenCVErode, OpenCVMorphologyEx
+
+
+def parameters(element, **values):
+    result = {name: parameter.get() for name, parameter in element.parameters.items()}
+    result.update(values)
+    return result
+
+
+def process_whole(element, parameters, image):
+    outputs = {}
+    element.process_inputs({"input": Data(image)}, outputs, parameters)
+    return outputs["output"].value
+
+
+class TilingTest(unittest.TestCase):
+    def setUp(self):
+        # small tiles, so that small images are split into many tiles (also partial ones at the borders)
+        sizes = tiling.TILE_SIZE, tiling.TILING_MIN_PIXELS
+        tiling.TILE_SIZE, tiling.TILING_MIN_PIXELS = 32, 0
+        self.addCleanup(setattr, tiling, "TILE_SIZE", sizes[0])
+        self.addCleanup(setattr, tiling, "TILING_MIN_PIXELS", sizes[1])
+        random = np.random.default_rng(0)
+        self.images = [random.integers(0, 256, (100, 75), np.uint8),
+                       random.integers(0, 256, (70, 131, 3), np.uint8)]
+
+    def steps(self, *elements):
+        return [(element, p, element.tile_halo(p)) for element, p in elements]
+
+    def assert_tiled_equal(self, *elements):
+        for image in self.images:
+            whole = image
+            for element, p in elements:
+                whole = process_whole(element, p, whole)
+            tiled = tiling.process_tiled(image, self.steps(*elements))
+            np.testing.assert_array_equal(tiled, whole)
+
+    def test_single_elements(self):
+        blur = OpenCVBlur()
+        dilate = OpenCVDilate()
+        erode = OpenCVErode()
+        morphology = OpenCVMorphologyEx()
+        self.assert_tiled_equal((blur, parameters(blur, ratio=9)))
+        self.assert_tiled_equal((dilate, parameters(dilate, **{"element size": 7, "iterations": 2})))
+        self.assert_tiled_equal((erode, parameters(erode, **{"element size": 5})))
+        for operation in (cv.MORPH_OPEN, cv.MORPH_CLOSE, cv.MORPH_GRADIENT):
+            self.assert_tiled_equal((morphology, parameters(morphology, operation=operation, iterations=2)))
+
+    def test_chain_with_summed_halos(self):
+        blur, dilate, erode = OpenCVBlur(), OpenCVDilate(), OpenCVErode()
+        self.assert_tiled_equal((blur, parameters(blur, ratio=5)),
+                                (dilate, parameters(dilate, **{"element size": 9})),
+                                (erode, parameters(erode, **{"element size": 3, "iterations": 3})))
+
+    def test_too_small_halo_breaks_the_result(self):
+        # the test would not notice missing halos otherwise
+        blur = OpenCVBlur()
+        p = parameters(blur, ratio=9)
+        image = self.images[0]
+        tiled = tiling.process_tiled(image, [(blur, p, 0)])
+        self.assertFalse(np.array_equal(tiled, process_whole(blur, p, image)))
+
+    def test_chain_in_diagram_is_processed_lazily(self):
+        image = self.images[1]
+        diagram = headless.create_diagram()
+        self.addCleanup(diagram.clear)
+        source = ThreadedSource()
+        diagram.add_element(source, (0, 0))
+        source.outputs["output"].put(Data(image))
+        previous = source
+        chain = []
+        for i, element in enumerate((OpenCVBlur(), OpenCVDilate(), OpenCVErode())):
+            diagram.add_element(element, (i + 1, 0))
+            diagram.connect_io(previous.outputs["output"], element.inputs["input"])
+            chain.append(element)
+            previous = element
+        self.assertTrue(headless.wait_idle(diagram, 10))
+
+        value = previous.outputs["output"].get()._value
+        self.assertIsInstance(value, tiling.TiledValue)
+        self.assertEqual(len(value.steps), 3)
+        whole = image
+        for element in chain:
+            whole = process_whole(element, parameters(element), whole)
+        np.testing.assert_array_equal(previous.outputs["output"].get().value, whole)
+
+    def test_big_halos_and_small_images_are_not_tiled(self):
+        blur = OpenCVBlur()
+        data = {"input": Data(self.images[0])}
+        self.assertTrue(tiling.tiling_applies(blur, data, parameters(blur, ratio=3)))
+        self.assertFalse(tiling.tiling_applies(blur, data, parameters(blur, ratio=2 * tiling.MAX_HALO + 3)))
+        tiling.TILING_MIN_PIXELS = 1 << 24
+        self.assertFalse(tiling.tiling_applies(blur, data, parameters(blur, ratio=3)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -20,6 +20,17 @@ SIZE = "size"
 POINT = "point"
 ENUM = "enum"
 
+# radius of the neighborhood of local filters (code of tile_halo), so that they may process big images in tiles
+TILE_HALOS = {
+    "GaussianBlur": "None if parameters['borderType'] == cv2.BORDER_WRAP else "
+                    "gaussian_kernel_radius(parameters['ksize'], parameters['sigmaX'], parameters['sigmaY'])",
+}
+
+# parameters in pixels (arguments of scale_pixel_parameters), which are scaled for proxy evaluation
+PIXEL_PARAMETERS = {
+    "GaussianBlur": "kernels=['ksize'], lengths=['sigmaX', 'sigmaY']",
+}
+
 
 def nice_name(name):
     if len(name) <= 1:
@@ -222,15 +233,23 @@ class Function:
 class {class_name}(NormalElement):
     name = '{element_name}'
     comment = '''{element_comment}'''
-    {package}
+    {package}{tileable}
 
     def get_attributes(self):
         return [{inputs_def}], \\
                [{outputs_def}], \\
                [{params_def}]
-
+{tile_halo}{scale_parameters}
     def process_inputs(self, inputs, outputs, parameters):
         {code}
+"""
+    tile_halo_template = """
+    def tile_halo(self, parameters):
+        return {halo}
+"""
+    scale_parameters_template = """
+    def scale_parameters(self, parameters, scale):
+        return scale_pixel_parameters(parameters, scale, {arguments})
 """
     params_indent = "                "
     code_indent = "        "
@@ -293,6 +312,10 @@ class {class_name}(NormalElement):
         element_name = nice_name(element_name)
 
         package = 'package = "{self.group}"'.format(**locals()) if self.group else ""
+        tileable = "\n    tileable = True" if self.name in TILE_HALOS else ""
+        tile_halo = self.tile_halo_template.format(halo=TILE_HALOS[self.name]) if self.name in TILE_HALOS else ""
+        scale_parameters = self.scale_parameters_template.format(arguments=PIXEL_PARAMETERS[self.name]) \
+            if self.name in PIXEL_PARAMETERS else ""
 
         args = []
         for arg in self.args.values():
@@ -1,7 +1,11 @@
-from stacktracer import trace_start, trace_stop
+from cvlab.core import tracer
 
 if __name__ == '__main__':
-    trace_start("trace.html", interval=5, auto=True)
+    # open trace.json in chrome://tracing or ui.perfetto.dev
+    tracer.start()
     from cvlab import main
-    main()
-    trace_stop()
+    try:
+        main()
+    finally:
+        tracer.stop()
+        tracer.export("trace.json")